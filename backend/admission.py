@@ -0,0 +1,206 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Tuple
+from . import timing
+from config import (
+    ADMISSION_SLOTS,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_DEFAULT_SLOTS,
+    ADMISSION_DEFAULT_MAX_QUEUE,
+    ADMISSION_MAX_WAIT,
+    ADMISSION_INITIAL_SERVICE_TIME,
+)
+
+
+class QueueFullError(Exception):
+    """Raised when a model's admission queue cannot take another request."""
+
+    def __init__(self, model: str, retry_after: int, reason: str = "queue full"):
+        super().__init__(f"{model} {reason}, retry after {retry_after}s")
+        self.model = model
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _ModelLane:
+    """Concurrency slots and FIFO wait queue for a single model."""
+
+    # Weight of the newest sample in the service-time moving average
+    _ALPHA = 0.2
+
+    def __init__(self, slots: int, max_queue: int):
+        self.slots = slots
+        self.max_queue = max_queue
+        self.in_use = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.service_time = ADMISSION_INITIAL_SERVICE_TIME
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        self.admitted += 1
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+    def record_service(self, seconds: float):
+        self.service_time += self._ALPHA * (seconds - self.service_time)
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a new request could be admitted."""
+        estimate = self.service_time * (len(self.waiters) + 1) / self.slots
+        return max(1, math.ceil(estimate))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "in_use": self.in_use,
+            "queue_depth": len(self.waiters),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": (self.wait_total / self.admitted * 1000) if self.admitted else 0.0,
+            "max_wait_ms": self.wait_max * 1000,
+            "avg_service_ms": self.service_time * 1000,
+            "retry_after": self.retry_after(),
+        }
+
+
+class AdmissionController:
+    """
+    Bounded per-model admission with backpressure.
+
+    Each model gets a fixed number of concurrent upstream slots per Ollama
+    node and a bounded FIFO queue of waiters. When the queue is full, or a
+    waiter exceeds `ADMISSION_MAX_WAIT`, `QueueFullError` carries a
+    Retry-After estimate derived from recent service times.
+    """
+
+    def __init__(
+        self,
+        slots: Dict[str, int] | None = None,
+        max_queue: Dict[str, int] | None = None,
+        max_wait: float | None = None,
+        node_count: int = 1,
+    ):
+        self.node_count = max(1, node_count)
+        self.slots = slots if slots is not None else ADMISSION_SLOTS
+        self.max_queue = max_queue if max_queue is not None else ADMISSION_MAX_QUEUE
+        self.max_wait = float(max_wait if max_wait is not None else ADMISSION_MAX_WAIT)
+        self._lanes: Dict[str, _ModelLane] = {}
+
+    def _lane(self, model: str) -> _ModelLane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = _ModelLane(
+                self.slots.get(model, ADMISSION_DEFAULT_SLOTS) * self.node_count,
+                self.max_queue.get(model, ADMISSION_DEFAULT_MAX_QUEUE),
+            )
+            self._lanes[model] = lane
+        return lane
+
+    async def acquire(self, model: str):
+        """
+        Wait for a free slot for `model`.
+
+        Raises:
+            QueueFullError: If the queue is full or the wait exceeds the limit
+        """
+        lane = self._lane(model)
+        if lane.in_use < lane.slots and not lane.waiters:
+            lane.in_use += 1
+            lane.record_wait(0.0)
+            return
+
+        if len(lane.waiters) >= lane.max_queue:
+            lane.rejected += 1
+            raise QueueFullError(model, lane.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            self._discard(lane, waiter)
+            lane.timed_out += 1
+            raise QueueFullError(model, lane.retry_after(), reason="queue wait timed out")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before cancellation; pass it on
+                self._release(lane)
+            else:
+                self._discard(lane, waiter)
+            raise
+        lane.record_wait(time.perf_counter() - started)
+
+    def release(self, model: str, service_time: float | None = None):
+        """Return a slot for `model`, handing it to the next waiter if any."""
+        lane = self._lane(model)
+        if service_time is not None:
+            lane.record_service(service_time)
+        self._release(lane)
+
+    @asynccontextmanager
+    async def slot(self, model: str) -> AsyncIterator[None]:
+        """Hold one slot for `model` for the duration of the block."""
+        await self.acquire(model)
+        timing.mark("queue")
+        started = time.perf_counter()
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            # An aborted request says nothing about how long one takes
+            self.release(model)
+            raise
+        except BaseException:
+            self.release(model, time.perf_counter() - started)
+            raise
+        else:
+            self.release(model, time.perf_counter() - started)
+
+    @staticmethod
+    def _release(lane: _ModelLane):
+        while lane.waiters:
+            waiter = lane.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        lane.in_use -= 1
+
+    @staticmethod
+    def _discard(lane: _ModelLane, waiter: asyncio.Future):
+        try:
+            lane.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def estimated_latency(self, model: str) -> Tuple[float, float]:
+        """
+        Expected (queue wait, service time) in seconds for a `model` request arriving now.
+
+        Both come from the moving average of recent service times; the wait
+        assumes the queue ahead drains across all of the model's slots.
+        """
+        lane = self._lane(model)
+        ahead = len(lane.waiters) + 1 if lane.in_use >= lane.slots else 0
+        return lane.service_time * ahead / lane.slots, lane.service_time
+
+    def queue_depth(self, model: str | None = None) -> int:
+        """Number of waiting requests for one model, or for all models."""
+        if model is not None:
+            return len(self._lane(model).waiters)
+        return sum(len(lane.waiters) for lane in self._lanes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-model slot usage, queue depth and wait times."""
+        for model in self.slots:
+            self._lane(model)
+        return {model: lane.snapshot() for model, lane in self._lanes.items()}
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+from .models import GenerateRequest, GenerateResponse, BatchItemResult, RoutingDecision
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRunner:
+    """
+    Fan a batch of generate requests out under a per-model concurrency limit.
+
+    Model selection runs per item, so a batch mixing thinking and normal
+    prompts is split across the models' separate limits. Each result
+    carries its routing decision, and `degraded` when an open circuit sent
+    the item to the fallback model. The semaphores are
+    shared by every batch, so concurrent batch calls respect the same limit.
+    """
+
+    def __init__(
+        self,
+        select: Callable[[GenerateRequest], RoutingDecision],
+        generate: Callable[[GenerateRequest, str], Awaitable[GenerateResponse]],
+        limits: Dict[str, int],
+        default_limit: int,
+    ):
+        self.select = select
+        self.generate = generate
+        self.limits = limits
+        self.default_limit = default_limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(model, self.default_limit))
+            self._semaphores[model] = semaphore
+        return semaphore
+
+    async def _run_item(self, index: int, item: GenerateRequest) -> BatchItemResult:
+        routing = None
+        try:
+            routing = self.select(item)
+            async with self._semaphore(routing.model):
+                result = await self.generate(item, routing.model)
+            return BatchItemResult(
+                index=index,
+                model=routing.model,
+                response=result.response,
+                cached=result.cached,
+                degraded=routing.degraded,
+                routing=routing,
+            )
+        except Exception as e:
+            logger.error("Batch item %d failed: %s", index, e)
+            return BatchItemResult(
+                index=index,
+                model=routing.model if routing else None,
+                degraded=routing.degraded if routing else False,
+                routing=routing,
+                error=str(e),
+            )
+
+    async def run(self, items: List[GenerateRequest]) -> List[BatchItemResult]:
+        """
+        Run every item and return the results in input order.
+
+        Args:
+            items: Generate requests to run
+
+        Returns:
+            One result per item; failed items carry `error` instead of `response`
+        """
+        return list(await asyncio.gather(*(self._run_item(i, item) for i, item in enumerate(items))))
+
+    async def run_stream(self, items: List[GenerateRequest]) -> AsyncIterator[BatchItemResult]:
+        """
+        Run every item and yield each result as soon as it finishes.
+
+        Args:
+            items: Generate requests to run
+
+        Yields:
+            Results in completion order; use `index` to match them to inputs
+        """
+        tasks = [asyncio.ensure_future(self._run_item(i, item)) for i, item in enumerate(items)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # Stop outstanding work if the consumer goes away early
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
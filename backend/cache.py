@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+from config import (
+    CACHE_ENABLED,
+    CACHE_MAX_ENTRIES,
+    CACHE_MAX_BYTES,
+    CACHE_TTL,
+    CACHE_SQLITE_PATH,
+)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt for cache keying: trim and collapse whitespace."""
+    return " ".join(prompt.split())
+
+
+def make_cache_key(model: str, prompt: str, options: Dict[str, Any] | None = None) -> str:
+    """
+    Build a stable cache key from model, normalized prompt and options.
+
+    Args:
+        model: Selected model name
+        prompt: User prompt
+        options: Generation options sent to Ollama
+
+    Returns:
+        Hex digest identifying the generation
+    """
+    payload = json.dumps(
+        [model, normalize_prompt(prompt), options or {}],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteCacheStore:
+    """Persistent cache tier backed by a single SQLite table."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def get(self, key: str) -> Tuple[str, float] | None:
+        """Return (value, expires_at) for a live entry, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0], row[1]
+
+    def put(self, key: str, value: str, expires_at: float):
+        """Insert or replace an entry."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """
+    In-memory LRU + TTL cache of generated responses with an optional SQLite tier.
+
+    Memory is bounded both by entry count and by the total byte size of the
+    cached responses. SQLite calls run in a worker thread so the event loop
+    never blocks on disk.
+    """
+
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        sqlite_path: str | None = None,
+        enabled: bool | None = None,
+    ):
+        self.enabled = CACHE_ENABLED if enabled is None else enabled
+        self.max_entries = max_entries if max_entries is not None else CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else CACHE_MAX_BYTES
+        self.ttl = float(ttl if ttl is not None else CACHE_TTL)
+        self.sqlite_path = sqlite_path if sqlite_path is not None else CACHE_SQLITE_PATH
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._store: SQLiteCacheStore | None = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bypasses = 0
+
+    async def start(self):
+        """Open the SQLite tier if one is configured."""
+        if self.enabled and self.sqlite_path and self._store is None:
+            self._store = await asyncio.to_thread(SQLiteCacheStore, self.sqlite_path)
+
+    async def close(self):
+        """Close the SQLite tier."""
+        if self._store is not None:
+            await asyncio.to_thread(self._store.close)
+            self._store = None
+
+    async def get(self, key: str) -> str | None:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from `make_cache_key`
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at, size = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self._remove(key)
+            self.expirations += 1
+
+        if self._store is not None:
+            row = await asyncio.to_thread(self._store.get, key)
+            if row is not None:
+                value, expires_at = row
+                self._insert(key, value, expires_at)
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, value: str, ttl: float | None = None):
+        """
+        Store a response.
+
+        Args:
+            key: Key from `make_cache_key`
+            value: Response text
+            ttl: Time to live in seconds, defaults to the cache TTL
+        """
+        if not self.enabled:
+            return
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        self._insert(key, value, expires_at)
+        if self._store is not None:
+            await asyncio.to_thread(self._store.put, key, value, expires_at)
+
+    async def clear(self):
+        """Drop every cached entry from both tiers."""
+        self._entries.clear()
+        self._bytes = 0
+        if self._store is not None:
+            await asyncio.to_thread(self._store.clear)
+
+    def _insert(self, key: str, value: str, expires_at: float):
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and current occupancy."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "bypasses": self.bypasses,
+            "persistent": self._store is not None,
+        }
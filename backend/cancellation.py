@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCancelled(Exception):
+    """Raised when an in-flight request is cancelled by its client."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Request cancelled ({reason})")
+        self.reason = reason
+
+
+class RequestRegistry:
+    """
+    In-flight requests by ID, so a client can cancel them from another connection.
+
+    Each request registers a callback that aborts it; `cancel` calls it.
+    Request IDs come from the `X-Request-ID` header (or are generated) and
+    job IDs are registered for background jobs.
+    """
+
+    def __init__(self):
+        self._requests: Dict[str, Callable[[], Any]] = {}
+        self.cancelled = 0
+        self.unknown = 0
+
+    def add(self, request_id: str, cancel: Callable[[], Any]):
+        """Register a request and the callback that aborts it."""
+        self._requests[request_id] = cancel
+
+    def discard(self, request_id: str, cancel: Callable[[], Any] | None = None):
+        """Unregister a request; with `cancel`, only if it is still the registered callback."""
+        if cancel is None or self._requests.get(request_id) is cancel:
+            self._requests.pop(request_id, None)
+
+    @contextmanager
+    def track(self, request_id: str) -> Iterator[asyncio.Future]:
+        """
+        Register a request for the duration of the block.
+
+        Yields:
+            Future that resolves once the request is cancelled; race it
+            against the work
+        """
+        cancelled = asyncio.get_running_loop().create_future()
+
+        def cancel():
+            if not cancelled.done():
+                cancelled.set_result("cancelled")
+
+        self.add(request_id, cancel)
+        try:
+            yield cancelled
+        finally:
+            self.discard(request_id, cancel)
+
+    def cancel(self, request_id: str) -> bool:
+        """
+        Abort an in-flight request.
+
+        Returns:
+            False if no request with that ID is in flight
+        """
+        cancel = self._requests.pop(request_id, None)
+        if cancel is None:
+            self.unknown += 1
+            return False
+        logger.info("Cancelling request %s", request_id)
+        cancel()
+        self.cancelled += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """In-flight and cancellation counts."""
+        return {
+            "in_flight": len(self._requests),
+            "cancelled": self.cancelled,
+            "unknown": self.unknown,
+        }
@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Tuple
+from .metrics import observe_breaker_transition
+from config import (
+    BREAKER_ENABLED,
+    BREAKER_WINDOW,
+    BREAKER_MIN_CALLS,
+    BREAKER_FAILURE_RATE,
+    BREAKER_SLOW_RATE,
+    BREAKER_SLOW_CALL_SECONDS,
+    BREAKER_DEFAULT_SLOW_CALL_SECONDS,
+    BREAKER_SLOW_FIRST_TOKEN_SECONDS,
+    BREAKER_DEFAULT_SLOW_FIRST_TOKEN_SECONDS,
+    BREAKER_OPEN_SECONDS,
+    BREAKER_HALF_OPEN_PROBES,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request's model is failing and the request may not degrade."""
+
+    def __init__(self, model: str, retry_after: int):
+        super().__init__(f"{model} is temporarily unavailable (circuit open), retry after {retry_after}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class TrackedCall:
+    """
+    Timing of one upstream call fed to a breaker.
+
+    A streaming call marks its first token with `first_token()`; it is then
+    judged by its time to first token rather than by its whole duration,
+    which mostly depends on the length of the answer.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at: float | None = None
+
+    def first_token(self):
+        """Mark the arrival of the first token (later calls are ignored)."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+
+class CircuitBreaker:
+    """
+    Closed, open or half-open state of one model, from its recent upstream calls.
+
+    Closed, every request goes through and the outcomes of the last `window`
+    calls are kept. Too many failures or slow calls open the breaker, which
+    turns requests away for `open_seconds`. It then turns half-open and lets
+    one probe through at a time: `probes` good probes in a row close it,
+    a failed or slow one opens it again. A call is slow when it takes over
+    `slow_call_seconds` or, if streamed, when its first token takes over
+    `slow_first_token_seconds`.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        window: int,
+        min_calls: int,
+        failure_rate: float,
+        slow_rate: float,
+        slow_call_seconds: float,
+        open_seconds: float,
+        probes: int,
+        slow_first_token_seconds: float | None = None,
+    ):
+        self.model = model
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_first_token_seconds = (
+            slow_first_token_seconds if slow_first_token_seconds is not None else slow_call_seconds
+        )
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.state = CLOSED
+        # (failed, slow) of the most recent calls
+        self.outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self.opened_at = 0.0
+        self.probe_successes = 0
+        # A probe that never reports back (say, answered from the cache)
+        # stops blocking the next one after this time
+        self._probe_deadline = 0.0
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a request may use the model now; in half-open state, admits it as the probe."""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now < self.opened_at + self.open_seconds:
+                self.rejected += 1
+                return False
+            self._transition(HALF_OPEN)
+            self.probe_successes = 0
+            self._probe_deadline = 0.0
+        if now < self._probe_deadline:
+            self.rejected += 1
+            return False
+        self._probe_deadline = now + self.slow_call_seconds
+        return True
+
+    def record(self, seconds: float, failed: bool, streamed: bool = False):
+        """
+        Add the outcome of a finished upstream call.
+
+        Args:
+            seconds: Whole duration, or time to first token if `streamed`
+            failed: Whether the call raised
+            streamed: Whether `seconds` is a time to first token
+        """
+        limit = self.slow_first_token_seconds if streamed else self.slow_call_seconds
+        slow = not failed and seconds > limit
+        if self.state == HALF_OPEN:
+            self._probe_deadline = 0.0
+            if failed or slow:
+                self._open("probe failed" if failed else f"probe took {seconds:.1f}s")
+                return
+            self.probe_successes += 1
+            if self.probe_successes >= self.probes:
+                self.outcomes.clear()
+                self._transition(CLOSED)
+                logger.info("Circuit for %s closed after %d good probes", self.model, self.probes)
+            return
+        if self.state == OPEN:
+            # A call admitted before the breaker opened
+            return
+        self.outcomes.append((failed, slow))
+        calls = len(self.outcomes)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self.outcomes if failed)
+        slow_calls = sum(1 for _, slow in self.outcomes if slow)
+        if failures / calls >= self.failure_rate:
+            self._open(f"{failures}/{calls} recent calls failed")
+        elif slow_calls / calls >= self.slow_rate:
+            self._open(f"{slow_calls}/{calls} recent calls were slow")
+
+    def retry_after(self) -> int:
+        """Whole seconds until the breaker lets a probe through."""
+        if self.state == OPEN:
+            wait = self.opened_at + self.open_seconds - time.monotonic()
+        else:
+            wait = self._probe_deadline - time.monotonic()
+        return max(1, math.ceil(wait))
+
+    def _open(self, reason: str):
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._transition(OPEN)
+        logger.warning("Circuit for %s opened: %s", self.model, reason)
+
+    def _transition(self, state: str):
+        self.state = state
+        observe_breaker_transition(self.model, state)
+
+    def stats(self) -> Dict[str, Any]:
+        calls = len(self.outcomes)
+        return {
+            "state": self.state,
+            "calls": calls,
+            "failure_rate": sum(1 for failed, _ in self.outcomes if failed) / calls if calls else 0.0,
+            "slow_rate": sum(1 for _, slow in self.outcomes if slow) / calls if calls else 0.0,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after() if self.state != CLOSED else 0,
+        }
+
+
+class CircuitBreakers:
+    """
+    One `CircuitBreaker` per model, created on first use.
+
+    `track` wraps each upstream call to feed its breaker; `allow` asks
+    whether a new request may use a model.
+    """
+
+    def __init__(
+        self,
+        enabled: bool | None = None,
+        window: int | None = None,
+        min_calls: int | None = None,
+        failure_rate: float | None = None,
+        slow_rate: float | None = None,
+        slow_call_seconds: Dict[str, float] | None = None,
+        open_seconds: float | None = None,
+        probes: int | None = None,
+        slow_first_token_seconds: Dict[str, float] | None = None,
+    ):
+        self.enabled = BREAKER_ENABLED if enabled is None else enabled
+        self.window = window if window is not None else BREAKER_WINDOW
+        self.min_calls = min_calls if min_calls is not None else BREAKER_MIN_CALLS
+        self.failure_rate = failure_rate if failure_rate is not None else BREAKER_FAILURE_RATE
+        self.slow_rate = slow_rate if slow_rate is not None else BREAKER_SLOW_RATE
+        self.slow_call_seconds = slow_call_seconds if slow_call_seconds is not None else BREAKER_SLOW_CALL_SECONDS
+        self.slow_first_token_seconds = (
+            slow_first_token_seconds if slow_first_token_seconds is not None else BREAKER_SLOW_FIRST_TOKEN_SECONDS
+        )
+        self.open_seconds = open_seconds if open_seconds is not None else BREAKER_OPEN_SECONDS
+        self.probes = probes if probes is not None else BREAKER_HALF_OPEN_PROBES
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, model: str) -> CircuitBreaker:
+        """The breaker of `model`."""
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(
+                model,
+                window=self.window,
+                min_calls=self.min_calls,
+                failure_rate=self.failure_rate,
+                slow_rate=self.slow_rate,
+                slow_call_seconds=self.slow_call_seconds.get(model, BREAKER_DEFAULT_SLOW_CALL_SECONDS),
+                open_seconds=self.open_seconds,
+                probes=self.probes,
+                slow_first_token_seconds=self.slow_first_token_seconds.get(
+                    model, BREAKER_DEFAULT_SLOW_FIRST_TOKEN_SECONDS
+                ),
+            )
+        return breaker
+
+    def allow(self, model: str) -> bool:
+        """Whether a new request may use `model`."""
+        return not self.enabled or self.get(model).allow()
+
+    def retry_after(self, model: str) -> int:
+        """Seconds a turned-away client should wait before retrying `model`."""
+        return self.get(model).retry_after()
+
+    @contextmanager
+    def track(self, model: str) -> Iterator[TrackedCall]:
+        """
+        Feed the outcome of the upstream call made in the block to `model`'s breaker.
+
+        A call that raises is a failure; a cancelled one is not counted. A
+        stream should call `first_token()` on the yielded `TrackedCall`, so
+        it is judged by its time to first token.
+        """
+        call = TrackedCall()
+        if not self.enabled:
+            yield call
+            return
+        try:
+            yield call
+        except (asyncio.CancelledError, GeneratorExit):
+            raise
+        except Exception:
+            self.get(model).record(time.perf_counter() - call.started, failed=True)
+            raise
+        if call.first_token_at is not None:
+            self.get(model).record(call.first_token_at - call.started, failed=False, streamed=True)
+        else:
+            self.get(model).record(time.perf_counter() - call.started, failed=False)
+
+    def states(self) -> Dict[str, str]:
+        """Current state per model."""
+        return {model: breaker.state for model, breaker in self._breakers.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """State, recent failure and slow-call rates and trip counts per model."""
+        return {
+            "enabled": self.enabled,
+            "models": {model: breaker.stats() for model, breaker in self._breakers.items()},
+        }
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Set
+from .models import ChatMessage
+from .sessions import ChatSession
+from config import (
+    MODEL_NUM_CTX,
+    DEFAULT_NUM_CTX,
+    CONTEXT_RESERVED_OUTPUT,
+    CONTEXT_DEFAULT_RESERVED_OUTPUT,
+    CONTEXT_TRIM_TARGET,
+    CONTEXT_CHARS_PER_TOKEN,
+    CONTEXT_MESSAGE_OVERHEAD,
+    CONTEXT_SUMMARY_ENABLED,
+)
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below in a few sentences. Keep the names, facts, "
+    "numbers and decisions needed to continue it; leave out pleasantries.\n\n"
+)
+
+
+def estimate_tokens(message: ChatMessage) -> int:
+    """Rough token count of a chat message, including its template overhead."""
+    return -(-len(message.content) // CONTEXT_CHARS_PER_TOKEN) + CONTEXT_MESSAGE_OVERHEAD
+
+
+class ContextManager:
+    """
+    Keep the prompt of every chat turn within a per-model token budget.
+
+    The budget is the model's context window (`num_ctx`) less the tokens
+    reserved for the reply, so prompt and answer fit together.
+    When the history no longer fits, the oldest turns are dropped until it
+    takes at most `CONTEXT_TRIM_TARGET` of the budget. Trimming in steps keeps
+    the transcript prefix unchanged between trims, so Ollama's KV cache stays
+    valid for most turns. Dropped turns are folded into a rolling summary in
+    the background and sent as a system message once it is ready.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str], Awaitable[str]] | None = None,
+        num_ctx: Dict[str, int] | None = None,
+        reserved_output: Dict[str, int] | None = None,
+        summary_enabled: bool | None = None,
+    ):
+        self.summarize = summarize
+        self.num_ctx = num_ctx if num_ctx is not None else MODEL_NUM_CTX
+        self.reserved_output = reserved_output if reserved_output is not None else CONTEXT_RESERVED_OUTPUT
+        self.summary_enabled = (CONTEXT_SUMMARY_ENABLED if summary_enabled is None else summary_enabled) and summarize is not None
+        self._tasks: Set[asyncio.Task] = set()
+        self.trims = 0
+        self.dropped_messages = 0
+        self.summaries = 0
+        self.summary_failures = 0
+
+    def budget(self, model: str, options: Dict[str, Any] | None = None) -> int:
+        """Prompt token budget for `model`: its `num_ctx` less the tokens reserved for the reply."""
+        options = options or {}
+        num_ctx = options.get("num_ctx") or self.num_ctx.get(model, DEFAULT_NUM_CTX)
+        reserved = options.get("num_predict")
+        if reserved is None or reserved < 0:
+            reserved = self.reserved_output.get(model, CONTEXT_DEFAULT_RESERVED_OUTPUT)
+        return max(num_ctx - reserved, 0)
+
+    def build(self, session: ChatSession, message: str, options: Dict[str, Any] | None = None) -> List[ChatMessage]:
+        """
+        Assemble the messages to send for the next turn, trimming if needed.
+
+        Call with the session lock held.
+
+        Args:
+            session: Conversation the turn belongs to
+            message: New user message
+            options: Ollama options of the turn; `num_ctx` and `num_predict`
+                override the model's configured window and reply reserve
+
+        Returns:
+            Optional summary system message, the kept history and the new
+            user message
+        """
+        user = ChatMessage(role="user", content=message)
+        history = session.messages
+        summary = self._summary_message(session)
+        used = sum(estimate_tokens(m) for m in history[session.window_start:]) + estimate_tokens(user)
+        if summary is not None:
+            used += estimate_tokens(summary)
+
+        budget = self.budget(session.model, options)
+        if used > budget:
+            target = budget * CONTEXT_TRIM_TARGET
+            start = session.window_start
+            # Drop whole turns: never start the window on an assistant reply
+            while start < len(history) and (used > target or history[start].role != "user"):
+                used -= estimate_tokens(history[start])
+                start += 1
+            self.trims += 1
+            self.dropped_messages += start - session.window_start
+            logger.info("Trimmed chat session %s to ~%d tokens", session.session_id, used)
+            session.window_start = start
+
+        self._schedule_summary(session)
+        prefix = [summary] if summary is not None else []
+        return prefix + history[session.window_start:] + [user]
+
+    def _summary_message(self, session: ChatSession) -> ChatMessage | None:
+        if not session.summary:
+            return None
+        return ChatMessage(role="system", content=f"Summary of the earlier conversation:\n{session.summary}")
+
+    def _schedule_summary(self, session: ChatSession):
+        """Start folding dropped turns into the session summary, one task per session."""
+        if not self.summary_enabled or session.summarized >= session.window_start:
+            return
+        if session.summary_task is not None and not session.summary_task.done():
+            return
+        task = asyncio.create_task(self._update_summary(session, session.window_start))
+        session.summary_task = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _update_summary(self, session: ChatSession, upto: int):
+        dropped = session.messages[session.summarized:upto]
+        transcript = "\n".join(f"{m.role.capitalize()}: {m.content}" for m in dropped)
+        previous = f"Earlier summary: {session.summary}\n\n" if session.summary else ""
+        try:
+            summary = (await self.summarize(SUMMARY_PROMPT + previous + transcript)).strip()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Retried on the next turn; the summary just lags behind meanwhile
+            self.summary_failures += 1
+            logger.warning("Summarizing chat session %s failed: %s", session.session_id, e)
+            return
+        if summary:
+            session.summary = summary
+            session.summarized = upto
+            self.summaries += 1
+
+    async def close(self):
+        """Cancel pending summaries."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Trim and summary counters."""
+        return {
+            "trims": self.trims,
+            "dropped_messages": self.dropped_messages,
+            "summaries": self.summaries,
+            "summary_failures": self.summary_failures,
+            "summaries_pending": len(self._tasks),
+        }
@@ -0,0 +1,108 @@
+import math
+from collections import deque
+from typing import Any, Deque, Dict
+from config import (
+    HEDGE_ENABLED,
+    HEDGE_TTFT_PERCENTILE,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_WINDOW,
+    HEDGE_BUDGET,
+    HEDGE_BURST,
+)
+
+
+class HedgePolicy:
+    """
+    When to send a duplicate (hedge) of a slow request, and how many to allow.
+
+    The hedge delay is a percentile of the recent time-to-first-token of the
+    request's model. Hedges are paid from a token bucket that every request
+    refills by `budget` (at most `burst` tokens), so over time hedges add at
+    most `budget` extra load, however slow the nodes get.
+    """
+
+    def __init__(
+        self,
+        enabled: bool | None = None,
+        percentile: float | None = None,
+        budget: float | None = None,
+        burst: float | None = None,
+        min_delay: float | None = None,
+        min_samples: int | None = None,
+        window: int | None = None,
+    ):
+        self.enabled = HEDGE_ENABLED if enabled is None else enabled
+        self.percentile = percentile if percentile is not None else HEDGE_TTFT_PERCENTILE
+        self.budget = budget if budget is not None else HEDGE_BUDGET
+        self.burst = burst if burst is not None else HEDGE_BURST
+        self.min_delay = min_delay if min_delay is not None else HEDGE_MIN_DELAY
+        self.min_samples = min_samples if min_samples is not None else HEDGE_MIN_SAMPLES
+        self.window = window if window is not None else HEDGE_WINDOW
+        self._ttft: Dict[str, Deque[float]] = {}
+        self._tokens = 0.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.denied = 0
+
+    def record_ttft(self, model: str, seconds: float):
+        """Add a time-to-first-token sample for `model`."""
+        samples = self._ttft.get(model)
+        if samples is None:
+            samples = self._ttft[model] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def delay(self, model: str) -> float | None:
+        """
+        Seconds to wait for a first token before hedging a new request.
+
+        Also counts the request toward the hedge budget.
+
+        Returns:
+            None while hedging is off or there are too few samples
+        """
+        if not self.enabled:
+            return None
+        self.requests += 1
+        self._tokens = min(self.burst, self._tokens + self.budget)
+        samples = self._ttft.get(model)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        return self._delay(samples)
+
+    def try_hedge(self) -> bool:
+        """Spend one hedge from the budget; False if it is used up."""
+        if self._tokens < 1:
+            self.denied += 1
+            return False
+        self._tokens -= 1
+        self.hedged += 1
+        return True
+
+    def record_winner(self, hedge_won: bool):
+        """Record which copy of a hedged request answered first."""
+        if hedge_won:
+            self.hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge counts and the current per-model hedge delays."""
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_ratio": self.hedged / self.requests if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "denied": self.denied,
+            "budget_tokens": self._tokens,
+            "delay_ms": {
+                model: self._delay(samples) * 1000
+                for model, samples in self._ttft.items()
+                if len(samples) >= self.min_samples
+            },
+        }
+
+    def _delay(self, samples: Deque[float]) -> float:
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+        return max(self.min_delay, ordered[index])
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Tuple
+from config import JOB_TTL, JOB_MAX_JOBS
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """One background generation and the output it has produced so far."""
+
+    def __init__(self, job_id: str, model: str, session_id: str | None = None, routing: Dict[str, Any] | None = None):
+        self.job_id = job_id
+        self.model = model
+        self.session_id = session_id
+        self.routing = routing
+        self.status = "queued"
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.finished_at: float | None = None
+        self.task: asyncio.Task | None = None
+        # Phase durations in ms, once finished (see `timing.RequestTimer`)
+        self.timings: Dict[str, float] | None = None
+        self._parts: List[str] = []
+
+    def append(self, text: str):
+        """Add generated text; the job counts as running from its first output."""
+        self.status = "running"
+        if text:
+            self._parts.append(text)
+
+    @property
+    def output(self) -> str:
+        """Text generated so far."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "model": self.model,
+            "session_id": self.session_id,
+            "output": self.output,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "degraded": bool(self.routing and self.routing.get("degraded")),
+            "routing": self.routing,
+            "timings": self.timings,
+        }
+
+
+class JobStore:
+    """
+    Run generations as background tasks that clients poll by job ID.
+
+    Finished jobs are kept for `ttl` seconds, then dropped. At most
+    `max_jobs` are kept; beyond that the oldest finished jobs go first.
+    """
+
+    def __init__(self, ttl: float | None = None, max_jobs: int | None = None):
+        self.ttl = float(ttl if ttl is not None else JOB_TTL)
+        self.max_jobs = max_jobs if max_jobs is not None else JOB_MAX_JOBS
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # (finished_at, job_id) in completion order, for expiry
+        self._finished: Deque[Tuple[float, str]] = deque()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.expired = 0
+
+    def submit(
+        self,
+        model: str,
+        run: Callable[[Job], Awaitable[None]],
+        session_id: str | None = None,
+        routing: Dict[str, Any] | None = None,
+    ) -> Job:
+        """
+        Start `run(job)` in the background and return the job right away.
+
+        Args:
+            model: Model the job runs on
+            run: Coroutine function producing the output through `job.append`
+            session_id: Chat session the job belongs to, if any
+            routing: Routing decision that picked `model`
+
+        Returns:
+            The queued job
+        """
+        self._expire()
+        job = Job(uuid.uuid4().hex, model, session_id, routing)
+        self._jobs[job.job_id] = job
+        self.submitted += 1
+        job.task = asyncio.create_task(self._run(job, run))
+        self._evict()
+        return job
+
+    async def _run(self, job: Job, run: Callable[[Job], Awaitable[None]]):
+        try:
+            await run(job)
+            job.status = "done"
+            self.completed += 1
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            self.cancelled += 1
+            raise
+        except Exception as e:
+            job.status = "error"
+            job.error = str(e)
+            self.failed += 1
+            logger.error("Job %s failed: %s", job.job_id, e)
+        finally:
+            job.finished_at = time.time()
+            self._finished.append((time.monotonic(), job.job_id))
+
+    def get(self, job_id: str) -> Job | None:
+        """Return a job that has not expired, or None."""
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._finished and self._finished[0][0] <= cutoff:
+            _, job_id = self._finished.popleft()
+            if self._jobs.pop(job_id, None) is not None:
+                self.expired += 1
+
+    def _evict(self):
+        """Drop the oldest finished jobs while over `max_jobs`."""
+        while len(self._jobs) > self.max_jobs and self._finished:
+            _, job_id = self._finished.popleft()
+            self._jobs.pop(job_id, None)
+
+    async def close(self):
+        """Cancel running jobs."""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by state and lifecycle counters."""
+        self._expire()
+        by_status: Dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "jobs": len(self._jobs),
+            "by_status": by_status,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "expired": self.expired,
+        }
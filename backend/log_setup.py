@@ -0,0 +1,151 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, TextIO
+from .timing import RequestIdFilter
+from config import LOG_LEVEL, LOG_QUEUE_SIZE, LOG_SAMPLE_RATES
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, request ID, message and the record's `fields`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a request's lines at a level for a `rates[level]` fraction of requests.
+
+    Whether a request is kept is a hash of its ID, so its lines are kept or
+    dropped together. Records outside a request, at levels without a rate,
+    or logged with `extra={"sample": False}` always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.thresholds = {logging.getLevelName(level): rate * 2 ** 32 for level, rate in rates.items()}
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        threshold = self.thresholds.get(record.levelno)
+        request_id = getattr(record, "request_id", None)
+        if threshold is None or request_id is None or not getattr(record, "sample", True):
+            return True
+        if zlib.crc32(request_id.encode()) < threshold:
+            return True
+        self.dropped += 1
+        return False
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue records for the writer thread as they are.
+
+    Unlike `QueueHandler`, the message is not formatted here but in the
+    writer, and a full queue drops the record instead of blocking.
+    """
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    """`QueueListener` that waits for room for its stop sentinel rather than failing on a full queue."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class BackgroundLogging:
+    """
+    Route a logger (the root logger by default) through a bounded queue to a
+    background writer thread.
+
+    The request path only runs the request ID and sampling filters and a
+    `put_nowait`; formatting (lazily, from `%`-style arguments) and writing
+    JSON lines to `stream` (or `writer`) happen on the writer thread, so a
+    slow disk or log shipper cannot stall the event loop. A named logger
+    stops propagating to the root logger, so its records go only to
+    `writer`.
+    """
+
+    def __init__(
+        self,
+        level: str | None = None,
+        sample_rates: Dict[str, float] | None = None,
+        queue_size: int | None = None,
+        stream: TextIO | None = None,
+        logger: str | None = None,
+        writer: logging.Handler | None = None,
+    ):
+        self.level = level or LOG_LEVEL
+        self.logger = logging.getLogger(logger)
+        self.records: queue.Queue = queue.Queue(queue_size if queue_size is not None else LOG_QUEUE_SIZE)
+        self.sampler = SamplingFilter(sample_rates if sample_rates is not None else LOG_SAMPLE_RATES)
+        self.handler = _NonBlockingQueueHandler(self.records)
+        self.handler.addFilter(RequestIdFilter())
+        self.handler.addFilter(self.sampler)
+        writer = writer or logging.StreamHandler(stream or sys.stderr)
+        writer.setFormatter(JsonFormatter())
+        self._listener = _Listener(self.records, writer)
+        self._started = False
+
+    def start(self):
+        """Install the queue handler on the logger and start the writer thread."""
+        if self._started:
+            return
+        for handler in self.logger.handlers[:]:
+            self.logger.removeHandler(handler)
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(self.level)
+        if self.logger is not logging.getLogger():
+            self.logger.propagate = False
+        self._listener.start()
+        self._started = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Write out queued records, stop the writer thread and close its output."""
+        if not self._started:
+            return
+        self._started = False
+        self.logger.removeHandler(self.handler)
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Queued records and records dropped by sampling or a full queue."""
+        return {
+            "queued": self.records.qsize(),
+            "dropped_full": self.handler.dropped,
+            "dropped_sampled": self.sampler.dropped,
+        }
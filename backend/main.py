@@ -1,20 +1,131 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, ORJSONResponse, PlainTextResponse
+import orjson
 import logging
-from .models import GenerateRequest, GenerateResponse
+import time
+import uuid
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Tuple, TypeVar
+from .models import (
+    GenerateRequest,
+    GenerateResponse,
+    BatchGenerateRequest,
+    BatchGenerateResponse,
+    ChatMessage,
+    ChatRequest,
+    ChatResponse,
+    ChatSessionInfo,
+    JobRequest,
+    JobStatus,
+    RoutingDecision,
+)
 from .services import ModelSelector
 from .ollama_client import OllamaService
-from config import FRONTEND_HOST, FRONTEND_PORT, API_HOST, API_PORT
+from .cache import ResponseCache, make_cache_key
+from .semantic_cache import SemanticCache
+from .singleflight import SingleFlight
+from .batch import BatchRunner
+from .admission import AdmissionController, QueueFullError
+from .residency import ResidencyManager
+from .sessions import ChatSession, SessionStore
+from .context import ContextManager
+from .jobs import Job, JobStore
+from .work_queue import QueueClient
+from .cancellation import RequestCancelled, RequestRegistry
+from .circuit_breaker import CircuitBreakers, CircuitOpenError
+from .nodes import OllamaNode
+from .log_setup import BackgroundLogging
+from . import metrics, timing
+from config import (
+    FRONTEND_HOST,
+    FRONTEND_PORT,
+    API_HOST,
+    API_PORT,
+    SINGLE_FLIGHT_ENABLED,
+    RESIDENCY_ENABLED,
+    BATCH_CONCURRENCY,
+    BATCH_DEFAULT_CONCURRENCY,
+    DEFAULT_MODEL,
+    CONTEXT_SUMMARY_MAX_TOKENS,
+    QUEUE_ENABLED,
+    SEMANTIC_CACHE_EMBED_MODEL,
+    REQUEST_TIMING_PATHS,
+)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: sampled JSON lines, written by a background thread
+background_logging = BackgroundLogging()
+background_logging.start()
 logger = logging.getLogger(__name__)
 
+# Initialize services
+circuit_breakers = CircuitBreakers()
+ollama_service = OllamaService(breakers=circuit_breakers)
+response_cache = ResponseCache()
+
+
+async def _embed(prompt: str) -> List[float]:
+    """Embed a prompt for the semantic cache."""
+    return (await ollama_service.embed([prompt], SEMANTIC_CACHE_EMBED_MODEL))[0]
+
+
+semantic_cache = SemanticCache(embed=_embed)
+single_flight = SingleFlight(enabled=SINGLE_FLIGHT_ENABLED)
+admission = AdmissionController(node_count=len(ollama_service.node_pool.nodes))
+model_selector = ModelSelector(admission=admission, breakers=circuit_breakers)
+residency = ResidencyManager(ollama_service)
+sessions = SessionStore()
+
+
+async def _summarize(prompt: str) -> str:
+    """Rolling chat summaries run on the small default model, under admission control."""
+    async with admission.slot(DEFAULT_MODEL):
+        return await ollama_service.generate_response(
+            prompt=prompt,
+            model=DEFAULT_MODEL,
+            options={"num_predict": CONTEXT_SUMMARY_MAX_TOKENS},
+        )
+
+
+context = ContextManager(summarize=_summarize)
+jobs = JobStore()
+queue_client = QueueClient()
+in_flight = RequestRegistry()
+
+T = TypeVar("T")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup and release them on shutdown."""
+    await ollama_service.start()
+    await response_cache.start()
+    await semantic_cache.start()
+    if QUEUE_ENABLED:
+        await queue_client.start()
+    if RESIDENCY_ENABLED:
+        residency.start()
+    try:
+        yield
+    finally:
+        await residency.close()
+        await jobs.close()
+        await context.close()
+        await queue_client.close()
+        await response_cache.close()
+        await semantic_cache.close()
+        await ollama_service.close()
+        model_selector.close()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Assistant API",
     description="A minimal AI assistant backend using Ollama",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware to allow Streamlit frontend
@@ -28,12 +139,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID"],
 )
-
-# Initialize services
-ollama_service = OllamaService()
-model_selector = ModelSelector()
-
+# Time requests to REQUEST_TIMING_PATHS phase by phase (Server-Timing header)
+app.add_middleware(timing.ServerTimingMiddleware, paths=REQUEST_TIMING_PATHS)
 
 @app.get("/")
 async def root():
@@ -47,14 +156,382 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy"}
+    """
+    Health check endpoint.
+
+    Reports upstream Ollama reachability from the background node probes
+    and the admission queue depth, without calling Ollama itself.
+    """
+    node_pool = ollama_service.node_pool
+    healthy_nodes = node_pool.healthy_count()
+    return {
+        "status": "healthy" if healthy_nodes else "degraded",
+        "ollama": {
+            "reachable": healthy_nodes > 0,
+            "healthy_nodes": healthy_nodes,
+            "nodes": len(node_pool.nodes),
+        },
+        "ready": residency.ready if RESIDENCY_ENABLED else True,
+        "queue_depth": admission.queue_depth(),
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 until the default model is loaded and hot."""
+    if RESIDENCY_ENABLED and not residency.ready:
+        return ORJSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True}
+
+
+def _pool_gauges() -> Dict[tuple, float]:
+    snapshot = ollama_service.pool_stats.snapshot()
+    return {(key,): snapshot[key] for key in ("in_flight", "new_connections", "reused_connections", "pool_timeouts")}
+
+
+def _queue_gauges() -> Dict[tuple, float]:
+    return {(model, key): lane[key] for model, lane in admission.stats().items() for key in ("in_use", "queue_depth")}
+
+
+def _node_gauges() -> Dict[tuple, float]:
+    return {(node["url"],): node["in_flight"] for node in ollama_service.node_pool.stats()}
+
+
+def _cache_gauges() -> Dict[tuple, float]:
+    snapshot = response_cache.stats()
+    return {(key,): snapshot[key] for key in ("entries", "bytes", "hits", "disk_hits", "misses", "evictions")}
+
+
+def _semantic_cache_gauges() -> Dict[tuple, float]:
+    snapshot = semantic_cache.stats()
+    return {(key,): snapshot[key] for key in ("entries", "hits", "misses", "embed_failures", "evictions", "avg_scan_ms")}
+
+
+def _logging_gauges() -> Dict[tuple, float]:
+    return {(key,): float(value) for key, value in background_logging.stats().items()}
+
+
+def _breaker_gauges() -> Dict[tuple, float]:
+    return {
+        (model, state): float(current == state)
+        for model, current in circuit_breakers.states().items()
+        for state in ("closed", "open", "half_open")
+    }
+
+
+metrics.REGISTRY.register(metrics.Gauge(
+    "aiassistant_ollama_pool", "Shared Ollama HTTP pool statistics.", ("stat",), _pool_gauges))
+metrics.REGISTRY.register(metrics.Gauge(
+    "aiassistant_admission", "Admission slots in use and queue depth per model.", ("model", "stat"), _queue_gauges))
+metrics.REGISTRY.register(metrics.Gauge(
+    "aiassistant_node_in_flight", "In-flight requests per Ollama node.", ("node",), _node_gauges))
+metrics.REGISTRY.register(metrics.Gauge(
+    "aiassistant_response_cache", "Response cache occupancy and counters.", ("stat",), _cache_gauges))
+metrics.REGISTRY.register(metrics.Gauge(
+    "aiassistant_semantic_cache", "Semantic cache occupancy, counters and scan time.", ("stat",), _semantic_cache_gauges))
+metrics.REGISTRY.register(metrics.Gauge(
+    "aiassistant_logging", "Queued log records and records dropped by sampling or a full queue.", ("stat",),
+    _logging_gauges))
+metrics.REGISTRY.register(metrics.Gauge(
+    "aiassistant_circuit_state", "Circuit breaker state per model (1 for the current state).", ("model", "state"),
+    _breaker_gauges))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus metrics in the text exposition format."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats/pool")
+async def pool_stats():
+    """Connection pool statistics for the shared Ollama client."""
+    return ollama_service.pool_stats.snapshot()
+
+
+@app.get("/stats/nodes")
+async def node_stats():
+    """Per-node health, in-flight requests, latency and loaded models."""
+    return ollama_service.node_pool.stats()
+
+
+@app.get("/stats/routing")
+async def routing_stats():
+    """Model routing decisions by rule, and the most recent ones."""
+    return model_selector.stats()
+
+
+@app.get("/stats/breakers")
+async def breaker_stats():
+    """Circuit breaker state and recent failure and slow-call rates per model."""
+    return circuit_breakers.stats()
+
+
+@app.get("/stats/hedging")
+async def hedging_stats():
+    """Hedged request counts, budget and per-model hedge delays."""
+    return ollama_service.hedging.stats()
+
+
+@app.get("/stats/residency")
+async def residency_stats():
+    """Resident models per node and warm-up counters."""
+    return residency.stats()
+
+
+@app.get("/stats/cache")
+async def cache_stats():
+    """Hit/miss/eviction counters for the response cache."""
+    return response_cache.stats()
+
+
+@app.get("/stats/semantic_cache")
+async def semantic_cache_stats():
+    """Semantic cache hits, occupancy and scan timing."""
+    return semantic_cache.stats()
+
+
+@app.get("/stats/singleflight")
+async def single_flight_stats():
+    """Counters for coalesced in-flight generations."""
+    return single_flight.stats()
+
+
+@app.get("/stats/queue")
+async def queue_stats():
+    """Per-model admission slots, queue depth and wait times."""
+    return admission.stats()
+
+
+@app.get("/stats/sessions")
+async def session_stats():
+    """Live chat sessions and their lifecycle counters."""
+    return sessions.stats()
+
+
+@app.get("/stats/context")
+async def context_stats():
+    """Chat context trims and rolling-summary counters."""
+    return context.stats()
+
+
+@app.get("/stats/work_queue")
+async def work_queue_stats():
+    """Durable work queue counts (only populated when `QUEUE_ENABLED`)."""
+    return await asyncio.to_thread(queue_client.stats)
+
+
+@app.get("/stats/jobs")
+async def job_stats():
+    """Background job counts by state."""
+    return jobs.stats()
+
+
+@app.get("/stats/requests")
+async def request_stats():
+    """In-flight request and cancellation counts."""
+    return in_flight.stats()
+
+
+def _queue_full(error: QueueFullError) -> HTTPException:
+    """Map an admission rejection to a 429 with a Retry-After header."""
+    return HTTPException(
+        status_code=429,
+        detail=f"Server busy: {error}",
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def _circuit_open(error: CircuitOpenError) -> HTTPException:
+    """Map a request refused by an open circuit to a 503 with a Retry-After header."""
+    logger.warning("Refused request: %s", error)
+    return HTTPException(
+        status_code=503,
+        detail=f"Model unavailable: {error}",
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def _cancelled(error: RequestCancelled) -> HTTPException:
+    """Map a cancelled request to a 499 (client closed request)."""
+    return HTTPException(status_code=499, detail=str(error))
+
+
+def _request_id(http_request: Request) -> str:
+    """The ID the middleware gave the request, else the client's `X-Request-ID` or a new ID."""
+    return timing.current_request_id() or http_request.headers.get("X-Request-ID") or uuid.uuid4().hex
+
+
+async def _client_gone(http_request: Request):
+    """Return once the client has disconnected."""
+    while True:
+        message = await http_request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def _cancellable(http_request: Request, request_id: str, work: Awaitable[T]) -> T:
+    """
+    Await `work`, aborting it if the client disconnects or cancels the request.
+
+    Cancelling the work task cancels the upstream Ollama call, so Ollama
+    stops generating instead of finishing a response nobody will read.
+
+    Args:
+        http_request: Incoming request, watched for a disconnect
+        request_id: ID under which `DELETE /requests/{id}` can cancel it
+        work: Coroutine producing the response
+
+    Raises:
+        RequestCancelled: If the request was aborted
+    """
+    task = asyncio.ensure_future(work)
+    gone = asyncio.create_task(_client_gone(http_request))
+    with in_flight.track(request_id) as cancelled:
+        try:
+            await asyncio.wait({task, gone, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            gone.cancel()
+            finished = task.done()
+            if not finished:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+    if not finished:
+        raise RequestCancelled("cancelled" if cancelled.done() else "disconnect")
+    return task.result()
+
+
+def _route(request: GenerateRequest | ChatRequest | JobRequest) -> RoutingDecision:
+    """Pick the model for a request and record the routing decision."""
+    return model_selector.route(
+        prompt=request.message if isinstance(request, ChatRequest) else request.prompt,
+        thinking=request.thinking,
+        requested_model=request.model,
+        latency_target_ms=request.latency_target_ms,
+        fallback=request.fallback,
+    )
+
+
+def _routing_headers(routing: RoutingDecision) -> Dict[str, str]:
+    """Routing decision as response headers, for streams that have no response body to carry it."""
+    headers = {"X-Routed-Model": routing.model, "X-Routing-Rule": routing.rule, "X-Routing-Reason": routing.reason}
+    if routing.degraded:
+        headers["X-Degraded"] = "true"
+    return headers
+
+
+async def _generate(request: GenerateRequest, selected_model: str) -> GenerateResponse:
+    """
+    Produce a response through the cache, single-flight layer and Ollama.
+
+    Args:
+        request: Generate request
+        selected_model: Model chosen by the model selector
+
+    Returns:
+        Generated (or cached) response
+
+    Raises:
+        httpx.RequestError: If the upstream call fails
+        ValueError: If the upstream response is invalid
+    """
+    # Serve repeats from the response cache unless the caller opted out
+    cache_key = make_cache_key(selected_model, request.prompt, request.options)
+    embedding = None
+    if request.cache == "bypass":
+        response_cache.bypasses += 1
+    else:
+        cached_text = await response_cache.get(cache_key)
+        if cached_text is not None:
+            logger.info("Serving response from cache")
+            timing.mark("cache")
+            return GenerateResponse(response=cached_text, cached=True)
+        # Then paraphrases of cached prompts
+        cached_text, embedding = await semantic_cache.lookup(selected_model, request.prompt, request.options)
+        if cached_text is not None:
+            logger.info("Serving response from semantic cache")
+            timing.mark("cache")
+            return GenerateResponse(response=cached_text, cached=True)
+    timing.mark("cache")
+
+    leader = False
+
+    async def run_upstream() -> str:
+        nonlocal leader
+        leader = True
+        async with admission.slot(selected_model):
+            if QUEUE_ENABLED:
+                # Hand the call to a worker process through the durable queue;
+                # the worker's Ollama calls are not seen by our breakers
+                with circuit_breakers.track(selected_model):
+                    text = await queue_client.submit({
+                        "model": selected_model,
+                        "prompt": request.prompt,
+                        "options": request.options,
+                    })
+                timing.mark("worker")
+            else:
+                text = await ollama_service.generate_response(
+                    prompt=request.prompt,
+                    model=selected_model,
+                    options=request.options,
+                )
+        await response_cache.put(cache_key, text)
+        await semantic_cache.put(selected_model, request.options, embedding, text)
+        timing.mark("cache")
+        return text
+
+    # Generate response; identical concurrent requests share one call
+    response_text = await single_flight.run(cache_key, run_upstream)
+    if not leader:
+        # Time spent waiting on another request's identical call
+        timing.mark("coalesced")
+
+    logger.info("Generated response length: %d", len(response_text))
+
+    return GenerateResponse(response=response_text)
+
+
+def _mode(request: GenerateRequest | ChatRequest | JobRequest) -> str:
+    """Metrics label for the request's generation mode."""
+    return "thinking" if request.thinking else "normal"
+
+
+async def _generate_batch_item(request: GenerateRequest, selected_model: str) -> GenerateResponse:
+    """Run one batch item through `_generate`, recording its metrics."""
+    started = time.perf_counter()
+    status = 200
+    try:
+        return await _generate(request, selected_model)
+    except QueueFullError:
+        status = 429
+        raise
+    except Exception:
+        status = 500
+        raise
+    finally:
+        metrics.observe_request("generate_batch", selected_model, _mode(request), time.perf_counter() - started, status)
+
+
+batch_runner = BatchRunner(
+    select=_route,
+    generate=_generate_batch_item,
+    limits=BATCH_CONCURRENCY,
+    default_limit=BATCH_DEFAULT_CONCURRENCY,
+)
 
 
 @app.post("/generate", response_model=GenerateResponse)
-async def generate(request: GenerateRequest):
+async def generate(request: GenerateRequest, http_request: Request):
     """
     Generate AI response based on user prompt.
+
+    The upstream call is aborted if the client disconnects or the request
+    is cancelled with `DELETE /requests/{id}`, using the `X-Request-ID`
+    header sent (or returned) with it. While the model's circuit is open
+    the request is answered by `DEFAULT_MODEL` and marked `degraded`, or
+    refused with a 503 if it set `fallback="fail"`. The time spent in each
+    phase is returned in the `Server-Timing` header (see `timing`).
     
     Args:
         request: Generate request containing model, prompt, and thinking flag
@@ -63,34 +540,573 @@ async def generate(request: GenerateRequest):
         Generated response from AI model
         
     Raises:
-        HTTPException: If generation fails
+        HTTPException: If generation fails, 503 if the model is unavailable,
+            or 499 if it was cancelled
     """
+    started = time.perf_counter()
+    selected_model = request.model or DEFAULT_MODEL
+    request_id = _request_id(http_request)
+    status = 200
     try:
+        timing.mark("validation")
         # Select appropriate model
-        selected_model = model_selector.select_model(
-            thinking=request.thinking,
-            requested_model=request.model
+        routing = _route(request)
+        selected_model = routing.model
+        timing.mark("selection")
+
+        logger.info("Generating response with model: %s (%s)", selected_model, routing.reason)
+        logger.info("Prompt: %.100s...", request.prompt)
+
+        result = await _cancellable(http_request, request_id, _generate(request, selected_model))
+        result.routing = routing
+        result.degraded = routing.degraded
+        # Serialize the (already valid) response once, skipping FastAPI's re-validation
+        return ORJSONResponse(result.model_dump(), headers={"X-Request-ID": request_id})
+
+    except RequestCancelled as e:
+        status = 499
+        metrics.observe_cancelled_request("generate", e.reason)
+        logger.info("Request %s cancelled (%s)", request_id, e.reason)
+        raise _cancelled(e)
+    except CircuitOpenError as e:
+        status = 503
+        raise _circuit_open(e)
+    except QueueFullError as e:
+        status = 429
+        logger.warning("Rejected request: %s", e)
+        raise _queue_full(e)
+    except Exception as e:
+        status = 500
+        logger.error("Error generating response: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate response: {str(e)}"
         )
-        
-        logger.info(f"Generating response with model: {selected_model}")
-        logger.info(f"Prompt: {request.prompt[:100]}...")
-        
-        # Generate response
-        response_text = await ollama_service.generate_response(
+    finally:
+        metrics.observe_request("generate", selected_model, _mode(request), time.perf_counter() - started, status)
+
+
+@app.post("/generate/batch", response_model=BatchGenerateResponse)
+async def generate_batch(request: BatchGenerateRequest):
+    """
+    Generate responses for a batch of prompts.
+
+    Items run concurrently under a per-model limit (`BATCH_CONCURRENCY`).
+    A failing item reports its `error` without failing the batch.
+
+    Args:
+        request: Batch of generate requests; `stream` selects NDJSON output
+
+    Returns:
+        Results in input order, or an NDJSON stream of results as each
+        item finishes when `stream` is true
+    """
+    logger.info("Generating batch of %d items", len(request.items))
+
+    if request.stream:
+        async def lines() -> AsyncIterator[bytes]:
+            async for result in batch_runner.run_stream(request.items):
+                yield orjson.dumps(result.model_dump()) + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return BatchGenerateResponse(results=await batch_runner.run(request.items))
+
+
+def _chunk_text(chunk: Dict[str, Any]) -> Tuple[str, str | None]:
+    """(token, thinking) of an Ollama chunk; `/api/generate` chunks carry `response`, `/api/chat` ones a `message`."""
+    message = chunk.get("message") or {}
+    return chunk.get("response") or message.get("content", ""), chunk.get("thinking") or message.get("thinking")
+
+
+def _sse(data: Dict[str, Any], event: str | None = None) -> str:
+    """Format one Server-Sent Event frame."""
+    frame = f"event: {event}\n" if event else ""
+    return f"{frame}data: {orjson.dumps(data).decode()}\n\n"
+
+
+async def _sse_events(
+    endpoint: str,
+    http_request: Request,
+    request_id: str,
+    first: Dict[str, Any],
+    chunks: AsyncIterator[Dict[str, Any]],
+    on_finish: Callable[[int], None] | None = None,
+) -> AsyncIterator[str]:
+    """
+    Translate Ollama NDJSON chunks into SSE frames.
+
+    One watcher task races a client disconnect against `DELETE
+    /requests/{request_id}` for the whole stream. When either happens while
+    the next chunk is awaited, the watcher cancels that read, which aborts
+    the upstream stream; otherwise the stream stops before its next read.
+    """
+    chunk = first
+    status = 200
+    consumer = asyncio.current_task()
+    reading = False
+    stopped: str | None = None
+
+    with in_flight.track(request_id) as cancelled:
+        async def watch():
+            nonlocal stopped
+            gone = asyncio.ensure_future(_client_gone(http_request))
+            try:
+                await asyncio.wait({gone, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                gone.cancel()
+            stopped = "cancelled" if cancelled.done() else "disconnect"
+            if reading:
+                consumer.cancel()
+
+        watcher = asyncio.create_task(watch())
+        try:
+            while True:
+                if chunk.get("done"):
+                    yield _sse({
+                        key: chunk[key]
+                        for key in ("model", "eval_count", "eval_duration", "prompt_eval_duration", "load_duration", "total_duration")
+                        if key in chunk
+                    }, event="done")
+                    return
+                token, thinking = _chunk_text(chunk)
+                if token or thinking:
+                    yield _sse({"token": token, "thinking": thinking} if thinking else {"token": token})
+                if stopped is not None:
+                    raise RequestCancelled(stopped)
+                reading = True
+                try:
+                    chunk = await chunks.__anext__()
+                except asyncio.CancelledError:
+                    if stopped is None:
+                        raise
+                    # Only the watcher's cancellation is ours to absorb
+                    consumer.uncancel()
+                    raise RequestCancelled(stopped)
+                finally:
+                    reading = False
+        except StopAsyncIteration:
+            yield _sse({}, event="done")
+        except RequestCancelled as e:
+            status = 499
+            metrics.observe_cancelled_request(endpoint, e.reason)
+            logger.info("Request %s cancelled (%s)", request_id, e.reason)
+            if e.reason != "disconnect":
+                yield _sse({"detail": str(e)}, event="error")
+        except asyncio.CancelledError:
+            # The server noticed the disconnect first and cancelled the response
+            status = 499
+            metrics.observe_cancelled_request(endpoint, "disconnect")
+            raise
+        except Exception as e:
+            status = 500
+            logger.error("Error while streaming response: %s", e)
+            yield _sse({"detail": f"Failed to generate response: {str(e)}"}, event="error")
+        finally:
+            watcher.cancel()
+            await chunks.aclose()
+            if on_finish is not None:
+                on_finish(status)
+
+
+async def _admitted_stream(request: GenerateRequest, selected_model: str) -> AsyncIterator[Dict[str, Any]]:
+    """Stream from Ollama while holding an admission slot for the model."""
+    async with admission.slot(selected_model):
+        async for chunk in ollama_service.stream_response(
             prompt=request.prompt,
-            model=selected_model
+            model=selected_model,
+            options=request.options,
+        ):
+            yield chunk
+
+
+@app.post("/generate/stream")
+async def generate_stream(request: GenerateRequest, http_request: Request):
+    """
+    Stream AI response tokens as Server-Sent Events.
+
+    Emits `data: {"token": ...}` frames as tokens arrive, then a final
+    `event: done` frame carrying Ollama's timing fields, or `event: error`.
+    Like `/generate`, the stream can be cancelled by its `X-Request-ID`,
+    and degrades when the model's circuit is open; degraded streams carry
+    an `X-Degraded: true` header.
+
+    Args:
+        request: Generate request containing model, prompt, and thinking flag
+
+    Returns:
+        Event stream of generated tokens
+
+    Raises:
+        HTTPException: If the upstream stream cannot be started, or 503 if
+            the model is unavailable
+    """
+    started = time.perf_counter()
+    try:
+        routing = _route(request)
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
+    selected_model = routing.model
+    request_id = _request_id(http_request)
+    logger.info("Streaming response with model: %s (%s)", selected_model, routing.reason)
+
+    def finish(status: int):
+        metrics.observe_request("generate_stream", selected_model, _mode(request), time.perf_counter() - started, status)
+
+    # Identical concurrent streams share one upstream call; late joiners replay
+    chunks = single_flight.stream(
+        make_cache_key(selected_model, request.prompt, request.options),
+        lambda: _admitted_stream(request, selected_model),
+    )
+    try:
+        # Wait for the first chunk so connection failures still map to a 500
+        first = await _cancellable(http_request, request_id, chunks.__anext__())
+    except RequestCancelled as e:
+        await chunks.aclose()
+        finish(499)
+        metrics.observe_cancelled_request("generate_stream", e.reason)
+        logger.info("Request %s cancelled (%s)", request_id, e.reason)
+        raise _cancelled(e)
+    except QueueFullError as e:
+        await chunks.aclose()
+        finish(429)
+        logger.warning("Rejected stream: %s", e)
+        raise _queue_full(e)
+    except Exception as e:
+        await chunks.aclose()
+        finish(500)
+        logger.error("Error starting response stream: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate response: {str(e)}"
         )
-        
-        logger.info(f"Generated response length: {len(response_text)}")
-        
-        return GenerateResponse(response=response_text)
-        
+
+    return StreamingResponse(
+        _sse_events("generate_stream", http_request, request_id, first, chunks, on_finish=finish),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Request-ID": request_id,
+            **_routing_headers(routing),
+        },
+    )
+
+
+def _open_session(request: ChatRequest, selected_model: str) -> ChatSession:
+    """Find or create the request's chat session."""
+    return sessions.get_or_create(request.session_id, selected_model)
+
+
+def _pin(session: ChatSession, selected_model: str) -> OllamaNode:
+    """Pin the session to the selected model and its node (call with the session lock held)."""
+    if session.pin_model(selected_model):
+        sessions.model_switches += 1
+        logger.info("Chat session %s switched to model %s", session.session_id, selected_model)
+    node = ollama_service.node_pool.pick(session.model, prefer=session.node_url)
+    session.node_url = node.url
+    return node
+
+
+async def _chat(request: ChatRequest, session: ChatSession, selected_model: str) -> str:
+    """
+    Run one chat turn and append it to the session history.
+
+    Turns of one session are serialized, and each is sent to the node that
+    served the previous one, so Ollama can reuse the KV cache of the shared
+    transcript prefix and only has to prefill the new turn. The history sent
+    is kept within the model's token budget by `context`.
+
+    Raises:
+        httpx.RequestError: If the upstream call fails
+        ValueError: If the upstream response is invalid
+    """
+    async with session.lock:
+        async with admission.slot(selected_model):
+            node = _pin(session, selected_model)
+            messages = context.build(session, request.message, request.options)
+            text = await ollama_service.chat_response(messages, session.model, request.options, node=node)
+        session.messages += [messages[-1], ChatMessage(role="assistant", content=text)]
+        return text
+
+
+async def _chat_stream(request: ChatRequest, session: ChatSession, selected_model: str) -> AsyncIterator[Dict[str, Any]]:
+    """Stream one chat turn, appending it to the session history once complete."""
+    async with session.lock:
+        async with admission.slot(selected_model):
+            node = _pin(session, selected_model)
+            messages = context.build(session, request.message, request.options)
+            parts = []
+            async for chunk in ollama_service.stream_chat(messages, session.model, request.options, node=node):
+                if chunk.get("done"):
+                    session.messages += [messages[-1], ChatMessage(role="assistant", content="".join(parts))]
+                else:
+                    parts.append((chunk.get("message") or {}).get("content", ""))
+                yield chunk
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest, http_request: Request, response: Response):
+    """
+    Answer the next turn of a conversation.
+
+    The backend keeps the history: clients send only the new `message` and
+    the `session_id` returned by the first turn (also sent back in the
+    `X-Session-ID` header). Unknown or expired IDs start a new session.
+    A cancelled turn (see `/generate`) is not added to the history.
+
+    Args:
+        request: Chat request carrying the new user turn
+
+    Returns:
+        Assistant reply and the session it belongs to
+
+    Raises:
+        HTTPException: If generation fails, 503 if the model is unavailable,
+            or 499 if it was cancelled
+    """
+    started = time.perf_counter()
+    try:
+        routing = _route(request)
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
+    selected_model = routing.model
+    session = _open_session(request, selected_model)
+    request_id = _request_id(http_request)
+    response.headers["X-Session-ID"] = session.session_id
+    response.headers["X-Request-ID"] = request_id
+    status = 200
+    try:
+        logger.info("Chat turn for session %s with model: %s (%s)", session.session_id, selected_model, routing.reason)
+        text = await _cancellable(http_request, request_id, _chat(request, session, selected_model))
+        return ChatResponse(
+            session_id=session.session_id,
+            response=text,
+            model=session.model,
+            degraded=routing.degraded,
+            routing=routing,
+        )
+
+    except RequestCancelled as e:
+        status = 499
+        metrics.observe_cancelled_request("chat", e.reason)
+        logger.info("Request %s cancelled (%s)", request_id, e.reason)
+        raise _cancelled(e)
+
+    except QueueFullError as e:
+        status = 429
+        logger.warning("Rejected chat turn: %s", e)
+        raise _queue_full(e)
     except Exception as e:
-        logger.error(f"Error generating response: {e}")
+        status = 500
+        logger.error("Error generating chat response: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate response: {str(e)}"
         )
+    finally:
+        metrics.observe_request("chat", selected_model, _mode(request), time.perf_counter() - started, status)
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Stream the next turn of a conversation as Server-Sent Events.
+
+    Frames match `/generate/stream`; the session ID is returned in the
+    `X-Session-ID` header.
+
+    Args:
+        request: Chat request carrying the new user turn
+
+    Returns:
+        Event stream of generated tokens
+
+    Raises:
+        HTTPException: If the upstream stream cannot be started, or 503 if
+            the model is unavailable
+    """
+    started = time.perf_counter()
+    try:
+        routing = _route(request)
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
+    selected_model = routing.model
+    session = _open_session(request, selected_model)
+    request_id = _request_id(http_request)
+    logger.info("Streaming chat turn for session %s with model: %s (%s)", session.session_id, selected_model, routing.reason)
+
+    def finish(status: int):
+        metrics.observe_request("chat_stream", selected_model, _mode(request), time.perf_counter() - started, status)
+
+    chunks = _chat_stream(request, session, selected_model)
+    try:
+        first = await _cancellable(http_request, request_id, chunks.__anext__())
+    except RequestCancelled as e:
+        await chunks.aclose()
+        finish(499)
+        metrics.observe_cancelled_request("chat_stream", e.reason)
+        logger.info("Request %s cancelled (%s)", request_id, e.reason)
+        raise _cancelled(e)
+    except QueueFullError as e:
+        await chunks.aclose()
+        finish(429)
+        logger.warning("Rejected chat stream: %s", e)
+        raise _queue_full(e)
+    except Exception as e:
+        await chunks.aclose()
+        finish(500)
+        logger.error("Error starting chat stream: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate response: {str(e)}"
+        )
+
+    return StreamingResponse(
+        _sse_events("chat_stream", http_request, request_id, first, chunks, on_finish=finish),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Session-ID": session.session_id,
+            "X-Request-ID": request_id,
+            **_routing_headers(routing),
+        },
+    )
+
+
+@app.get("/chat/{session_id}", response_model=ChatSessionInfo)
+async def get_chat_session(session_id: str):
+    """Return a session's pinned model and node and its message history."""
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown chat session")
+    return ChatSessionInfo(
+        session_id=session.session_id,
+        model=session.model,
+        node=session.node_url,
+        messages=session.messages,
+        summary=session.summary,
+    )
+
+
+@app.delete("/chat/{session_id}")
+async def delete_chat_session(session_id: str):
+    """Forget a chat session and its history."""
+    return {"deleted": sessions.delete(session_id)}
+
+
+async def _run_job(job: Job, request: JobRequest, selected_model: str):
+    """Generate a job's output, appending tokens as they stream in; its phase timings are kept on the job."""
+    started = time.perf_counter()
+    status = 200
+    timer = timing.RequestTimer(job.job_id, "/jobs")
+    with timing.timed(timer):
+        if request.session_id:
+            chat_request = ChatRequest(
+                session_id=request.session_id,
+                message=request.prompt,
+                model=request.model,
+                thinking=request.thinking,
+                options=request.options,
+            )
+            session = _open_session(chat_request, selected_model)
+            chunks = _chat_stream(chat_request, session, selected_model)
+        else:
+            chunks = single_flight.stream(
+                make_cache_key(selected_model, request.prompt, request.options),
+                lambda: _admitted_stream(request, selected_model),
+            )
+        try:
+            async for chunk in chunks:
+                if not chunk.get("done"):
+                    job.append(_chunk_text(chunk)[0])
+        except asyncio.CancelledError:
+            status = 499
+            metrics.observe_cancelled_request("job", "cancelled")
+            raise
+        except QueueFullError as e:
+            status = 429
+            raise RuntimeError(f"Server busy: {e}") from e
+        except Exception:
+            status = 500
+            raise
+        finally:
+            await chunks.aclose()
+            metrics.observe_request("job", selected_model, _mode(request), time.perf_counter() - started, status)
+            job.timings = timer.snapshot()
+            timer.log(status=status, model=selected_model)
+
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(request: JobRequest):
+    """
+    Start a generation in the background and return its job ID right away.
+
+    With a `session_id` the prompt is the next turn of that chat session;
+    otherwise it is a one-off generation. Poll `GET /jobs/{job_id}` for
+    status and partial output; `DELETE /requests/{job_id}` cancels it.
+
+    Args:
+        request: Job request
+
+    Returns:
+        The queued job; `degraded` if it was sent to `DEFAULT_MODEL`
+        because the model's circuit is open
+
+    Raises:
+        HTTPException: 503 if the model is unavailable and the job may not degrade
+    """
+    try:
+        routing = _route(request)
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
+    selected_model = routing.model
+    job = jobs.submit(
+        selected_model,
+        lambda job: _run_job(job, request, selected_model),
+        session_id=request.session_id,
+        routing=routing.model_dump(),
+    )
+    cancel = job.task.cancel
+    in_flight.add(job.job_id, cancel)
+    job.task.add_done_callback(lambda _: in_flight.discard(job.job_id, cancel))
+    logger.info("Submitted job %s with model: %s", job.job_id, selected_model)
+    return job.snapshot()
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """
+    Return a job's status and the output generated so far.
+
+    Raises:
+        HTTPException: 404 if the job is unknown or has expired
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job.snapshot()
+
+
+@app.delete("/requests/{request_id}")
+async def cancel_request(request_id: str):
+    """
+    Cancel an in-flight request or background job.
+
+    The upstream Ollama call is aborted, so the GPU stops generating. The
+    cancelled request itself ends with a 499 (an `event: error` frame for
+    streams); a cancelled job ends in status `cancelled`.
+
+    Args:
+        request_id: The request's `X-Request-ID`, or a job ID
+
+    Raises:
+        HTTPException: 404 if nothing with that ID is in flight
+    """
+    if not in_flight.cancel(request_id):
+        raise HTTPException(status_code=404, detail="Unknown or finished request")
+    return {"cancelled": True}
 
 
 if __name__ == "__main__":
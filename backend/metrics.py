@@ -0,0 +1,247 @@
+"""
+Lightweight Prometheus metrics for the backend.
+
+Metrics live in plain in-process counters updated from the event loop, so
+recording costs a dict lookup and an addition; the text exposition format is
+only built when `/metrics` is scraped.
+"""
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# Latency buckets in seconds, from cache hits up to long thinking-mode answers
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 40, 60, 80, 120, 200)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class for a labelled metric family."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Point-in-time value read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Callable[[], Dict[Tuple[str, ...], float]] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        if self.callback is not None:
+            for labels, value in self.callback().items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._values.get(labels)
+        if series is None:
+            series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self._values[labels] = series
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together for `/metrics`."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "aiassistant_requests_total", "Requests handled by the backend.", ("endpoint", "model", "mode")))
+ERRORS = REGISTRY.register(Counter(
+    "aiassistant_request_errors_total", "Requests that ended in an error.", ("endpoint", "model", "mode", "status")))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "aiassistant_request_duration_seconds", "End-to-end request latency.", ("endpoint", "model", "mode")))
+
+UPSTREAM_EVAL_TOKENS = REGISTRY.register(Counter(
+    "ollama_eval_tokens_total", "Tokens generated by Ollama (eval_count).", ("model",)))
+UPSTREAM_PROMPT_TOKENS = REGISTRY.register(Counter(
+    "ollama_prompt_tokens_total", "Prompt tokens processed by Ollama (prompt_eval_count).", ("model",)))
+UPSTREAM_TOKENS_PER_SECOND = REGISTRY.register(Histogram(
+    "ollama_tokens_per_second", "Decode throughput: eval_count / eval_duration.", ("model",),
+    buckets=TOKENS_PER_SECOND_BUCKETS))
+UPSTREAM_EVAL_DURATION = REGISTRY.register(Histogram(
+    "ollama_eval_duration_seconds", "Time Ollama spent generating tokens.", ("model",)))
+UPSTREAM_PROMPT_EVAL_DURATION = REGISTRY.register(Histogram(
+    "ollama_prompt_eval_duration_seconds", "Time Ollama spent on prompt prefill.", ("model",)))
+UPSTREAM_LOAD_DURATION = REGISTRY.register(Histogram(
+    "ollama_load_duration_seconds", "Time Ollama spent loading the model.", ("model",)))
+UPSTREAM_CANCELLED = REGISTRY.register(Counter(
+    "ollama_cancelled_requests_total", "Upstream requests aborted before Ollama finished them.", ("model",)))
+UPSTREAM_SECONDS_SAVED = REGISTRY.register(Counter(
+    "ollama_gpu_seconds_saved_total",
+    "Estimated generation time avoided by aborting upstream requests "
+    "(typical request duration minus the time already spent).", ("model",)))
+UPSTREAM_HEDGED = REGISTRY.register(Counter(
+    "ollama_hedged_requests_total", "Requests duplicated to a second node, by which copy answered first.",
+    ("model", "winner")))
+ROUTING_DECISIONS = REGISTRY.register(Counter(
+    "aiassistant_routing_decisions_total", "Model routing decisions by requested model, chosen model and rule.",
+    ("requested", "model", "rule")))
+REQUESTS_CANCELLED = REGISTRY.register(Counter(
+    "aiassistant_cancelled_requests_total", "Requests cancelled by the client.", ("endpoint", "reason")))
+BREAKER_TRANSITIONS = REGISTRY.register(Counter(
+    "aiassistant_circuit_transitions_total", "Circuit breaker state changes per model, by new state.",
+    ("model", "state")))
+BREAKER_REJECTIONS = REGISTRY.register(Counter(
+    "aiassistant_circuit_rejections_total",
+    "Requests turned away from a model with an open circuit, by whether they degraded or failed.",
+    ("model", "action")))
+
+
+def observe_upstream(model: str, data: Dict[str, Any]):
+    """
+    Record Ollama's timing fields from a final (done) response.
+
+    Durations arrive in nanoseconds.
+
+    Args:
+        model: Model that produced the response
+        data: Ollama response or final stream chunk
+    """
+    eval_count = data.get("eval_count")
+    eval_duration = data.get("eval_duration")
+    if eval_count:
+        UPSTREAM_EVAL_TOKENS.inc(model, amount=eval_count)
+        if eval_duration:
+            UPSTREAM_TOKENS_PER_SECOND.observe(eval_count / (eval_duration / 1e9), model)
+    if data.get("prompt_eval_count"):
+        UPSTREAM_PROMPT_TOKENS.inc(model, amount=data["prompt_eval_count"])
+    if eval_duration is not None:
+        UPSTREAM_EVAL_DURATION.observe(eval_duration / 1e9, model)
+    if data.get("prompt_eval_duration") is not None:
+        UPSTREAM_PROMPT_EVAL_DURATION.observe(data["prompt_eval_duration"] / 1e9, model)
+    if data.get("load_duration") is not None:
+        UPSTREAM_LOAD_DURATION.observe(data["load_duration"] / 1e9, model)
+
+
+def observe_cancelled_upstream(model: str, seconds_saved: float):
+    """Record an aborted upstream request and the generation time it saved."""
+    UPSTREAM_CANCELLED.inc(model)
+    UPSTREAM_SECONDS_SAVED.inc(model, amount=seconds_saved)
+
+
+def observe_cancelled_request(endpoint: str, reason: str):
+    """Record a request aborted by a client disconnect or an explicit cancel."""
+    REQUESTS_CANCELLED.inc(endpoint, reason)
+
+
+def observe_hedge(model: str, hedge_won: bool):
+    """Record a hedged upstream request and which copy won."""
+    UPSTREAM_HEDGED.inc(model, "hedge" if hedge_won else "primary")
+
+
+def observe_breaker_transition(model: str, state: str):
+    """Record a circuit breaker entering `state`."""
+    BREAKER_TRANSITIONS.inc(model, state)
+
+
+def observe_breaker_rejection(model: str, action: str):
+    """Record a request turned away by an open circuit (`degraded` or `failed`)."""
+    BREAKER_REJECTIONS.inc(model, action)
+
+
+def observe_routing(requested: str | None, model: str, rule: str):
+    """Record one model routing decision; `requested` is None if the request named no model."""
+    ROUTING_DECISIONS.inc(requested or "none", model, rule)
+
+
+def observe_request(endpoint: str, model: str, mode: str, seconds: float, status: int = 200):
+    """Record one finished request, counting it as an error when `status` >= 400."""
+    REQUESTS.inc(endpoint, model, mode)
+    REQUEST_LATENCY.observe(seconds, endpoint, model, mode)
+    if status >= 400:
+        ERRORS.inc(endpoint, model, mode, str(status))
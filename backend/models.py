@@ -1,17 +1,120 @@
-from pydantic import BaseModel
-from typing import Literal
+from pydantic import BaseModel, Field
+from typing import Literal, Dict, Any, List
+from config import BATCH_MAX_ITEMS
 
 
 class GenerateRequest(BaseModel):
     """Request model for the generate endpoint."""
-    model: Literal["llama3.2:3b", "qwen3:8b"] = "llama3.2:3b"
+    model: Literal["llama3.2:3b", "qwen3:8b"] | None = None
     prompt: str
     thinking: bool = False
+    options: Dict[str, Any] | None = None
+    cache: Literal["use", "bypass"] = "use"
+    latency_target_ms: int | None = Field(default=None, gt=0)
+    fallback: Literal["degrade", "fail"] = "degrade"
+
+
+class RoutingDecision(BaseModel):
+    """The model the router picked for a request, and why."""
+    model: str
+    requested_model: str | None = None
+    rule: Literal["thinking", "requested", "default", "latency_target", "circuit_open"]
+    reason: str
+    prompt_tokens: int
+    latency_target_ms: int | None = None
+    estimated_latency_ms: Dict[str, float] = {}
+    degraded: bool = False
 
 
 class GenerateResponse(BaseModel):
     """Response model for the generate endpoint."""
     response: str
+    cached: bool = False
+    degraded: bool = False
+    routing: RoutingDecision | None = None
+
+
+class BatchGenerateRequest(BaseModel):
+    """Request model for the batch generate endpoint."""
+    items: List[GenerateRequest] = Field(min_length=1, max_length=BATCH_MAX_ITEMS)
+    stream: bool = False
+
+
+class BatchItemResult(BaseModel):
+    """Result for one item of a batch; `error` is set instead of `response` on failure."""
+    index: int
+    model: str | None = None
+    response: str | None = None
+    cached: bool = False
+    degraded: bool = False
+    routing: RoutingDecision | None = None
+    error: str | None = None
+
+
+class BatchGenerateResponse(BaseModel):
+    """Response model for the batch generate endpoint."""
+    results: List[BatchItemResult]
+
+
+class ChatMessage(BaseModel):
+    """One message of a conversation, in Ollama's `/api/chat` format."""
+    role: Literal["system", "user", "assistant"]
+    content: str
+
+
+class ChatRequest(BaseModel):
+    """Request model for the chat endpoint; carries only the new user turn."""
+    session_id: str | None = Field(default=None, max_length=128, pattern=r"^[A-Za-z0-9_-]+$")
+    message: str
+    model: Literal["llama3.2:3b", "qwen3:8b"] | None = None
+    thinking: bool = False
+    options: Dict[str, Any] | None = None
+    latency_target_ms: int | None = Field(default=None, gt=0)
+    fallback: Literal["degrade", "fail"] = "degrade"
+
+
+class ChatResponse(BaseModel):
+    """Response model for the chat endpoint."""
+    session_id: str
+    response: str
+    model: str
+    degraded: bool = False
+    routing: RoutingDecision | None = None
+
+
+class ChatSessionInfo(BaseModel):
+    """A chat session's pinned model and node and its message history."""
+    session_id: str
+    model: str
+    node: str | None = None
+    messages: List[ChatMessage]
+    summary: str | None = None
+
+
+class JobRequest(BaseModel):
+    """Request model for submitting a background job; with `session_id` it is a chat turn."""
+    prompt: str
+    model: Literal["llama3.2:3b", "qwen3:8b"] | None = None
+    thinking: bool = False
+    options: Dict[str, Any] | None = None
+    session_id: str | None = Field(default=None, max_length=128, pattern=r"^[A-Za-z0-9_-]+$")
+    latency_target_ms: int | None = Field(default=None, gt=0)
+    fallback: Literal["degrade", "fail"] = "degrade"
+
+
+class JobStatus(BaseModel):
+    """State of a background job, with the output generated so far."""
+    job_id: str
+    status: Literal["queued", "running", "done", "error", "cancelled"]
+    model: str
+    session_id: str | None = None
+    output: str = ""
+    error: str | None = None
+    created_at: float
+    finished_at: float | None = None
+    degraded: bool = False
+    routing: RoutingDecision | None = None
+    timings: Dict[str, float] | None = None
 
 
 class OllamaRequest(BaseModel):
@@ -19,9 +122,27 @@ class OllamaRequest(BaseModel):
     model: str
     prompt: str
     stream: bool = False
+    options: Dict[str, Any] | None = None
+    keep_alive: str | None = None
+
+
+class OllamaEmbedRequest(BaseModel):
+    """Request model for Ollama's embedding API."""
+    model: str
+    input: List[str]
+    keep_alive: str | None = None
 
 
 class OllamaResponse(BaseModel):
     """Response model from Ollama API."""
     response: str
     done: bool = True
+
+
+class OllamaChatRequest(BaseModel):
+    """Request model for Ollama's chat API."""
+    model: str
+    messages: List[ChatMessage]
+    stream: bool = False
+    options: Dict[str, Any] | None = None
+    keep_alive: str | None = None
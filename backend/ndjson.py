@@ -0,0 +1,65 @@
+from typing import Any, AsyncIterator, List
+import orjson
+
+
+class NDJSONDecoder:
+    """
+    Incremental decoder for newline-delimited JSON arriving in byte chunks.
+
+    Complete lines are parsed straight out of each chunk through a
+    memoryview, without decoding to text or copying them into a line
+    buffer; only a line split across chunks is carried over.
+    """
+
+    def __init__(self):
+        self._partial = bytearray()
+
+    def feed(self, data: bytes) -> List[Any]:
+        """
+        Parse every line completed by `data`.
+
+        Raises:
+            ValueError: If a line is not valid JSON
+        """
+        objects: List[Any] = []
+        view = memoryview(data)
+        start = 0
+        end = data.find(b"\n")
+        if self._partial:
+            if end < 0:
+                self._partial += data
+                return objects
+            self._partial += view[:end]
+            if self._partial.strip():
+                objects.append(orjson.loads(self._partial))
+            self._partial.clear()
+            start = end + 1
+            end = data.find(b"\n", start)
+        while end >= 0:
+            if end > start:
+                objects.append(orjson.loads(view[start:end]))
+            start = end + 1
+            end = data.find(b"\n", start)
+        if start < len(data):
+            self._partial += view[start:]
+        return objects
+
+    def close(self) -> List[Any]:
+        """
+        Parse a last line that was not terminated by a newline.
+
+        Raises:
+            ValueError: If it is not valid JSON
+        """
+        partial, self._partial = self._partial, bytearray()
+        return [orjson.loads(partial)] if partial.strip() else []
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Yield the objects of an NDJSON byte stream as its lines complete."""
+    decoder = NDJSONDecoder()
+    async for data in chunks:
+        for item in decoder.feed(data):
+            yield item
+    for item in decoder.close():
+        yield item
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+import httpx
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Set
+from config import (
+    OLLAMA_HEALTH_INTERVAL,
+    OLLAMA_HEALTH_TIMEOUT,
+    OLLAMA_EJECT_AFTER_FAILURES,
+    OLLAMA_COLD_MODEL_PENALTY,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaNode:
+    """One upstream Ollama server and its live load/health figures."""
+
+    # Weight of the newest sample in the latency moving average
+    _ALPHA = 0.2
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.healthy = True
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.loaded_models: Set[str] = set()
+        self.latency: float | None = None
+        self.requests = 0
+        self.errors = 0
+        self.ejections = 0
+        self.last_probe: float | None = None
+
+    def record_success(self, model: str, seconds: float):
+        self.consecutive_failures = 0
+        self.loaded_models.add(model)
+        self.latency = seconds if self.latency is None else self.latency + self._ALPHA * (seconds - self.latency)
+
+    def record_failure(self):
+        self.errors += 1
+        self.consecutive_failures += 1
+        if self.healthy and self.consecutive_failures >= OLLAMA_EJECT_AFTER_FAILURES:
+            self.healthy = False
+            self.ejections += 1
+            logger.warning("Ejected Ollama node %s after %d failures", self.url, self.consecutive_failures)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejections": self.ejections,
+            "latency_ms": self.latency * 1000 if self.latency is not None else None,
+            "loaded_models": sorted(self.loaded_models),
+        }
+
+
+class NodePool:
+    """
+    Least-outstanding-requests balancing over Ollama nodes.
+
+    Nodes that already have the requested model loaded are preferred: a cold
+    node counts as if it had `OLLAMA_COLD_MODEL_PENALTY` extra requests in
+    flight. A background probe of `/api/ps` refreshes loaded models, ejects
+    nodes that keep failing and re-admits them once they answer again.
+    """
+
+    def __init__(self, urls: List[str]):
+        if not urls:
+            raise ValueError("At least one Ollama node is required")
+        self.nodes = [OllamaNode(url) for url in urls]
+        self._probe_task: asyncio.Task | None = None
+        self._probed = asyncio.Event()
+
+    def pick(self, model: str, exclude: OllamaNode | None = None, prefer: str | None = None) -> OllamaNode:
+        """
+        Choose the node for a request.
+
+        Args:
+            model: Model the request needs
+            exclude: Node to avoid if another is available
+            prefer: URL of a node to stick to while it is healthy (chat
+                sessions, whose prompt prefix is cached there)
+
+        Returns:
+            The preferred node if healthy, else the healthy node with the
+            lowest load score, or the least loaded node overall when every
+            node is ejected
+        """
+        if prefer is not None:
+            for node in self.nodes:
+                if node.url == prefer and node.healthy and node is not exclude:
+                    return node
+
+        candidates = [node for node in self.nodes if node.healthy and node is not exclude]
+        if not candidates:
+            candidates = [node for node in self.nodes if node.healthy] or self.nodes
+
+        def score(node: OllamaNode):
+            cold = 0 if model in node.loaded_models else OLLAMA_COLD_MODEL_PENALTY
+            return (node.in_flight + cold, node.latency or 0.0)
+
+        return min(candidates, key=score)
+
+    @contextmanager
+    def track(self, node: OllamaNode, model: str) -> Iterator[None]:
+        """Account one request on `node`, recording latency or failure."""
+        node.in_flight += 1
+        node.requests += 1
+        started = time.perf_counter()
+        try:
+            yield
+        except httpx.PoolTimeout:
+            # Local pool exhaustion says nothing about the node's health
+            raise
+        except httpx.RequestError:
+            node.record_failure()
+            raise
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                node.record_failure()
+            raise
+        else:
+            node.record_success(model, time.perf_counter() - started)
+        finally:
+            node.in_flight -= 1
+
+    async def probe(self, client: httpx.AsyncClient):
+        """Probe every node once and update health and loaded models."""
+        await asyncio.gather(*(self._probe_node(client, node) for node in self.nodes))
+        self._probed.set()
+
+    async def wait_probed(self):
+        """Wait until every node has been probed at least once."""
+        await self._probed.wait()
+
+    async def _probe_node(self, client: httpx.AsyncClient, node: OllamaNode):
+        node.last_probe = time.time()
+        try:
+            response = await client.get(f"{node.url}/api/ps", timeout=OLLAMA_HEALTH_TIMEOUT)
+            response.raise_for_status()
+            models = response.json().get("models", [])
+        except (httpx.HTTPError, ValueError) as e:
+            logger.debug("Probe of %s failed: %s", node.url, e)
+            node.record_failure()
+            return
+
+        node.loaded_models = {entry.get("name") or entry.get("model") for entry in models}
+        node.consecutive_failures = 0
+        if not node.healthy:
+            node.healthy = True
+            logger.info("Re-admitted Ollama node %s", node.url)
+
+    async def _probe_loop(self, client: httpx.AsyncClient):
+        while True:
+            try:
+                await self.probe(client)
+            except Exception as e:
+                logger.error("Ollama node probe failed: %s", e)
+            await asyncio.sleep(OLLAMA_HEALTH_INTERVAL)
+
+    def start(self, client: httpx.AsyncClient):
+        """Start the background health probe."""
+        if self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe_loop(client))
+
+    async def close(self):
+        """Stop the background health probe."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def healthy_count(self) -> int:
+        """Number of nodes currently accepting traffic."""
+        return sum(1 for node in self.nodes if node.healthy)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-node in-flight counts, latency, health and loaded models."""
+        return [node.snapshot() for node in self.nodes]
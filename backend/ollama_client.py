@@ -1,29 +1,196 @@
+import asyncio
+import logging
+import time
 import httpx
-from typing import Dict, Any
+import orjson
+from contextlib import aclosing, asynccontextmanager
+from typing import Dict, Any, AsyncIterator, List
 from .services import AIModelService
-from .models import OllamaRequest, OllamaResponse
-from config import OLLAMA_BASE_URL, OLLAMA_TIMEOUT
+from pydantic import BaseModel
+from .models import OllamaRequest, OllamaResponse, OllamaChatRequest, OllamaEmbedRequest, ChatMessage
+from .nodes import NodePool, OllamaNode
+from .hedging import HedgePolicy
+from .circuit_breaker import CircuitBreakers, TrackedCall
+from .ndjson import iter_ndjson
+from . import timing
+from .metrics import observe_upstream, observe_cancelled_upstream, observe_hedge
+from config import (
+    OLLAMA_NODES,
+    MODEL_KEEP_ALIVE,
+    MODEL_NUM_CTX,
+    DEFAULT_NUM_CTX,
+    OLLAMA_MAX_CONNECTIONS,
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+    OLLAMA_KEEPALIVE_EXPIRY,
+    OLLAMA_CONNECT_TIMEOUT,
+    OLLAMA_READ_TIMEOUT,
+    OLLAMA_WRITE_TIMEOUT,
+    OLLAMA_POOL_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Calls split into connect/ttft/decode phases of the request being timed
+_TIMED_PATHS = ("/api/generate", "/api/chat")
+
+
+def _options(model: str, options: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """Generation options for `model`, with its configured `num_ctx` unless the caller set one."""
+    return {"num_ctx": MODEL_NUM_CTX.get(model, DEFAULT_NUM_CTX), **(options or {})}
+
+
+def _encode(request_data: BaseModel) -> bytes:
+    """Request body for Ollama: the set fields, serialized once with orjson."""
+    return orjson.dumps(request_data.model_dump(exclude_none=True))
+
+
+class PoolStats:
+    """Connection pool statistics for the shared Ollama HTTP client."""
+
+    def __init__(self):
+        self.requests = 0
+        self.in_flight = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.pool_timeouts = 0
+        self.pool_wait_total = 0.0
+        self.pool_wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        """Record the time a request spent waiting for a pooled connection."""
+        self.pool_wait_total += seconds
+        if seconds > self.pool_wait_max:
+            self.pool_wait_max = seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current statistics as a plain dict."""
+        reused = self.reused_connections
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": reused / (reused + self.new_connections) if reused or self.new_connections else 0.0,
+            "pool_timeouts": self.pool_timeouts,
+            "pool_wait_avg_ms": (self.pool_wait_total / self.requests * 1000) if self.requests else 0.0,
+            "pool_wait_max_ms": self.pool_wait_max * 1000,
+        }
+
+
+class _RequestTrace:
+    """httpcore trace callback measuring pool wait, new connections and connect time for one request."""
+
+    # First events emitted once a connection has been taken from the pool
+    _ACQUIRED_EVENTS = (
+        "connection.connect_tcp.started",
+        "http11.send_request_headers.started",
+        "http2.send_request_headers.started",
+    )
+
+    # Emitted once the connection is ready and the request goes out
+    _SENDING_EVENTS = (
+        "http11.send_request_headers.started",
+        "http2.send_request_headers.started",
+    )
+
+    def __init__(self, stats: PoolStats, call: TrackedCall):
+        self.stats = stats
+        # The circuit breaker's view of the request
+        self.call = call
+        self.started = time.perf_counter()
+        self.acquired = False
+        self.connected: float | None = None
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]):
+        if self.connected is None and event_name in self._SENDING_EVENTS:
+            self.connected = time.perf_counter()
+        if not self.acquired and event_name in self._ACQUIRED_EVENTS:
+            self.acquired = True
+            self.stats.record_wait(time.perf_counter() - self.started)
+            if event_name != "connection.connect_tcp.started":
+                self.stats.reused_connections += 1
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.new_connections += 1
+
+
+class _HedgeCopy:
+    """One copy of a hedged request; marked lost before the losing copy is cancelled."""
+
+    def __init__(self):
+        self.lost = False
 
 
 class OllamaService(AIModelService):
-    """Service to interact with Ollama API."""
-    
-    def __init__(self, base_url: str | None = None, timeout: float | None = None):
-        self.base_url = base_url or OLLAMA_BASE_URL
-        self.generate_url = f"{self.base_url}/api/generate"
-        self.timeout = float(timeout if timeout is not None else OLLAMA_TIMEOUT)
-    
-    async def generate_response(self, prompt: str, model: str) -> str:
+    """Service to interact with Ollama API across one or more nodes."""
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        timeout: float | None = None,
+        nodes: List[str] | None = None,
+        hedging: HedgePolicy | None = None,
+        breakers: CircuitBreakers | None = None,
+    ):
+        if nodes is None:
+            nodes = [base_url] if base_url else OLLAMA_NODES
+        self.node_pool = NodePool(nodes)
+        self.base_url = self.node_pool.nodes[0].url
+        self.timeout = float(timeout if timeout is not None else OLLAMA_READ_TIMEOUT)
+        self.pool_stats = PoolStats()
+        self.hedging = hedging or HedgePolicy()
+        self.breakers = breakers or CircuitBreakers()
+        self._client: httpx.AsyncClient | None = None
+        # Moving average of completed request durations per model, used to
+        # estimate the generation time saved by aborting a request
+        self._durations: Dict[str, float] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create the shared, pooled HTTP client from config settings."""
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                connect=OLLAMA_CONNECT_TIMEOUT,
+                read=self.timeout,
+                write=OLLAMA_WRITE_TIMEOUT,
+                pool=OLLAMA_POOL_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY,
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client; created lazily if `start()` was not called."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def start(self):
+        """Create the shared HTTP client and start node health probes."""
+        self.node_pool.start(self.client)
+
+    async def close(self):
+        """Stop node probes, close the shared HTTP client and release pooled connections."""
+        await self.node_pool.close()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def generate_response(self, prompt: str, model: str, options: Dict[str, Any] | None = None) -> str:
         """
         Generate response from Ollama model.
-        
+
         Args:
             prompt: User prompt
             model: Model name to use
-            
+            options: Ollama generation options (temperature, num_ctx, ...)
+
         Returns:
             Generated response text
-            
+
         Raises:
             httpx.RequestError: If request fails
             ValueError: If response is invalid
@@ -31,26 +198,359 @@ class OllamaService(AIModelService):
         request_data = OllamaRequest(
             model=model,
             prompt=prompt,
-            stream=False
+            stream=self.hedging.enabled,
+            options=_options(model, options),
+            keep_alive=MODEL_KEEP_ALIVE.get(model),
+        )
+        if self.hedging.enabled:
+            return await self._join(self._hedged_stream("/api/generate", request_data, self.node_pool.pick(model)))
+        response_data = await self._post("/api/generate", request_data, self.node_pool.pick(model))
+        if "response" not in response_data:
+            raise ValueError("Invalid response format from Ollama")
+        return response_data["response"]
+
+    async def stream_response(
+        self, prompt: str, model: str, options: Dict[str, Any] | None = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a response from Ollama model chunk by chunk.
+
+        Args:
+            prompt: User prompt
+            model: Model name to use
+            options: Ollama generation options (temperature, num_ctx, ...)
+
+        Yields:
+            Parsed NDJSON chunks from Ollama; the last one has `done` set
+
+        Raises:
+            httpx.RequestError: If request fails
+            ValueError: If a chunk is invalid
+        """
+        request_data = OllamaRequest(
+            model=model,
+            prompt=prompt,
+            stream=True,
+            options=_options(model, options),
+            keep_alive=MODEL_KEEP_ALIVE.get(model),
+        )
+        async for chunk in self._hedged_stream("/api/generate", request_data, self.node_pool.pick(model)):
+            yield chunk
+
+    async def chat_response(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        options: Dict[str, Any] | None = None,
+        node: OllamaNode | None = None,
+    ) -> str:
+        """
+        Answer a conversation through Ollama's `/api/chat`.
+
+        Args:
+            messages: Full message history, ending with the new user turn
+            model: Model name to use
+            options: Ollama generation options (temperature, num_ctx, ...)
+            node: Node to send the request to; picked by load if None
+
+        Returns:
+            The assistant message content
+
+        Raises:
+            httpx.RequestError: If request fails
+            ValueError: If response is invalid
+        """
+        request_data = OllamaChatRequest(
+            model=model,
+            messages=messages,
+            stream=self.hedging.enabled,
+            options=_options(model, options),
+            keep_alive=MODEL_KEEP_ALIVE.get(model),
         )
+        if self.hedging.enabled:
+            return await self._join(self._hedged_stream("/api/chat", request_data, node or self.node_pool.pick(model)))
+        response_data = await self._post("/api/chat", request_data, node or self.node_pool.pick(model))
+        message = response_data.get("message")
+        if not isinstance(message, dict) or "content" not in message:
+            raise ValueError("Invalid response from Ollama: missing assistant message")
+        return message["content"]
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
+    async def stream_chat(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        options: Dict[str, Any] | None = None,
+        node: OllamaNode | None = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an answer to a conversation through Ollama's `/api/chat`.
+
+        Args:
+            messages: Full message history, ending with the new user turn
+            model: Model name to use
+            options: Ollama generation options (temperature, num_ctx, ...)
+            node: Node to send the request to; picked by load if None
+
+        Yields:
+            Parsed NDJSON chunks (`message.content` carries the text); the
+            last one has `done` set
+
+        Raises:
+            httpx.RequestError: If request fails
+            ValueError: If a chunk is invalid
+        """
+        request_data = OllamaChatRequest(
+            model=model,
+            messages=messages,
+            stream=True,
+            options=_options(model, options),
+            keep_alive=MODEL_KEEP_ALIVE.get(model),
+        )
+        async for chunk in self._hedged_stream("/api/chat", request_data, node or self.node_pool.pick(model)):
+            yield chunk
+
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """
+        Embed texts with an embedding model through Ollama's `/api/embed`.
+
+        Args:
+            texts: Texts to embed
+            model: Embedding model name
+
+        Returns:
+            One embedding per text
+
+        Raises:
+            httpx.RequestError: If request fails
+            ValueError: If response is invalid
+        """
+        request_data = OllamaEmbedRequest(model=model, input=texts, keep_alive=MODEL_KEEP_ALIVE.get(model))
+        response_data = await self._post("/api/embed", request_data, self.node_pool.pick(model))
+        embeddings = response_data.get("embeddings")
+        if not isinstance(embeddings, list) or len(embeddings) != len(texts):
+            raise ValueError("Invalid response from Ollama: missing embeddings")
+        return embeddings
+
+    async def _join(self, chunks: AsyncIterator[Dict[str, Any]]) -> str:
+        """Concatenate the text of a `/api/generate` or `/api/chat` stream."""
+        parts = []
+        async for chunk in chunks:
+            parts.append(chunk.get("response") or (chunk.get("message") or {}).get("content", ""))
+        return "".join(parts)
+
+    async def _hedged_stream(self, path: str, request_data: BaseModel, node: OllamaNode) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream from `node`, hedging to a second node if the first token is late.
+
+        Once the model's hedge delay (see `HedgePolicy`) passes without a
+        first chunk, and the hedge budget allows, the same request is sent to
+        another healthy node. Whichever stream produces a chunk first wins;
+        the other is cancelled, which aborts its upstream request. A copy
+        that fails while the other is still pending does not end the race.
+        """
+        model = request_data.model
+        payload = _encode(request_data)
+        if not self.hedging.enabled:
+            async for chunk in self._stream(path, model, payload, node):
+                yield chunk
+            return
+
+        delay = self.hedging.delay(model)
+        copies = [_HedgeCopy()]
+        streams = [self._stream(path, model, payload, node, copies[0])]
+        starts = [time.perf_counter()]
+        reads = {asyncio.ensure_future(streams[0].__anext__()): 0}
+        winner: int | None = None
+        first: asyncio.Future | None = None
+        try:
+            done, _ = await asyncio.wait(reads, timeout=delay)
+            if not done:
+                other = self.node_pool.pick(model, exclude=node)
+                if other is not node and other.healthy and self.hedging.try_hedge():
+                    logger.info("Hedging %s request from %s to %s after %.0f ms", model, node.url, other.url, delay * 1000)
+                    copies.append(_HedgeCopy())
+                    streams.append(self._stream(path, model, payload, other, copies[1]))
+                    starts.append(time.perf_counter())
+                    reads[asyncio.ensure_future(streams[1].__anext__())] = 1
+
+            error: BaseException | None = None
+            while winner is None:
+                done, _ = await asyncio.wait(reads, return_when=asyncio.FIRST_COMPLETED)
+                for read in done:
+                    index = reads.pop(read)
+                    if read.exception() is None or isinstance(read.exception(), StopAsyncIteration):
+                        winner, first = index, read
+                        break
+                    error = read.exception()
+                if winner is None and not reads:
+                    raise error
+        finally:
+            # Cancel the loser (or everything, if the caller went away). A
+            # loser is duplicate work, not an abort the client asked for
+            if winner is not None:
+                for index, copy in enumerate(copies):
+                    copy.lost = index != winner
+            for read, index in reads.items():
+                read.cancel()
+            if reads:
+                await asyncio.gather(*reads, return_exceptions=True)
+            for index, stream in enumerate(streams):
+                if index != winner:
+                    await stream.aclose()
+
+        self.hedging.record_ttft(model, time.perf_counter() - starts[winner])
+        if len(streams) > 1:
+            self.hedging.record_winner(winner == 1)
+            observe_hedge(model, winner == 1)
+        if isinstance(first.exception(), StopAsyncIteration):
+            return
+        stream = streams[winner]
+        try:
+            yield first.result()
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def _post(self, path: str, request_data: BaseModel, node: OllamaNode) -> Dict[str, Any]:
+        """POST a non-streaming request to `node` and return the decoded body."""
+        model = request_data.model
+        async with self._tracked(model) as trace:
             try:
-                response = await client.post(
-                    self.generate_url,
-                    json=request_data.model_dump(),
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                
-                response_data = response.json()
-                
-                if "response" not in response_data:
-                    raise ValueError("Invalid response format from Ollama")
-                
-                return response_data["response"]
-                
+                with self.node_pool.track(node, model):
+                    response = await self.client.post(
+                        f"{node.url}{path}",
+                        content=_encode(request_data),
+                        headers=self._request_headers(),
+                        extensions={"trace": trace},
+                    )
+                    response.raise_for_status()
+
+                response_data = orjson.loads(response.content)
+                observe_upstream(model, response_data)
+                timer = timing.current()
+                if timer is not None and path in _TIMED_PATHS:
+                    timer.record_upstream(trace.connected, None, response_data)
+                return response_data
+
             except httpx.RequestError as e:
-                raise httpx.RequestError(f"Failed to connect to Ollama: {e}")
+                raise self._connection_error(e)
             except ValueError as e:
                 raise ValueError(f"Invalid response from Ollama: {e}")
+
+    async def _stream(
+        self, path: str, model: str, payload: bytes, node: OllamaNode, copy: _HedgeCopy | None = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """POST an encoded streaming request to `node` and yield its NDJSON chunks."""
+        final = None
+        first_token: float | None = None
+        async with self._tracked(model, copy) as trace:
+            try:
+                with self.node_pool.track(node, model):
+                    async with self.client.stream(
+                        "POST",
+                        f"{node.url}{path}",
+                        content=payload,
+                        headers=self._request_headers(),
+                        extensions={"trace": trace},
+                    ) as response:
+                        response.raise_for_status()
+                        async with aclosing(iter_ndjson(response.aiter_bytes())) as chunks:
+                            async for chunk in chunks:
+                                if "error" in chunk:
+                                    raise ValueError(chunk["error"])
+                                if chunk.get("done"):
+                                    # Read on to the end of the body: leaving a
+                                    # response unfinished closes its connection
+                                    # instead of returning it to the pool
+                                    final = chunk
+                                    continue
+                                if first_token is None:
+                                    first_token = time.perf_counter()
+                                    trace.call.first_token()
+                                yield chunk
+
+            except httpx.RequestError as e:
+                raise self._connection_error(e)
+            except ValueError as e:
+                raise ValueError(f"Invalid response from Ollama: {e}")
+
+        # Hand out the final chunk only once the body is fully read (so the
+        # connection is back in the pool) and the request was accounted, so a
+        # consumer stopping at `done` can neither close the connection nor
+        # count as an abort
+        if final is not None:
+            observe_upstream(model, final)
+            timer = timing.current()
+            if timer is not None and path in _TIMED_PATHS:
+                timer.record_upstream(trace.connected, first_token, final)
+            yield final
+
+    async def warm_model(self, node: OllamaNode, model: str, keep_alive: str | None = None):
+        """
+        Load `model` into memory on `node`, with the `num_ctx` requests will
+        use, without generating anything.
+
+        Args:
+            node: Node to warm
+            model: Model name to load
+            keep_alive: How long Ollama should keep the model resident
+
+        Raises:
+            httpx.RequestError: If request fails
+        """
+        request_data = OllamaRequest(
+            model=model,
+            prompt="",
+            options=_options(model),
+            keep_alive=keep_alive or MODEL_KEEP_ALIVE.get(model),
+        )
+        try:
+            with self.node_pool.track(node, model):
+                response = await self.client.post(f"{node.url}/api/generate", content=_encode(request_data))
+                response.raise_for_status()
+        except httpx.RequestError as e:
+            raise self._connection_error(e)
+
+    @asynccontextmanager
+    async def _tracked(self, model: str, copy: _HedgeCopy | None = None):
+        """
+        Account one upstream request in the pool statistics and its model's
+        circuit breaker.
+
+        A request cancelled (or a stream closed) before it finished aborts
+        the upstream call; it is counted with the generation time it saved.
+        The losing copy of a hedged request is not: its work duplicated the
+        winner's on purpose, and `ollama_hedged_requests_total` counts it.
+        """
+        stats = self.pool_stats
+        stats.requests += 1
+        stats.in_flight += 1
+        started = time.perf_counter()
+        try:
+            with self.breakers.track(model) as call:
+                yield _RequestTrace(stats, call)
+        except (asyncio.CancelledError, GeneratorExit):
+            if copy is None or not copy.lost:
+                elapsed = time.perf_counter() - started
+                observe_cancelled_upstream(model, max(0.0, self._durations.get(model, 0.0) - elapsed))
+            raise
+        else:
+            elapsed = time.perf_counter() - started
+            average = self._durations.get(model)
+            self._durations[model] = elapsed if average is None else average + 0.2 * (elapsed - average)
+        finally:
+            stats.in_flight -= 1
+
+    @staticmethod
+    def _request_headers() -> Dict[str, str] | None:
+        """Headers passing the current request's ID on to Ollama (and any proxy logs in between)."""
+        request_id = timing.current_request_id()
+        return {"X-Request-ID": request_id} if request_id else None
+
+    def _connection_error(self, error: httpx.RequestError) -> httpx.RequestError:
+        """Wrap a transport error, counting pool timeouts on the way."""
+        if isinstance(error, httpx.PoolTimeout):
+            self.pool_stats.pool_timeouts += 1
+            return httpx.RequestError(f"Timed out waiting for an Ollama connection: {error}")
+        return httpx.RequestError(f"Failed to connect to Ollama: {error}")
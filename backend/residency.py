@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Tuple
+from .ollama_client import OllamaService
+from config import (
+    DEFAULT_MODEL,
+    MODEL_KEEP_ALIVE,
+    RESIDENCY_WARM_MODELS,
+    RESIDENCY_POLL_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ResidencyManager:
+    """
+    Keep the configured models loaded on every healthy Ollama node.
+
+    On startup each model is preloaded with its `MODEL_KEEP_ALIVE`. A
+    background loop then checks the node pool's latest `/api/ps` probe
+    results (it does not probe itself) and re-warms any model Ollama has
+    evicted. `ready` stays false until the default model is resident on at
+    least one healthy node.
+    """
+
+    def __init__(
+        self,
+        ollama_service: OllamaService,
+        models: List[str] | None = None,
+        poll_interval: float | None = None,
+    ):
+        self.ollama_service = ollama_service
+        self.models = models if models is not None else RESIDENCY_WARM_MODELS
+        self.poll_interval = float(poll_interval if poll_interval is not None else RESIDENCY_POLL_INTERVAL)
+        self._task: asyncio.Task | None = None
+        self._warming: Dict[Tuple[str, str], asyncio.Task] = {}
+        # When each (node, model) was last known to be resident
+        self._resident: Dict[Tuple[str, str], float] = {}
+        self.warmups = 0
+        self.rewarms = 0
+        self.failures = 0
+
+    @property
+    def ready(self) -> bool:
+        """True once the default model is resident on a healthy node."""
+        return any(
+            node.healthy and DEFAULT_MODEL in node.loaded_models
+            for node in self.ollama_service.node_pool.nodes
+        )
+
+    async def refresh(self):
+        """Check the node pool's latest probe results and start warm-ups for missing models."""
+        node_pool = self.ollama_service.node_pool
+        await node_pool.wait_probed()
+
+        for node in node_pool.nodes:
+            if not node.healthy:
+                continue
+            for model in self.models:
+                key = (node.url, model)
+                if model in node.loaded_models:
+                    self._resident[key] = time.time()
+                    continue
+                if key in self._warming:
+                    continue
+                if key in self._resident:
+                    if node.last_probe is None or node.last_probe <= self._resident[key]:
+                        # The probe predates the warm-up; wait for a newer one
+                        continue
+                    # It was loaded before, so Ollama evicted it
+                    del self._resident[key]
+                    self.rewarms += 1
+                    logger.info("Model %s was evicted from %s, re-warming", model, node.url)
+                task = asyncio.create_task(self._warm(node, model))
+                self._warming[key] = task
+                task.add_done_callback(lambda _, key=key: self._warming.pop(key, None))
+
+    async def _warm(self, node, model: str):
+        try:
+            await self.ollama_service.warm_model(node, model, MODEL_KEEP_ALIVE.get(model))
+        except Exception as e:
+            self.failures += 1
+            logger.warning("Failed to warm %s on %s: %s", model, node.url, e)
+            return
+        self.warmups += 1
+        self._resident[(node.url, model)] = time.time()
+        logger.info("Model %s is resident on %s", model, node.url)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Residency check failed: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        """Start preloading and the background residency loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the residency loop and any warm-up still running."""
+        tasks = list(self._warming.values())
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Readiness, resident models per node and warm-up counters."""
+        return {
+            "ready": self.ready,
+            "models": self.models,
+            "resident": {
+                node.url: sorted(node.loaded_models)
+                for node in self.ollama_service.node_pool.nodes
+            },
+            "warming": sorted(f"{model}@{url}" for url, model in self._warming),
+            "warmups": self.warmups,
+            "rewarms": self.rewarms,
+            "failures": self.failures,
+        }
@@ -0,0 +1,386 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+import numpy as np
+from config import (
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_CAPACITY,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_DEFAULT_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+    SEMANTIC_CACHE_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _Block:
+    """Contiguous rows of one partition, grown by doubling."""
+
+    def __init__(self, vectors: np.ndarray, expires_at: np.ndarray, last_used: np.ndarray, answers: List[str]):
+        self.vectors = vectors
+        self.expires_at = expires_at
+        self.last_used = last_used
+        self.answers = answers
+        self.size = len(answers)
+
+    def append(self, vector: np.ndarray, answer: str, expires_at: float, limit: int):
+        if self.size == len(self.vectors):
+            rows = min(max(16, 2 * self.size), limit)
+            vectors = np.zeros((rows, self.vectors.shape[1]), dtype=np.float32)
+            vectors[:self.size] = self.vectors[:self.size]
+            self.vectors = vectors
+            self.expires_at = np.resize(self.expires_at, rows)
+            self.last_used = np.resize(self.last_used, rows)
+        row = self.size
+        self.vectors[row] = vector
+        self.expires_at[row] = expires_at
+        self.last_used[row] = time.time()
+        self.answers.append(answer)
+        self.size += 1
+
+    def remove(self, row: int):
+        """Drop a row, moving the last row into its place."""
+        last = self.size - 1
+        if row != last:
+            self.vectors[row] = self.vectors[last]
+            self.expires_at[row] = self.expires_at[last]
+            self.last_used[row] = self.last_used[last]
+            self.answers[row] = self.answers[last]
+        self.answers.pop()
+        self.size = last
+
+
+class EmbeddingIndex:
+    """
+    Capacity-bounded store of unit-length prompt embeddings and their answers.
+
+    Each partition (model and generation options) keeps its rows in one
+    contiguous float32 block, so a lookup scans only its own partition with
+    a single matrix product. When full, an expired row or else the least
+    recently used one is dropped. With a `path`, `save` writes the blocks
+    back to back into a `.npy` file with the answers in a `.json` file next
+    to it, and a reload memory-maps the blocks straight from that file.
+    """
+
+    def __init__(self, capacity: int, path: str | None = None):
+        self.capacity = capacity
+        self.path = path
+        self.dim: int | None = None
+        self.size = 0
+        self.blocks: Dict[int, _Block] = {}
+        self._partitions: Dict[str, int] = {}
+        self.evictions = 0
+        if path is not None:
+            self._load()
+
+    def partition_id(self, partition: str) -> int:
+        """Integer code of a partition, assigned on first use."""
+        code = self._partitions.get(partition)
+        if code is None:
+            code = self._partitions[partition] = len(self._partitions)
+        return code
+
+    def search(self, queries: np.ndarray, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best live match in the same partition for each query.
+
+        Queries are grouped by partition and each group is scored against
+        its partition's block in one matrix product.
+
+        Args:
+            queries: (k, dim) unit-length query embeddings
+            codes: (k,) partition code of each query
+
+        Returns:
+            (rows, scores): best row of the query's partition and its cosine
+            similarity; the score is -inf where the partition has no live entry
+        """
+        rows = np.zeros(len(queries), dtype=np.int64)
+        best = np.full(len(queries), -np.inf, dtype=np.float32)
+        now = time.time()
+        for code in np.unique(codes):
+            block = self.blocks.get(int(code))
+            if block is None or block.size == 0:
+                continue
+            size = block.size
+            members = np.flatnonzero(codes == code)
+            scores = queries[members] @ block.vectors[:size].T
+            scores[:, block.expires_at[:size] <= now] = -np.inf
+            rows[members] = scores.argmax(axis=1)
+            best[members] = scores[np.arange(len(members)), rows[members]]
+        return rows, best
+
+    def match(self, code: int, row: int, vector: np.ndarray, threshold: float) -> str | None:
+        """
+        Answer stored at `row` if it still matches `vector` at `threshold`.
+
+        The row may have been replaced since the scan that found it, so the
+        similarity is checked again against its current contents. A match
+        is marked as just used, protecting it from eviction.
+        """
+        block = self.blocks.get(code)
+        if block is None or row >= block.size or block.expires_at[row] <= time.time():
+            return None
+        if float(block.vectors[row] @ vector) < threshold:
+            return None
+        block.last_used[row] = time.time()
+        return block.answers[row]
+
+    def add(self, code: int, vector: np.ndarray, answer: str, expires_at: float):
+        """Store a unit-length embedding and its answer."""
+        if self.dim is None:
+            self.dim = len(vector)
+        if self.size >= self.capacity:
+            self._evict()
+        block = self.blocks.get(code)
+        if block is None:
+            block = self.blocks[code] = _Block(
+                np.zeros((0, self.dim), dtype=np.float32), np.zeros(0), np.zeros(0), [],
+            )
+        block.append(vector, answer, expires_at, self.capacity)
+        self.size += 1
+
+    def _evict(self):
+        """Drop the first expired row found, or else the least recently used one."""
+        now = time.time()
+        victim = None
+        for block in self.blocks.values():
+            if block.size == 0:
+                continue
+            expired = np.flatnonzero(block.expires_at[:block.size] <= now)
+            if len(expired):
+                victim = (block, int(expired[0]))
+                break
+            row = int(block.last_used[:block.size].argmin())
+            if victim is None or block.last_used[row] < victim[0].last_used[victim[1]]:
+                victim = (block, row)
+        victim[0].remove(victim[1])
+        self.size -= 1
+        self.evictions += 1
+
+    def _metadata_path(self) -> str:
+        return os.path.splitext(self.path)[0] + ".json"
+
+    def _load(self):
+        """Reopen a saved index; a missing or mismatched one starts empty."""
+        if not (os.path.exists(self.path) and os.path.exists(self._metadata_path())):
+            return
+        try:
+            vectors = np.load(self.path, mmap_mode="r+")
+            with open(self._metadata_path(), encoding="utf-8") as handle:
+                metadata = json.load(handle)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable semantic cache %s: %s", self.path, e)
+            return
+        rows = metadata["rows"]
+        if not rows:
+            return
+        if vectors.dtype != np.float32 or vectors.ndim != 2 or vectors.shape[0] < len(rows):
+            logger.warning("Ignoring semantic cache %s: it does not match its answers file", self.path)
+            return
+        if len(rows) > self.capacity:
+            logger.warning("Ignoring semantic cache %s: it holds more than %d entries", self.path, self.capacity)
+            return
+        codes = np.array([code for code, _, _, _ in rows], dtype=np.int64)
+        order = np.argsort(codes, kind="stable")
+        if np.any(order != np.arange(len(rows))):
+            # Saved before partitions were grouped; regroup in memory
+            vectors = vectors[order]
+            rows = [rows[i] for i in order]
+            codes = codes[order]
+        start = 0
+        for code, count in zip(*np.unique(codes, return_counts=True)):
+            end = start + int(count)
+            part = rows[start:end]
+            self.blocks[int(code)] = _Block(
+                vectors[start:end],
+                np.array([expires_at for _, expires_at, _, _ in part], dtype=np.float64),
+                np.array([last_used for _, _, last_used, _ in part], dtype=np.float64),
+                [answer for _, _, _, answer in part],
+            )
+            start = end
+        self.dim = vectors.shape[1]
+        self.size = len(rows)
+        self._partitions = metadata["partitions"]
+        logger.info("Loaded %d semantic cache entries from %s", self.size, self.path)
+
+    def save(self):
+        """Write the blocks and the answers file, replacing the saved index."""
+        if self.path is None:
+            return
+        if self.size == 0:
+            for path in (self.path, self._metadata_path()):
+                if os.path.exists(path):
+                    os.remove(path)
+            return
+        tmp = self.path + ".tmp.npy"
+        vectors = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(self.size, self.dim))
+        rows = []
+        start = 0
+        for code in sorted(self.blocks):
+            block = self.blocks[code]
+            vectors[start:start + block.size] = block.vectors[:block.size]
+            start += block.size
+            rows += [
+                [code, float(block.expires_at[row]), float(block.last_used[row]), block.answers[row]]
+                for row in range(block.size)
+            ]
+        vectors.flush()
+        del vectors
+        os.replace(tmp, self.path)
+        tmp = self._metadata_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump({"partitions": self._partitions, "rows": rows}, handle)
+        os.replace(tmp, self._metadata_path())
+
+
+class SemanticCache:
+    """
+    Response cache keyed by prompt meaning rather than exact text.
+
+    Prompts are embedded through `embed` (Ollama's embedding endpoint) and
+    compared with every cached prompt of the same model and options; the
+    stored answer is served when the cosine similarity reaches the model's
+    threshold. Lookups arriving while a scan runs are batched into the next
+    one, and scans run in a worker thread so the event loop stays free.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], Awaitable[List[float]]],
+        capacity: int | None = None,
+        thresholds: Dict[str, float] | None = None,
+        default_threshold: float | None = None,
+        ttl: float | None = None,
+        path: str | None = None,
+        enabled: bool | None = None,
+    ):
+        self.embed = embed
+        self.enabled = SEMANTIC_CACHE_ENABLED if enabled is None else enabled
+        self.capacity = capacity if capacity is not None else SEMANTIC_CACHE_CAPACITY
+        self.thresholds = thresholds if thresholds is not None else SEMANTIC_CACHE_THRESHOLD
+        self.default_threshold = default_threshold if default_threshold is not None else SEMANTIC_CACHE_DEFAULT_THRESHOLD
+        self.ttl = float(ttl if ttl is not None else SEMANTIC_CACHE_TTL)
+        self.path = path if path is not None else SEMANTIC_CACHE_PATH
+        self.index: EmbeddingIndex | None = None
+        self._pending: List[Tuple[np.ndarray, int, asyncio.Future]] = []
+        self._scanner: asyncio.Task | None = None
+        self.hits = 0
+        self.misses = 0
+        self.embed_failures = 0
+        self.scans = 0
+        self.scanned_queries = 0
+        self.scan_seconds = 0.0
+
+    async def start(self):
+        """Create (or reload) the index."""
+        if self.enabled and self.index is None:
+            self.index = await asyncio.to_thread(EmbeddingIndex, self.capacity, self.path)
+
+    async def close(self):
+        """Save the index if it is persistent."""
+        if self.index is not None:
+            await asyncio.to_thread(self.index.save)
+
+    def threshold(self, model: str) -> float:
+        """Minimum cosine similarity for a hit on `model`."""
+        return self.thresholds.get(model, self.default_threshold)
+
+    async def lookup(self, model: str, prompt: str, options: Dict[str, Any] | None = None) -> Tuple[str | None, np.ndarray | None]:
+        """
+        Find the answer to a prompt similar enough to `prompt`.
+
+        Args:
+            model: Model the answer must come from
+            prompt: User prompt
+            options: Generation options; answers are only shared between equal options
+
+        Returns:
+            (answer, embedding): the answer is None on a miss; pass the
+            embedding to `put` so the prompt is not embedded twice. The
+            embedding is None if embedding failed.
+        """
+        if self.index is None:
+            return None, None
+        try:
+            vector = np.asarray(await self.embed(prompt), dtype=np.float32)
+        except Exception as e:
+            self.embed_failures += 1
+            logger.warning("Embedding failed, skipping the semantic cache: %s", e)
+            return None, None
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0 or (self.index.dim is not None and len(vector) != self.index.dim):
+            self.misses += 1
+            return None, None
+        vector /= norm
+
+        code = self.index.partition_id(self._partition(model, options))
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((vector, code, future))
+        if self._scanner is None or self._scanner.done():
+            self._scanner = asyncio.create_task(self._scan())
+        row, score = await future
+
+        threshold = self.threshold(model)
+        answer = self.index.match(code, row, vector, threshold) if score >= threshold else None
+        if answer is not None:
+            self.hits += 1
+            return answer, vector
+        self.misses += 1
+        return None, vector
+
+    async def put(self, model: str, options: Dict[str, Any] | None, vector: np.ndarray | None, answer: str):
+        """Cache `answer` under the embedding returned by `lookup`."""
+        if self.index is None or vector is None:
+            return
+        code = self.index.partition_id(self._partition(model, options))
+        self.index.add(code, vector, answer, time.time() + self.ttl)
+
+    async def _scan(self):
+        """Answer every pending lookup with one batched scan, until none are left."""
+        while self._pending:
+            batch, self._pending = self._pending, []
+            queries = np.stack([vector for vector, _, _ in batch])
+            codes = np.array([code for _, code, _ in batch], dtype=np.int32)
+            started = time.perf_counter()
+            try:
+                rows, scores = await asyncio.to_thread(self.index.search, queries, codes)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.scans += 1
+            self.scanned_queries += len(batch)
+            self.scan_seconds += time.perf_counter() - started
+            for (_, _, future), row, score in zip(batch, rows, scores):
+                if not future.done():
+                    future.set_result((int(row), float(score)))
+
+    @staticmethod
+    def _partition(model: str, options: Dict[str, Any] | None) -> str:
+        return json.dumps([model, options or {}], sort_keys=True, separators=(",", ":"))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit counters, occupancy and scan timing."""
+        lookups = self.hits + self.misses
+        index = self.index
+        return {
+            "enabled": self.enabled,
+            "entries": index.size if index is not None else 0,
+            "capacity": self.capacity,
+            "dim": index.dim if index is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "embed_failures": self.embed_failures,
+            "evictions": index.evictions if index is not None else 0,
+            "scans": self.scans,
+            "avg_batch": self.scanned_queries / self.scans if self.scans else 0.0,
+            "avg_scan_ms": self.scan_seconds / self.scans * 1000 if self.scans else 0.0,
+            "persistent": self.path is not None,
+        }
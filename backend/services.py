@@ -1,20 +1,187 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
-from config import DEFAULT_MODEL, THINKING_MODEL
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Any, AsyncIterator, Deque, TYPE_CHECKING
+from .models import RoutingDecision
+from .metrics import observe_routing, observe_breaker_rejection
+from .circuit_breaker import CircuitOpenError
+from .log_setup import BackgroundLogging
+from config import (
+    DEFAULT_MODEL,
+    THINKING_MODEL,
+    CONTEXT_CHARS_PER_TOKEN,
+    ROUTING_LATENCY_TARGET_MS,
+    ROUTING_SHORT_PROMPT_TOKENS,
+    ROUTING_LOG_PATH,
+    ROUTING_LOG_MAX_BYTES,
+    ROUTING_LOG_BACKUPS,
+    ROUTING_RECENT_DECISIONS,
+)
+
+if TYPE_CHECKING:
+    from .admission import AdmissionController
+    from .circuit_breaker import CircuitBreakers
 
 
 class AIModelService(ABC):
     """Abstract base class for AI model services."""
     
     @abstractmethod
-    async def generate_response(self, prompt: str, model: str) -> str:
+    async def generate_response(self, prompt: str, model: str, options: Dict[str, Any] | None = None) -> str:
         """Generate response from AI model."""
         pass
 
+    @abstractmethod
+    def stream_response(
+        self, prompt: str, model: str, options: Dict[str, Any] | None = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream response chunks from AI model."""
+        pass
+
 
 class ModelSelector:
-    """Service to select appropriate model based on thinking mode."""
-    
+    """
+    Service to select the model for a request.
+
+    The base rule is fixed: thinking mode gets `THINKING_MODEL`, otherwise
+    the requested model or `DEFAULT_MODEL`. `route` refines it with the
+    prompt length, the admission queue and recent service times: given a
+    latency target, a short prompt bound for `THINKING_MODEL` goes to
+    `DEFAULT_MODEL` when the thinking model would miss the target and the
+    default model would not. If the chosen model's circuit breaker is open,
+    the request degrades to `DEFAULT_MODEL` or is refused. Every decision is
+    counted and, with a `log_path`, logged to the `backend.routing` logger,
+    which writes it to that rotating file from a background thread for
+    offline analysis.
+    """
+
+    def __init__(
+        self,
+        admission: "AdmissionController | None" = None,
+        breakers: "CircuitBreakers | None" = None,
+        latency_target_ms: int | None = None,
+        short_prompt_tokens: int | None = None,
+        log_path: str | None = ROUTING_LOG_PATH,
+    ):
+        self.admission = admission
+        self.breakers = breakers
+        self.latency_target_ms = latency_target_ms if latency_target_ms is not None else ROUTING_LATENCY_TARGET_MS
+        self.short_prompt_tokens = short_prompt_tokens if short_prompt_tokens is not None else ROUTING_SHORT_PROMPT_TOKENS
+        self.log_path = log_path
+        self._log: BackgroundLogging | None = None
+        if log_path is not None:
+            self._log = BackgroundLogging(
+                level="INFO",
+                sample_rates={},
+                logger="backend.routing",
+                writer=RotatingFileHandler(
+                    log_path, maxBytes=ROUTING_LOG_MAX_BYTES, backupCount=ROUTING_LOG_BACKUPS, encoding="utf-8", delay=True
+                ),
+            )
+            self._log.start()
+        self.recent: Deque[RoutingDecision] = deque(maxlen=ROUTING_RECENT_DECISIONS)
+        self.by_rule: Dict[str, int] = {}
+
+    def route(
+        self,
+        prompt: str,
+        thinking: bool,
+        requested_model: str | None = None,
+        latency_target_ms: int | None = None,
+        fallback: str = "degrade",
+    ) -> RoutingDecision:
+        """
+        Pick the model for a request and record the decision.
+
+        Args:
+            prompt: The prompt (or new chat message) to answer
+            thinking: Whether thinking mode is enabled
+            requested_model: Explicitly requested model; None leaves the
+                choice to the router
+            latency_target_ms: Caller's latency target; `ROUTING_LATENCY_TARGET_MS` if None
+            fallback: "degrade" to use `DEFAULT_MODEL` while the chosen
+                model's circuit is open, "fail" to be refused instead
+
+        Returns:
+            The chosen model, the rule that chose it and a readable reason
+
+        Raises:
+            CircuitOpenError: If the chosen model's circuit is open and the
+                request cannot degrade
+        """
+        model = self.select_model(thinking, requested_model)
+        if thinking:
+            rule, reason = "thinking", f"thinking mode uses {model}"
+        elif requested_model:
+            rule, reason = "requested", f"{model} was requested"
+        else:
+            rule, reason = "default", f"{model} is the default model"
+
+        tokens = -(-len(prompt) // CONTEXT_CHARS_PER_TOKEN)
+        target = latency_target_ms if latency_target_ms is not None else self.latency_target_ms
+        estimates: Dict[str, float] = {}
+        if target is not None and self.admission is not None and model == THINKING_MODEL != DEFAULT_MODEL:
+            for candidate in (THINKING_MODEL, DEFAULT_MODEL):
+                wait, service = self.admission.estimated_latency(candidate)
+                estimates[candidate] = (wait + service) * 1000
+            slow, fast = estimates[THINKING_MODEL], estimates[DEFAULT_MODEL]
+            if slow > target:
+                if tokens > self.short_prompt_tokens:
+                    reason += f"; kept although it would take ~{slow:.0f} ms (target {target} ms): prompt of ~{tokens} tokens is not short"
+                elif fast > target:
+                    reason += f"; no model meets the {target} ms target ({THINKING_MODEL} ~{slow:.0f} ms, {DEFAULT_MODEL} ~{fast:.0f} ms)"
+                else:
+                    model, rule = DEFAULT_MODEL, "latency_target"
+                    reason = (
+                        f"short prompt (~{tokens} tokens) and {THINKING_MODEL} would take ~{slow:.0f} ms, "
+                        f"over the {target} ms target; {DEFAULT_MODEL} ~{fast:.0f} ms"
+                    )
+
+        degraded = False
+        if self.breakers is not None and not self.breakers.allow(model):
+            if fallback != "degrade" or model == DEFAULT_MODEL or not self.breakers.allow(DEFAULT_MODEL):
+                observe_breaker_rejection(model, "failed")
+                raise CircuitOpenError(model, self.breakers.retry_after(model))
+            observe_breaker_rejection(model, "degraded")
+            reason = f"{model} circuit is open ({reason}); degraded to {DEFAULT_MODEL}"
+            model, rule, degraded = DEFAULT_MODEL, "circuit_open", True
+
+        decision = RoutingDecision(
+            model=model,
+            requested_model=requested_model,
+            rule=rule,
+            reason=reason,
+            prompt_tokens=tokens,
+            latency_target_ms=target,
+            estimated_latency_ms=estimates,
+            degraded=degraded,
+        )
+        self._record(decision, thinking)
+        return decision
+
+    def _record(self, decision: RoutingDecision, thinking: bool):
+        self.recent.append(decision)
+        self.by_rule[decision.rule] = self.by_rule.get(decision.rule, 0) + 1
+        observe_routing(decision.requested_model, decision.model, decision.rule)
+        if self._log is not None:
+            self._log.logger.info(
+                "routing_decision", extra={"fields": {"thinking": thinking, **decision.model_dump()}}
+            )
+
+    def close(self):
+        """Write out queued decisions and close the routing log."""
+        if self._log is not None:
+            self._log.stop()
+            self._log = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Decision counts by rule and the most recent decisions."""
+        return {
+            "by_rule": dict(self.by_rule),
+            "latency_target_ms": self.latency_target_ms,
+            "recent": [decision.model_dump() for decision in self.recent],
+        }
+
     @staticmethod
     def select_model(thinking: bool, requested_model: str | None = None) -> str:
         """
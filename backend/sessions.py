@@ -0,0 +1,120 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List
+from .models import ChatMessage
+from config import CHAT_SESSION_TTL, CHAT_MAX_SESSIONS
+
+
+class ChatSession:
+    """
+    One conversation: its message history plus the model and node it is pinned to.
+
+    Turns of a session are serialized with `lock`, so history is appended in
+    order and every turn extends the exact transcript Ollama saw last time.
+    """
+
+    def __init__(self, session_id: str, model: str):
+        self.session_id = session_id
+        self.model = model
+        self.node_url: str | None = None
+        self.messages: List[ChatMessage] = []
+        # Context window: messages before `window_start` are no longer sent;
+        # those before `summarized` are covered by `summary`
+        self.window_start = 0
+        self.summary: str | None = None
+        self.summarized = 0
+        self.summary_task: asyncio.Task | None = None
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    def pin_model(self, model: str) -> bool:
+        """
+        Switch the session to `model`, dropping the node pin if it changes.
+
+        Returns:
+            True if the model changed
+        """
+        if model == self.model:
+            return False
+        self.model = model
+        self.node_url = None
+        return True
+
+
+class SessionStore:
+    """
+    In-memory chat sessions with idle expiry and an LRU bound on their number.
+
+    Sessions are kept in least-recently-used order, so expired ones are
+    always at the front and are dropped lazily whenever a session is looked up.
+    """
+
+    def __init__(self, ttl: float | None = None, max_sessions: int | None = None):
+        self.ttl = float(ttl if ttl is not None else CHAT_SESSION_TTL)
+        self.max_sessions = max_sessions if max_sessions is not None else CHAT_MAX_SESSIONS
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.model_switches = 0
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used > cutoff or session.lock.locked():
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def get(self, session_id: str) -> ChatSession | None:
+        """Return a live session and mark it used, or None."""
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(self, session_id: str | None, model: str) -> ChatSession:
+        """
+        Look up a session, creating it if it is unknown or expired.
+
+        Args:
+            session_id: Client-supplied ID; a new one is generated if None
+            model: Model for a newly created session
+
+        Returns:
+            The session
+        """
+        if session_id is not None:
+            session = self.get(session_id)
+            if session is not None:
+                return session
+        else:
+            session_id = uuid.uuid4().hex
+
+        session = ChatSession(session_id, model)
+        self._sessions[session_id] = session
+        self.created += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        """Forget a session; returns whether it existed."""
+        return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Session count and lifecycle counters."""
+        self._expire()
+        return {
+            "sessions": len(self._sessions),
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "model_switches": self.model_switches,
+        }
@@ -0,0 +1,160 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List
+
+
+class _Call:
+    """A shared in-flight call and the number of callers awaiting it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class _StreamCall:
+    """A shared in-flight stream with a replay buffer for late joiners."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.waiters = 0
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    def notify(self):
+        """Wake every subscriber waiting for the next chunk."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def pump(self, iterator: AsyncIterator[Any]):
+        """Drain the upstream iterator into the replay buffer."""
+        try:
+            async for chunk in iterator:
+                self.chunks.append(chunk)
+                self.notify()
+        except asyncio.CancelledError:
+            self.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self.notify()
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """Yield every chunk from the start, then follow the live stream."""
+        index = 0
+        while True:
+            if index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+                continue
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight generations into one upstream call.
+
+    The first caller for a key starts the upstream work; concurrent callers
+    with the same key await the same result. A cancelled caller only stops
+    waiting: the shared call is cancelled once no caller is left.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, _Call] = {}
+        self._streams: Dict[Hashable, _StreamCall] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `factory()` once per key among concurrent callers.
+
+        Args:
+            key: Identity of the call, e.g. a cache key
+            factory: Zero-argument callable returning the awaitable to share
+
+        Returns:
+            The shared result
+        """
+        if not self.enabled:
+            return await factory()
+
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._forget(self._calls, key, call)
+                call.task.cancel()
+
+    async def stream(self, key: Hashable, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Share one upstream stream per key among concurrent subscribers.
+
+        Late joiners first receive a replay of the chunks already produced.
+
+        Args:
+            key: Identity of the stream
+            factory: Zero-argument callable returning the upstream async iterator
+
+        Yields:
+            Chunks of the shared stream
+        """
+        if not self.enabled:
+            async for chunk in factory():
+                yield chunk
+            return
+
+        call = self._streams.get(key)
+        if call is None:
+            call = _StreamCall()
+            call.task = asyncio.ensure_future(call.pump(factory()))
+            self._streams[key] = call
+            call.task.add_done_callback(lambda _: self._forget(self._streams, key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            async for chunk in call.subscribe():
+                yield chunk
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._forget(self._streams, key, call)
+                call.task.cancel()
+
+    @staticmethod
+    def _forget(table: Dict[Hashable, Any], key: Hashable, call: Any):
+        if table.get(key) is call:
+            del table[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters and the number of shared calls in flight."""
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._calls) + len(self._streams),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
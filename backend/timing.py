@@ -0,0 +1,180 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar["RequestTimer | None"] = ContextVar("request_timer", default=None)
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+class RequestTimer:
+    """
+    Wall-clock time of one request, split into consecutive phases.
+
+    `mark(phase)` charges the time since the previous mark to `phase`, so
+    phases add up to the total. Ollama's own `load` and `prefill` durations
+    are reported next to them; they are part of `ttft`, not extra time.
+    """
+
+    def __init__(self, request_id: str, path: str = ""):
+        self.request_id = request_id
+        self.path = path
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+        self.upstream: Dict[str, float] = {}
+
+    def mark(self, phase: str):
+        """Charge the time since the previous mark to `phase`."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def record_upstream(self, connected: float | None, first_token: float | None, final: Dict[str, Any]):
+        """
+        Split a finished Ollama call into connect, time to first token and decode.
+
+        A non-streamed call has no first token of its own; Ollama's load and
+        prompt eval durations stand in for it.
+
+        Args:
+            connected: `perf_counter()` when the request headers went out
+            first_token: `perf_counter()` of the first chunk, if streamed
+            final: Ollama's final response (or `done` chunk) with its durations
+        """
+        now = time.perf_counter()
+        connected = connected if connected is not None else self._last
+        self.phases["connect"] = self.phases.get("connect", 0.0) + connected - self._last
+        load = final.get("load_duration", 0) / 1e9
+        prefill = final.get("prompt_eval_duration", 0) / 1e9
+        if first_token is None:
+            first_token = min(now, connected + load + prefill)
+        self.phases["ttft"] = self.phases.get("ttft", 0.0) + first_token - connected
+        self.phases["decode"] = self.phases.get("decode", 0.0) + now - first_token
+        self.upstream["load"] = self.upstream.get("load", 0.0) + load
+        self.upstream["prefill"] = self.upstream.get("prefill", 0.0) + prefill
+        self._last = now
+
+    def total(self) -> float:
+        """Seconds since the request arrived."""
+        return time.perf_counter() - self.started
+
+    def snapshot(self) -> Dict[str, float]:
+        """Phase, Ollama-reported and total durations in milliseconds."""
+        durations = {**self.phases, **self.upstream, "total": self.total()}
+        return {name: round(seconds * 1000, 2) for name, seconds in durations.items()}
+
+    def server_timing(self) -> str:
+        """The durations as a `Server-Timing` header value."""
+        entries: List[str] = []
+        for name, ms in self.snapshot().items():
+            entry = f"{name};dur={ms}"
+            if name in self.upstream:
+                entry += f';desc="ollama {name} (within ttft)"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+    def log(self, **fields: Any):
+        """Write the timings as one structured log line; it is never sampled away."""
+        logger.info(
+            "request_timing",
+            extra={
+                "fields": {"path": self.path, **fields, "timings_ms": self.snapshot()},
+                "request_id": self.request_id,
+                "sample": False,
+            },
+        )
+
+
+def current() -> RequestTimer | None:
+    """The timer of the request being handled, if it is timed."""
+    return _current.get()
+
+
+def current_request_id() -> str | None:
+    """ID of the request being handled."""
+    return _request_id.get()
+
+
+def mark(phase: str):
+    """Charge the time since the previous mark of the current request to `phase`; a no-op if untimed."""
+    timer = _current.get()
+    if timer is not None:
+        timer.mark(phase)
+
+
+@contextmanager
+def timed(timer: RequestTimer) -> Iterator[RequestTimer]:
+    """Make `timer` the current request's timer, and its ID the request ID, within the block."""
+    token = _current.set(timer)
+    id_token = _request_id.set(timer.request_id)
+    try:
+        yield timer
+    finally:
+        _request_id.reset(id_token)
+        _current.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Add the current request ID (None outside a request) to log records as `request_id`."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = current_request_id()
+        return True
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware giving each request an ID and timing requests to `paths`.
+
+    The ID is the request's `X-Request-ID`, or a new one; log records and
+    Ollama calls made while handling it carry it. Requests to `paths` also
+    get a `RequestTimer` the handlers mark phases on. Time between the handler's
+    last mark and the response start is charged to `serialize`. The response
+    carries the timings in a `Server-Timing` header, and they are logged as
+    one structured line.
+    """
+
+    def __init__(self, app, paths: List[str]):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1") or uuid.uuid4().hex
+        if scope["path"] not in self.paths:
+            token = _request_id.set(request_id)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _request_id.reset(token)
+            return
+
+        timer = RequestTimer(request_id, scope["path"])
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timer.mark("serialize")
+                response_headers = MutableHeaders(scope=message)
+                response_headers["Server-Timing"] = timer.server_timing()
+                response_headers["X-Request-ID"] = request_id
+            await send(message)
+
+        with timed(timer):
+            try:
+                await self.app(scope, receive, send_timed)
+            finally:
+                timer.log(status=status)
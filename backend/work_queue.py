@@ -0,0 +1,373 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Tuple
+from config import (
+    QUEUE_SQLITE_PATH,
+    QUEUE_LEASE_SECONDS,
+    QUEUE_MAX_ATTEMPTS,
+    QUEUE_NOTIFY_INTERVAL,
+    QUEUE_RESULT_TIMEOUT,
+    QUEUE_PURGE_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DurableQueue:
+    """
+    Work queue in a SQLite database in WAL mode, shared by the API and worker processes.
+
+    Workers claim jobs with a lease and must complete (or renew) them before
+    it runs out; a job whose lease expired is handed to the next worker, up
+    to `QUEUE_MAX_ATTEMPTS` claims. Completion is only accepted from the
+    current lease holder, so a worker that stalled past its lease cannot
+    overwrite the retry's result.
+
+    Jobs nobody waits for any more are `cancelled`: explicitly by the API
+    process when a request times out or goes away, or on claim once they
+    are older than `QUEUE_RESULT_TIMEOUT` (e.g. their API process
+    restarted). Workers never claim them, and finished rows are purged.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or QUEUE_SQLITE_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30.0)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, lease_owner TEXT, lease_expires REAL, "
+                "result TEXT, error TEXT, created_at REAL NOT NULL, claimed_at REAL, finished_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def data_version(self) -> int:
+        """Changes whenever another connection commits to the database."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        """Add a job and return its ID."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, payload, status, created_at) VALUES (?, ?, 'queued', ?)",
+                (job_id, json.dumps(payload), time.time()),
+            )
+        return job_id
+
+    def claim(self, worker_id: str, lease: float | None = None) -> Tuple[str, Dict[str, Any], int] | None:
+        """
+        Lease the oldest runnable job: queued, or leased with an expired lease.
+
+        Args:
+            worker_id: Identifies the lease holder
+            lease: Lease length in seconds
+
+        Returns:
+            (job_id, payload, attempt) or None if there is nothing to do
+        """
+        now = time.time()
+        lease = lease if lease is not None else QUEUE_LEASE_SECONDS
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Nobody waits for a job past the result timeout: drop it
+                # rather than spend a generation on it
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', error = 'abandoned', finished_at = ?, lease_owner = NULL "
+                    "WHERE created_at < ? AND (status = 'queued' OR (status = 'leased' AND lease_expires < ?))",
+                    (now, now - QUEUE_RESULT_TIMEOUT, now),
+                )
+                # Expired leases that used up their attempts are failed, not retried
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'lease expired', finished_at = ? "
+                    "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, now, QUEUE_MAX_ATTEMPTS),
+                )
+                row = self._conn.execute(
+                    "SELECT id, payload, attempts FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, claimed_at = COALESCE(claimed_at, ?) WHERE id = ?",
+                    (worker_id, now + lease, now, row[0]),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row[2]:
+            logger.info("Retrying job %s (attempt %d)", row[0], row[2] + 1)
+        return row[0], json.loads(row[1]), row[2] + 1
+
+    def renew(self, job_id: str, worker_id: str, lease: float | None = None) -> bool:
+        """Extend a lease; returns False if the worker no longer holds it."""
+        lease = lease if lease is not None else QUEUE_LEASE_SECONDS
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (time.time() + lease, job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, job_id: str, worker_id: str) -> bool:
+        """Give a leased job back to the queue for another attempt."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: str) -> bool:
+        """Store a job's result; ignored unless `worker_id` holds the lease."""
+        return self._finish(job_id, worker_id, "done", result=result)
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Mark a job failed; ignored unless `worker_id` holds the lease."""
+        return self._finish(job_id, worker_id, "failed", error=error)
+
+    def _finish(self, job_id: str, worker_id: str, status: str, result: str | None = None, error: str | None = None) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_owner = NULL "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (status, result, error, time.time(), job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Withdraw a job nobody will collect.
+
+        A queued job is never claimed; a leased one loses its lease, so its
+        worker stops and cannot store a result. A job that already finished
+        is deleted.
+
+        Returns:
+            True if the job had not finished yet
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ?, lease_owner = NULL "
+                "WHERE id = ? AND status IN ('queued', 'leased')",
+                (time.time(), job_id),
+            )
+            if cursor.rowcount == 0:
+                self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return cursor.rowcount == 1
+
+    def purge(self, older_than: float) -> int:
+        """Delete done, failed and cancelled jobs that finished more than `older_than` seconds ago."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+                (time.time() - older_than,),
+            )
+        return cursor.rowcount
+
+    def finished(self, job_ids) -> Dict[str, Tuple[str, str | None, str | None]]:
+        """Return {job_id: (status, result, error)} for those of `job_ids` that are done or failed."""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return {}
+        placeholders = ",".join("?" * len(job_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, status, result, error FROM jobs "
+                f"WHERE id IN ({placeholders}) AND status IN ('done', 'failed')",
+                job_ids,
+            ).fetchall()
+        return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+    def delete(self, job_ids):
+        """Remove jobs whose results have been consumed."""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        with self._lock:
+            self._conn.execute(f"DELETE FROM jobs WHERE id IN ({','.join('?' * len(job_ids))})", job_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status and the age of the oldest queued job."""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest = self._conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        return {
+            "by_status": counts,
+            "oldest_queued_age_s": time.time() - oldest if oldest is not None else 0.0,
+        }
+
+    def close(self):
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class QueueClient:
+    """
+    API-side handle on the durable queue: enqueue work and await its result.
+
+    A single watcher task serves every waiter. It checks SQLite's
+    `data_version`, which changes whenever a worker commits, and only then
+    looks up which awaited jobs finished, so idle polling costs no queries.
+    Every `purge_interval` seconds it also deletes finished jobs older than
+    `timeout`, whose results nobody can collect any more.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        notify_interval: float | None = None,
+        timeout: float | None = None,
+        purge_interval: float | None = None,
+    ):
+        self.path = path or QUEUE_SQLITE_PATH
+        self.notify_interval = float(notify_interval if notify_interval is not None else QUEUE_NOTIFY_INTERVAL)
+        self.timeout = float(timeout if timeout is not None else QUEUE_RESULT_TIMEOUT)
+        self.purge_interval = float(purge_interval if purge_interval is not None else QUEUE_PURGE_INTERVAL)
+        self.queue: DurableQueue | None = None
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._watcher: asyncio.Task | None = None
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.purged = 0
+
+    async def start(self):
+        """Open the queue database and start the completion watcher."""
+        if self.queue is None:
+            self.queue = await asyncio.to_thread(DurableQueue, self.path)
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def close(self):
+        """Stop the watcher and close the database."""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+        for future in self._waiters.values():
+            future.cancel()
+        self._waiters.clear()
+        if self.queue is not None:
+            await asyncio.to_thread(self.queue.close)
+            self.queue = None
+
+    async def submit(self, payload: Dict[str, Any]) -> str:
+        """
+        Enqueue a generation and wait for a worker to finish it.
+
+        Args:
+            payload: Job payload (model, prompt, options)
+
+        Returns:
+            The generated text
+
+        If it times out or the caller is cancelled, the job is cancelled
+        too, so no worker spends a generation on it.
+
+        Raises:
+            RuntimeError: If the job failed or the queue is not started
+            TimeoutError: If no worker finished it within `timeout`
+        """
+        if self.queue is None:
+            raise RuntimeError("Durable queue is not started")
+        job_id = await asyncio.to_thread(self.queue.enqueue, payload)
+        self.enqueued += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[job_id] = future
+        try:
+            status, result, error = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            await self._abandon(job_id)
+            raise TimeoutError(f"No worker finished job {job_id} within {self.timeout:.0f}s")
+        except asyncio.CancelledError:
+            await self._abandon(job_id)
+            raise
+        finally:
+            self._waiters.pop(job_id, None)
+        if status != "done":
+            self.failed += 1
+            raise RuntimeError(f"Queued job failed: {error}")
+        self.completed += 1
+        return result
+
+    async def _abandon(self, job_id: str):
+        """Cancel a job whose result will not be collected."""
+        queue = self.queue
+        if queue is None:
+            return
+        try:
+            if await asyncio.to_thread(queue.cancel, job_id):
+                self.cancelled += 1
+        except sqlite3.Error as e:
+            logger.warning("Cancelling queued job %s failed: %s", job_id, e)
+
+    async def _watch(self):
+        version = None
+        next_purge = time.monotonic() + self.purge_interval
+        while True:
+            await asyncio.sleep(self.notify_interval)
+            if time.monotonic() >= next_purge:
+                next_purge = time.monotonic() + self.purge_interval
+                try:
+                    self.purged += await asyncio.to_thread(self.queue.purge, self.timeout)
+                except Exception as e:
+                    logger.error("Queue purge failed: %s", e)
+            if not self._waiters:
+                continue
+            try:
+                current = await asyncio.to_thread(self.queue.data_version)
+                if current == version:
+                    continue
+                version = current
+                done = await asyncio.to_thread(self.queue.finished, list(self._waiters))
+                # Delete before waking the waiters, so a returned result
+                # leaves no row behind; a failed delete is left to the purge
+                try:
+                    await asyncio.to_thread(self.queue.delete, done)
+                except sqlite3.Error as e:
+                    logger.warning("Deleting finished queue jobs failed: %s", e)
+                for job_id, outcome in done.items():
+                    future = self._waiters.get(job_id)
+                    if future is not None and not future.done():
+                        future.set_result(outcome)
+            except Exception as e:
+                logger.error("Queue watcher failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Client counters plus the queue's own counts."""
+        snapshot = {
+            "waiting": len(self._waiters),
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "purged": self.purged,
+        }
+        if self.queue is not None:
+            snapshot.update(self.queue.stats())
+        return snapshot
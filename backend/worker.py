@@ -0,0 +1,172 @@
+"""
+Generation worker processes for the durable work queue.
+
+Each process claims jobs from the SQLite queue, runs them against Ollama
+through its own `OllamaService` and stores the result for the API process:
+
+    python run_workers.py --workers 2 --concurrency 4
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any, Dict, List
+import httpx
+from .ollama_client import OllamaService
+from .work_queue import DurableQueue
+from config import (
+    OLLAMA_NODES,
+    QUEUE_SQLITE_PATH,
+    QUEUE_WORKERS,
+    QUEUE_WORKER_CONCURRENCY,
+    QUEUE_LEASE_SECONDS,
+    QUEUE_MAX_ATTEMPTS,
+    QUEUE_NOTIFY_INTERVAL,
+    LOG_LEVEL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _keep_leased(queue: DurableQueue, job_id: str, worker_id: str, job: asyncio.Task):
+    """
+    Renew a job's lease while it is being generated.
+
+    If the lease is lost (the job was cancelled, or expired and handed to
+    another worker), `job` is cancelled, which aborts its generation.
+    """
+    while True:
+        await asyncio.sleep(QUEUE_LEASE_SECONDS / 3)
+        if not await asyncio.to_thread(queue.renew, job_id, worker_id):
+            logger.warning("Lost the lease on job %s, stopping it", job_id)
+            job.cancel()
+            return
+
+
+async def _process(queue: DurableQueue, service: OllamaService, worker_id: str, job_id: str, payload: Dict[str, Any], attempt: int):
+    """Run one claimed job and record its outcome."""
+    renewer = asyncio.create_task(_keep_leased(queue, job_id, worker_id, asyncio.current_task()))
+    try:
+        text = await service.generate_response(
+            prompt=payload["prompt"],
+            model=payload["model"],
+            options=payload.get("options"),
+        )
+        await asyncio.to_thread(queue.complete, job_id, worker_id, text)
+    except httpx.HTTPError as e:
+        # Upstream trouble is worth another attempt, possibly on another worker
+        if attempt < QUEUE_MAX_ATTEMPTS:
+            logger.warning("Job %s failed on attempt %d, requeueing: %s", job_id, attempt, e)
+            await asyncio.to_thread(queue.release, job_id, worker_id)
+        else:
+            await asyncio.to_thread(queue.fail, job_id, worker_id, str(e))
+    except Exception as e:
+        logger.error("Job %s failed: %s", job_id, e)
+        await asyncio.to_thread(queue.fail, job_id, worker_id, str(e))
+    finally:
+        renewer.cancel()
+
+
+async def _wait_for_work(queue: DurableQueue):
+    """
+    Sleep until another connection commits (e.g. a new job) or a lease could
+    have expired, polling the cheap `data_version` pragma instead of the table.
+    """
+    version = await asyncio.to_thread(queue.data_version)
+    deadline = time.monotonic() + QUEUE_LEASE_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(QUEUE_NOTIFY_INTERVAL)
+        if await asyncio.to_thread(queue.data_version) != version:
+            return
+
+
+async def run_worker(
+    queue_path: str | None = None,
+    nodes: List[str] | None = None,
+    concurrency: int | None = None,
+    worker_id: str | None = None,
+):
+    """
+    Claim and run jobs until cancelled.
+
+    Args:
+        queue_path: SQLite queue database
+        nodes: Ollama node URLs
+        concurrency: Jobs run at once by this worker
+        worker_id: Lease owner name; defaults to host and PID
+    """
+    queue = DurableQueue(queue_path or QUEUE_SQLITE_PATH)
+    service = OllamaService(nodes=nodes or OLLAMA_NODES)
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    slots = asyncio.Semaphore(concurrency or QUEUE_WORKER_CONCURRENCY)
+    tasks = set()
+    await service.start()
+    logger.info("Worker %s started", worker_id)
+    try:
+        while True:
+            await slots.acquire()
+            claimed = await asyncio.to_thread(queue.claim, worker_id)
+            if claimed is None:
+                slots.release()
+                await _wait_for_work(queue)
+                continue
+            task = asyncio.create_task(_process(queue, service, worker_id, *claimed))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+    finally:
+        # Unfinished jobs keep their lease until it expires, then get retried
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await service.close()
+        queue.close()
+
+
+def _worker_main(queue_path: str, nodes: List[str], concurrency: int):
+    logging.basicConfig(level=LOG_LEVEL)
+    try:
+        asyncio.run(run_worker(queue_path, nodes, concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    """Start a pool of worker processes from the command line."""
+    parser = argparse.ArgumentParser(description="Run generation workers for the durable queue")
+    parser.add_argument("--workers", type=int, default=QUEUE_WORKERS)
+    parser.add_argument("--concurrency", type=int, default=QUEUE_WORKER_CONCURRENCY, help="jobs per worker")
+    parser.add_argument("--db", default=QUEUE_SQLITE_PATH)
+    parser.add_argument("--nodes", nargs="+", default=OLLAMA_NODES, help="Ollama node URLs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=LOG_LEVEL)
+    # Create the schema once before the workers race to open the database
+    DurableQueue(args.db).close()
+    processes = [
+        multiprocessing.Process(target=_worker_main, args=(args.db, args.nodes, args.concurrency), daemon=True)
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    # Stop the pool on SIGTERM as on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
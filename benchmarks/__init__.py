@@ -0,0 +1 @@
+# Benchmarks and test doubles for the AI Assistant backend
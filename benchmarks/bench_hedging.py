@@ -0,0 +1,147 @@
+"""
+Benchmark hedged requests against two fake Ollama nodes, one of which stalls.
+
+Starts two `benchmarks.fake_ollama` servers; the first delays the first
+token of `--stall-rate` of its requests by `--stall-time`. Streams are sent
+through `OllamaService` directly, once without and once with hedging, and
+time-to-first-token percentiles plus the share of hedged requests are
+reported:
+
+    python -m benchmarks.bench_hedging --requests 400 --concurrency 8 --stall-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import git_commit, percentiles, wait_until_up  # noqa: E402
+from backend.hedging import HedgePolicy  # noqa: E402
+from backend.ollama_client import OllamaService  # noqa: E402
+
+
+def start_node(args: argparse.Namespace, port: int, stall_rate: float, seed: int) -> subprocess.Popen:
+    """Launch one fake Ollama node."""
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_ollama",
+            "--port", str(port),
+            "--ttft", str(args.ttft),
+            "--tokens-per-sec", str(args.tokens_per_sec),
+            "--num-tokens", str(args.num_tokens),
+            "--stall-rate", str(stall_rate),
+            "--stall-time", str(args.stall_time),
+            "--seed", str(seed),
+        ],
+        cwd=ROOT,
+    )
+    wait_until_up(f"http://127.0.0.1:{port}/api/ps")
+    return process
+
+
+async def run_phase(urls: List[str], hedging: bool, args: argparse.Namespace) -> Dict[str, Any]:
+    """Stream `--requests` generations at `--concurrency` and time their first tokens."""
+    policy = HedgePolicy(enabled=hedging, percentile=args.percentile, budget=args.budget)
+    service = OllamaService(nodes=urls, hedging=policy)
+    await service.start()
+    ttfts: List[float] = []
+    latencies: List[float] = []
+    counter = iter(range(args.requests))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            first = None
+            async for _ in service.stream_response(f"hedging benchmark {i}", "llama3.2:3b"):
+                if first is None:
+                    first = time.perf_counter() - started
+            ttfts.append(first)
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await service.close()
+    stats = policy.stats()
+    return {
+        "phase": "hedged" if hedging else "baseline",
+        "requests": args.requests,
+        "elapsed_s": elapsed,
+        "ttft_ms": percentiles(ttfts),
+        "latency_ms": percentiles(latencies),
+        "hedged": stats["hedged"],
+        "hedge_ratio": stats["hedge_ratio"],
+        "hedge_wins": stats["hedge_wins"],
+        "denied": stats["denied"],
+    }
+
+
+def main():
+    """Run the hedging benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark hedged requests against two fake Ollama nodes")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ttft", type=float, default=0.02)
+    parser.add_argument("--tokens-per-sec", type=float, default=1000.0)
+    parser.add_argument("--num-tokens", type=int, default=32)
+    parser.add_argument("--stall-rate", type=float, default=0.05, help="stall rate of the first node")
+    parser.add_argument("--stall-time", type=float, default=1.0)
+    parser.add_argument("--percentile", type=float, default=95)
+    parser.add_argument("--budget", type=float, default=0.05)
+    parser.add_argument("--ollama-port", type=int, default=11500, help="first node; the second uses the next port")
+    parser.add_argument("--output", default="bench_hedging_results.json")
+    args = parser.parse_args()
+
+    ports = [args.ollama_port, args.ollama_port + 1]
+    nodes = [start_node(args, ports[0], args.stall_rate, 0), start_node(args, ports[1], 0.0, 1)]
+    urls = [f"http://127.0.0.1:{port}" for port in ports]
+    try:
+        results = [asyncio.run(run_phase(urls, hedging, args)) for hedging in (False, True)]
+        for result in results:
+            ttft = result["ttft_ms"]
+            print(
+                f"{result['phase']:<9} ttft p50={ttft['p50']:7.1f}ms p95={ttft['p95']:7.1f}ms "
+                f"p99={ttft['p99']:7.1f}ms max={ttft['max']:7.1f}ms  "
+                f"hedged={result['hedged']} ({result['hedge_ratio']:.1%}) wins={result['hedge_wins']}"
+            )
+    finally:
+        for node in nodes:
+            node.terminate()
+            node.wait(timeout=10)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "percentile": args.percentile,
+            "budget": args.budget,
+            "fake_ollama": {
+                "ttft": args.ttft,
+                "tokens_per_sec": args.tokens_per_sec,
+                "num_tokens": args.num_tokens,
+                "stall_rate": args.stall_rate,
+                "stall_time": args.stall_time,
+            },
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark the logging overhead of the backend request path.
+
+Emits the log lines of one `/generate` request many times and times what
+the handler pays per request, for two setups writing to a sink that takes
+`--sink-latency-ms` per write (a slow disk or log shipper):
+
+- `sync`: the old setup, f-strings through a `StreamHandler` on the caller
+- `queued`: `BackgroundLogging`, with lazy arguments, sampling and a
+  writer thread
+
+    python -m benchmarks.bench_logging --requests 2000 --sink-latency-ms 0 1
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import git_commit, percentiles  # noqa: E402
+from backend import timing  # noqa: E402
+from backend.log_setup import BackgroundLogging  # noqa: E402
+
+PROMPT = "Explain the difference between a process and a thread, with examples. " * 4
+MODEL = "llama3.2:3b"
+REASON = "thinking disabled; using requested model"
+
+
+class SlowSink:
+    """Text stream whose writes take `latency` seconds."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.writes = 0
+
+    def write(self, text: str):
+        self.writes += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def flush(self):
+        pass
+
+
+def sync_request(logger: logging.Logger, response: str):
+    """The request's log lines as `backend.main` wrote them before."""
+    logger.info(f"Generating response with model: {MODEL} ({REASON})")
+    logger.info(f"Prompt: {PROMPT[:100]}...")
+    logger.info(f"Generated response length: {len(response)}")
+
+
+def queued_request(logger: logging.Logger, response: str):
+    """The request's log lines as `backend.main` writes them now, timing line included."""
+    with timing.timed(timing.RequestTimer(uuid.uuid4().hex, "/generate")) as timer:
+        logger.info("Generating response with model: %s (%s)", MODEL, REASON)
+        logger.info("Prompt: %.100s...", PROMPT)
+        logger.info("Generated response length: %d", len(response))
+        timer.mark("serialize")
+        timer.log(status=200)
+
+
+def run(emit: Callable[[logging.Logger, str], None], requests: int) -> List[float]:
+    """Per-request time spent in `emit`."""
+    logger = logging.getLogger("backend.main")
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        emit(logger, "x" * 512)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_sync(requests: int, latency: float) -> Dict[str, Any]:
+    sink = SlowSink(latency)
+    root = logging.getLogger()
+    handler = logging.StreamHandler(sink)
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+    samples = run(sync_request, requests)
+    root.removeHandler(handler)
+    return {"setup": "sync", "per_request_ms": percentiles(samples), "writes": sink.writes}
+
+
+def bench_queued(requests: int, latency: float, sample_rate: float) -> Dict[str, Any]:
+    sink = SlowSink(latency)
+    background = BackgroundLogging(level="INFO", sample_rates={"INFO": sample_rate}, stream=sink)
+    background.start()
+    samples = run(queued_request, requests)
+    stats = background.stats()
+    started = time.perf_counter()
+    background.stop()
+    drain_s = time.perf_counter() - started
+    return {
+        "setup": "queued",
+        "per_request_ms": percentiles(samples),
+        "writes": sink.writes,
+        "drain_s": drain_s,
+        **stats,
+    }
+
+
+def main():
+    """Run the logging benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark request-path logging overhead")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sink-latency-ms", type=float, nargs="+", default=[0.0, 1.0])
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="INFO sample rate for the queued setup")
+    parser.add_argument("--output", default="bench_logging_results.json")
+    args = parser.parse_args()
+
+    results = []
+    for latency_ms in args.sink_latency_ms:
+        for result in (
+            bench_sync(args.requests, latency_ms / 1000),
+            bench_queued(args.requests, latency_ms / 1000, args.sample_rate),
+        ):
+            result["sink_latency_ms"] = latency_ms
+            results.append(result)
+            overhead = result["per_request_ms"]
+            print(
+                f"sink={latency_ms:5.1f}ms {result['setup']:<7} per request p50={overhead['p50']:7.3f}ms "
+                f"p99={overhead['p99']:7.3f}ms max={overhead['max']:8.3f}ms  writes={result['writes']}"
+            )
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "requests": args.requests,
+            "sample_rate": args.sample_rate,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmark the durable work queue against the fake Ollama server.
+
+Starts `benchmarks.fake_ollama` and a pool of `backend.worker` processes on a
+scratch queue database, then measures:
+
+- burst: enqueue `--jobs` at once and time how fast the workers drain them
+  (throughput) and how long each job waited to be claimed under backlog;
+- trickle: enqueue jobs one at a time on idle workers, which isolates the
+  claim (notification) latency.
+
+    python -m benchmarks.bench_queue --workers 2 --concurrency 4 --jobs 500
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import git_commit, percentiles, start_fake_ollama  # noqa: E402
+from backend.work_queue import DurableQueue  # noqa: E402
+
+
+def wait_finished(queue: DurableQueue, job_ids: List[str], timeout: float) -> float:
+    """Block until every job is done or failed; returns the time it finished."""
+    pending = set(job_ids)
+    deadline = time.monotonic() + timeout
+    version = None
+    while pending:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{len(pending)} jobs still unfinished after {timeout}s")
+        current = queue.data_version()
+        if current != version:
+            version = current
+            pending -= set(queue.finished(pending))
+        if pending:
+            time.sleep(0.002)
+    return time.time()
+
+
+def job_timings(path: str, job_ids: List[str]) -> Dict[str, Any]:
+    """Claim and end-to-end latency percentiles of finished jobs, from the queue table."""
+    conn = sqlite3.connect(path)
+    try:
+        placeholders = ",".join("?" * len(job_ids))
+        rows = conn.execute(
+            f"SELECT claimed_at - created_at, finished_at - created_at, status, attempts FROM jobs WHERE id IN ({placeholders})",
+            job_ids,
+        ).fetchall()
+    finally:
+        conn.close()
+    return {
+        "claim_latency_ms": percentiles([row[0] for row in rows if row[0] is not None]),
+        "end_to_end_ms": percentiles([row[1] for row in rows if row[1] is not None]),
+        "failed": sum(1 for row in rows if row[2] != "done"),
+        "retried": sum(1 for row in rows if row[3] > 1),
+    }
+
+
+def run_burst(queue: DurableQueue, path: str, count: int, timeout: float) -> Dict[str, Any]:
+    """Enqueue `count` jobs at once and measure the drain."""
+    started = time.time()
+    job_ids = [queue.enqueue({"model": "llama3.2:3b", "prompt": f"burst job {i}"}) for i in range(count)]
+    enqueued = time.time()
+    finished = wait_finished(queue, job_ids, timeout)
+    return {
+        "phase": "burst",
+        "jobs": count,
+        "enqueue_rate_per_s": count / (enqueued - started) if enqueued > started else 0.0,
+        "elapsed_s": finished - started,
+        "throughput_per_s": count / (finished - started),
+        **job_timings(path, job_ids),
+    }
+
+
+def run_trickle(queue: DurableQueue, path: str, count: int, timeout: float) -> Dict[str, Any]:
+    """Enqueue jobs one at a time, waiting for each, so workers are idle at every enqueue."""
+    job_ids = []
+    for i in range(count):
+        job_id = queue.enqueue({"model": "llama3.2:3b", "prompt": f"trickle job {i}"})
+        wait_finished(queue, [job_id], timeout)
+        job_ids.append(job_id)
+    return {"phase": "trickle", "jobs": count, **job_timings(path, job_ids)}
+
+
+def main():
+    """Run the queue benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the durable work queue against a fake Ollama")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=4, help="jobs per worker")
+    parser.add_argument("--jobs", type=int, default=500, help="jobs in the burst phase")
+    parser.add_argument("--trickle", type=int, default=50, help="jobs in the trickle phase")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--ttft", type=float, default=0.02)
+    parser.add_argument("--tokens-per-sec", type=float, default=1000.0)
+    parser.add_argument("--num-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ollama-port", type=int, default=11500)
+    parser.add_argument("--output", default="bench_queue_results.json")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="bench_queue_")
+    path = os.path.join(scratch, "queue.sqlite3")
+    queue = DurableQueue(path)
+    fake = start_fake_ollama(args)
+    workers = subprocess.Popen(
+        [
+            sys.executable, "-m", "backend.worker",
+            "--workers", str(args.workers),
+            "--concurrency", str(args.concurrency),
+            "--db", path,
+            "--nodes", f"http://127.0.0.1:{args.ollama_port}",
+        ],
+        cwd=ROOT,
+    )
+    try:
+        # Let the workers connect before timing anything
+        warmup = [queue.enqueue({"model": "llama3.2:3b", "prompt": "warm up"}) for _ in range(args.workers)]
+        wait_finished(queue, warmup, args.timeout)
+
+        results = [run_burst(queue, path, args.jobs, args.timeout)]
+        if args.trickle:
+            results.append(run_trickle(queue, path, args.trickle, args.timeout))
+        for result in results:
+            claim = result["claim_latency_ms"]
+            e2e = result["end_to_end_ms"]
+            rate = f"{result['throughput_per_s']:8.1f} jobs/s  " if "throughput_per_s" in result else " " * 18
+            print(
+                f"{result['phase']:<8} n={result['jobs']:<5} {rate}"
+                f"claim p50={claim.get('p50', 0):6.1f}ms p99={claim.get('p99', 0):7.1f}ms  "
+                f"e2e p50={e2e.get('p50', 0):7.1f}ms p99={e2e.get('p99', 0):7.1f}ms failed={result['failed']}"
+            )
+    finally:
+        workers.terminate()
+        workers.wait(timeout=10)
+        fake.terminate()
+        fake.wait(timeout=10)
+        queue.close()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "fake_ollama": {
+                "ttft": args.ttft,
+                "tokens_per_sec": args.tokens_per_sec,
+                "num_tokens": args.num_tokens,
+                "error_rate": args.error_rate,
+                "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark the semantic cache's embedding index.
+
+Fills an `EmbeddingIndex` with random unit-length embeddings and times the
+batched cosine-similarity scan for several batch sizes, then saves the
+index to a memory-mapped `.npy` file and times reloading it.
+
+The entry count defaults to `SEMANTIC_CACHE_CAPACITY` and the embedding
+size to that of `SEMANTIC_CACHE_EMBED_MODEL`:
+
+    python -m benchmarks.bench_semantic_cache --entries 4096 --batch 1 8 32
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fake_ollama import EMBEDDING_DIMS  # noqa: E402
+from benchmarks.run_benchmarks import git_commit, percentiles  # noqa: E402
+from backend.semantic_cache import EmbeddingIndex  # noqa: E402
+from config import SEMANTIC_CACHE_CAPACITY, SEMANTIC_CACHE_EMBED_MODEL  # noqa: E402
+
+
+def unit_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def fill(index: EmbeddingIndex, vectors: np.ndarray, partitions: int):
+    expires_at = time.time() + 3600
+    for row, vector in enumerate(vectors):
+        index.add(row % partitions, vector, f"answer {row}", expires_at)
+
+
+def time_search(index: EmbeddingIndex, rng: np.random.Generator, batch: int, rounds: int, partitions: int) -> Dict[str, Any]:
+    """Scan latency for `rounds` batches of `batch` queries."""
+    samples = []
+    for _ in range(rounds):
+        queries = unit_vectors(rng, batch, index.dim)
+        codes = rng.integers(0, partitions, batch).astype(np.int32)
+        started = time.perf_counter()
+        index.search(queries, codes)
+        samples.append(time.perf_counter() - started)
+    scan = percentiles(samples)
+    return {"batch": batch, "scan_ms": scan, "per_query_ms": scan["p50"] / batch}
+
+
+def main():
+    """Run the semantic cache benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the semantic cache embedding index")
+    parser.add_argument("--entries", type=int, default=SEMANTIC_CACHE_CAPACITY)
+    parser.add_argument(
+        "--dim", type=int, default=EMBEDDING_DIMS.get(SEMANTIC_CACHE_EMBED_MODEL.split(":")[0], 768),
+        help="embedding size (default: that of SEMANTIC_CACHE_EMBED_MODEL)",
+    )
+    parser.add_argument("--partitions", type=int, default=2, help="models/options sharing the index")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_semantic_cache_results.json")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    scratch = tempfile.mkdtemp(prefix="bench_semantic_")
+    path = os.path.join(scratch, "index.npy")
+
+    index = EmbeddingIndex(args.entries, path)
+    started = time.perf_counter()
+    fill(index, unit_vectors(rng, args.entries, args.dim), args.partitions)
+    fill_s = time.perf_counter() - started
+
+    results = []
+    for batch in args.batch:
+        result = time_search(index, rng, batch, args.rounds, args.partitions)
+        results.append(result)
+        scan = result["scan_ms"]
+        print(
+            f"batch={batch:<4} scan p50={scan['p50']:7.2f}ms p99={scan['p99']:7.2f}ms  "
+            f"per query={result['per_query_ms']:6.3f}ms"
+        )
+
+    started = time.perf_counter()
+    index.save()
+    save_s = time.perf_counter() - started
+    started = time.perf_counter()
+    reloaded = EmbeddingIndex(args.entries, path)
+    load_s = time.perf_counter() - started
+    first = time_search(reloaded, rng, 1, 1, args.partitions)["scan_ms"]["p50"]
+    print(f"fill {fill_s:.2f}s  save {save_s:.2f}s  reload {load_s:.2f}s  first scan after reload {first:.2f}ms")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpus": os.cpu_count(),
+            "entries": args.entries,
+            "dim": args.dim,
+            "partitions": args.partitions,
+        },
+        "results": results,
+        "fill_s": fill_s,
+        "save_s": save_s,
+        "reload_s": load_s,
+        "first_scan_after_reload_ms": first,
+    }
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
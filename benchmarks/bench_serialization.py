@@ -0,0 +1,186 @@
+"""
+Benchmark the JSON work the backend does per request for a long answer.
+
+Times each serialization step of a thinking-mode request, the way the
+backend used to do it (stdlib `json`, FastAPI's response validation,
+`aiter_lines`) and the way it does now (orjson, prebuilt payload bytes,
+`NDJSONDecoder` on the byte stream):
+
+- `payload`: encoding the upstream Ollama request
+- `ndjson`: parsing Ollama's streamed NDJSON, delivered in `--chunk-bytes` reads
+- `body`: parsing a non-streamed Ollama response
+- `response`: serializing the `/generate` response
+- `sse`: encoding the SSE frames of `/generate/stream`
+
+    python -m benchmarks.bench_serialization --tokens 4000 --chunk-bytes 4096
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import httpx
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run_benchmarks import git_commit, percentiles  # noqa: E402
+from backend.models import GenerateResponse, OllamaRequest, RoutingDecision  # noqa: E402
+from backend.ndjson import iter_ndjson  # noqa: E402
+from backend.ollama_client import _encode  # noqa: E402
+
+MODEL = "qwen3:8b"
+PROMPT = "Walk through the proof step by step and check each case. " * 20
+
+
+def ollama_chunks(tokens: int) -> List[Dict[str, Any]]:
+    """Streamed `/api/generate` chunks of a thinking-mode answer, `done` chunk last."""
+    chunks = [
+        {"model": MODEL, "created_at": "2026-01-01T00:00:00Z", "response": "", "thinking": f" step{i}", "done": False}
+        for i in range(tokens // 2)
+    ]
+    chunks += [
+        {"model": MODEL, "created_at": "2026-01-01T00:00:00Z", "response": f" word{i}", "done": False}
+        for i in range(tokens - tokens // 2)
+    ]
+    chunks.append({
+        "model": MODEL, "done": True, "eval_count": tokens, "eval_duration": 10**10,
+        "prompt_eval_duration": 10**8, "load_duration": 0, "total_duration": 10**10 + 10**8,
+    })
+    return chunks
+
+
+def split(data: bytes, size: int) -> List[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def response_from(reads: List[bytes]) -> httpx.Response:
+    async def body():
+        for read in reads:
+            yield read
+
+    return httpx.Response(200, content=body())
+
+
+async def parse_lines(reads: List[bytes]) -> int:
+    count = 0
+    async for line in response_from(reads).aiter_lines():
+        if line:
+            json.loads(line)
+            count += 1
+    return count
+
+
+async def parse_bytes(reads: List[bytes]) -> int:
+    count = 0
+    async for _ in iter_ndjson(response_from(reads).aiter_bytes()):
+        count += 1
+    return count
+
+
+def time_each(fn: Callable[[], Any], rounds: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def main():
+    """Run the serialization benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark per-request JSON serialization and parsing")
+    parser.add_argument("--tokens", type=int, default=4000, help="tokens in the answer")
+    parser.add_argument("--chunk-bytes", type=int, default=4096, help="bytes per read of the upstream stream")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--output", default="bench_serialization_results.json")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    chunks = ollama_chunks(args.tokens)
+    stream_bytes = b"".join(json.dumps(chunk).encode() + b"\n" for chunk in chunks)
+    reads = split(stream_bytes, args.chunk_bytes)
+    answer = "".join(chunk.get("response", "") for chunk in chunks)
+    body = json.dumps({**chunks[-1], "response": answer, "thinking": "".join(c.get("thinking", "") for c in chunks)}).encode()
+    request = OllamaRequest(model=MODEL, prompt=PROMPT, stream=True, options={"temperature": 0.6}, keep_alive="30m")
+    result = GenerateResponse(
+        response=answer,
+        routing=RoutingDecision(
+            model=MODEL, requested_model=MODEL, rule="thinking", reason="thinking mode", prompt_tokens=len(PROMPT) // 4,
+        ),
+    )
+    field = create_response_field(name="response", type_=GenerateResponse)
+    tokens = [{"token": chunk.get("response", ""), "thinking": chunk["thinking"]} if chunk.get("thinking")
+              else {"token": chunk.get("response", "")} for chunk in chunks[:-1]]
+
+    def fastapi_response(response_class) -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=result, is_coroutine=True))
+        return response_class(content).body
+
+    steps = {
+        "payload": (
+            lambda: json.dumps(request.model_dump(exclude_none=True)).encode(),
+            lambda: _encode(request),
+        ),
+        "ndjson": (
+            lambda: loop.run_until_complete(parse_lines(reads)),
+            lambda: loop.run_until_complete(parse_bytes(reads)),
+        ),
+        "body": (
+            lambda: json.loads(body.decode()),
+            lambda: orjson.loads(body),
+        ),
+        "response": (
+            lambda: fastapi_response(JSONResponse),
+            lambda: ORJSONResponse(result.model_dump()).body,
+        ),
+        "sse": (
+            lambda: [f"data: {json.dumps(token)}\n\n" for token in tokens],
+            lambda: [f"data: {orjson.dumps(token).decode()}\n\n" for token in tokens],
+        ),
+    }
+
+    results = []
+    totals = {"before": 0.0, "after": 0.0}
+    for step, (before, after) in steps.items():
+        timings = {"before": time_each(before, args.rounds), "after": time_each(after, args.rounds)}
+        for setup in totals:
+            totals[setup] += timings[setup]["p50"]
+        results.append({"step": step, **timings})
+        print(
+            f"{step:<9} before p50={timings['before']['p50']:8.3f}ms  after p50={timings['after']['p50']:8.3f}ms  "
+            f"x{timings['before']['p50'] / max(timings['after']['p50'], 1e-9):5.1f}"
+        )
+    print(f"{'total':<9} before p50={totals['before']:8.3f}ms  after p50={totals['after']:8.3f}ms")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "orjson": orjson.__version__,
+            "cpus": os.cpu_count(),
+            "tokens": args.tokens,
+            "chunk_bytes": args.chunk_bytes,
+            "stream_bytes": len(stream_bytes),
+        },
+        "results": results,
+        "total_p50_ms": totals,
+    }
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Deterministic fake Ollama server for benchmarks.
+
+Implements `/api/generate` (streaming and non-streaming), `/api/chat`,
+`/api/embed` and `/api/ps` with a configurable time to first token, decode speed, error rate
+and occasional stalls before the first token, so backend overhead can be
+measured without a GPU:
+
+    python -m benchmarks.fake_ollama --port 11500 --ttft 0.05 --tokens-per-sec 200
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+# Embedding size of common Ollama embedding models; unknown models get 768
+EMBEDDING_DIMS = {"nomic-embed-text": 768, "mxbai-embed-large": 1024, "all-minilm": 384}
+
+_WORDS = ("the", "model", "answers", "with", "a", "steady", "stream", "of", "tokens", "for", "benchmarking")
+
+
+class FakeOllamaSettings(BaseModel):
+    """Behaviour knobs for the fake server."""
+    ttft: float = 0.05
+    tokens_per_sec: float = 200.0
+    num_tokens: int = 64
+    error_rate: float = 0.0
+    load_time: float = 0.0
+    stall_rate: float = 0.0
+    stall_time: float = 0.0
+    embedding_dim: int | None = None  # None: the requested model's size from EMBEDDING_DIMS
+    seed: int = 0
+
+
+def _tokens(count: int) -> List[str]:
+    return [(" " if i else "") + _WORDS[i % len(_WORDS)] for i in range(count)]
+
+
+def _embedding(text: str, dim: int) -> List[float]:
+    """Hashed bag of words: texts sharing most words get a high cosine similarity."""
+    vector = [0.0] * dim
+    for word in text.lower().split():
+        digest = hashlib.blake2b(word.strip("?.,!").encode("utf-8"), digest_size=8).digest()
+        vector[int.from_bytes(digest[:4], "little") % dim] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def create_app(settings: FakeOllamaSettings | None = None) -> FastAPI:
+    """
+    Build the fake Ollama ASGI app.
+
+    Args:
+        settings: Timing and error behaviour; defaults to `FakeOllamaSettings()`
+
+    Returns:
+        FastAPI application
+    """
+    settings = settings or FakeOllamaSettings()
+    app = FastAPI(title="Fake Ollama")
+    rng = random.Random(settings.seed)
+    loaded: Dict[str, float] = {}
+    # Last chat transcript per model, to report prefix-cache reuse like Ollama
+    chat_prefix: Dict[str, List[str]] = {}
+    tokens = _tokens(settings.num_tokens)
+    token_interval = 1.0 / settings.tokens_per_sec if settings.tokens_per_sec > 0 else 0.0
+
+    async def load(model: str) -> float:
+        if model in loaded or settings.load_time <= 0:
+            loaded.setdefault(model, time.time())
+            return 0.0
+        await asyncio.sleep(settings.load_time)
+        loaded[model] = time.time()
+        return settings.load_time
+
+    def timings(prompt_tokens: int, load_duration: float, started: float) -> Dict[str, Any]:
+        eval_duration = settings.num_tokens * token_interval
+        return {
+            "done": True,
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "load_duration": int(load_duration * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(settings.ttft * 1e9),
+            "eval_count": settings.num_tokens,
+            "eval_duration": int(eval_duration * 1e9),
+        }
+
+    async def produce(body: Dict[str, Any], prompt_tokens: int, wrap) -> Any:
+        started = time.perf_counter()
+        model = body.get("model", "")
+        if settings.error_rate and rng.random() < settings.error_rate:
+            return JSONResponse(status_code=500, content={"error": "fake upstream failure"})
+
+        load_duration = await load(model)
+        # A stalled request (model swap, GC pause, throttling) starts late
+        ttft = settings.ttft
+        if settings.stall_rate and rng.random() < settings.stall_rate:
+            ttft += settings.stall_time
+        if body.get("stream", True):
+            async def chunks() -> AsyncIterator[bytes]:
+                await asyncio.sleep(ttft)
+                for i, token in enumerate(tokens):
+                    if i:
+                        await asyncio.sleep(token_interval)
+                    yield (json.dumps({"model": model, **wrap(token), "done": False}) + "\n").encode()
+                yield (json.dumps({"model": model, **wrap(""), **timings(prompt_tokens, load_duration, started)}) + "\n").encode()
+
+            return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+        await asyncio.sleep(ttft + max(settings.num_tokens - 1, 0) * token_interval)
+        return {"model": model, **wrap("".join(tokens)), **timings(prompt_tokens, load_duration, started)}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        prompt = body.get("prompt", "")
+        if not prompt:
+            # Ollama loads the model and returns immediately for an empty prompt
+            load_duration = await load(body.get("model", ""))
+            return {"model": body.get("model"), "response": "", "done": True, "load_duration": int(load_duration * 1e9)}
+        return await produce(body, len(prompt.split()), lambda text: {"response": text})
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        words = [word for m in body.get("messages", []) for word in str(m.get("content", "")).split()]
+        previous = chat_prefix.get(body.get("model", ""), [])
+        cached = 0
+        while cached < min(len(words), len(previous)) and words[cached] == previous[cached]:
+            cached += 1
+        chat_prefix[body.get("model", "")] = words
+        # Only tokens past the cached prefix need prefill
+        prompt_tokens = len(words) - cached
+        return await produce(body, prompt_tokens, lambda text: {"message": {"role": "assistant", "content": text}})
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        body = await request.json()
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        dim = settings.embedding_dim or EMBEDDING_DIMS.get(body.get("model", "").split(":")[0], 768)
+        return {
+            "model": body.get("model"),
+            "embeddings": [_embedding(text, dim) for text in texts],
+            "prompt_eval_count": sum(len(text.split()) for text in texts),
+        }
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": model, "model": model} for model in loaded]}
+
+    return app
+
+
+def main():
+    """Run the fake server from the command line."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Deterministic fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--ttft", type=float, default=FakeOllamaSettings().ttft)
+    parser.add_argument("--tokens-per-sec", type=float, default=FakeOllamaSettings().tokens_per_sec)
+    parser.add_argument("--num-tokens", type=int, default=FakeOllamaSettings().num_tokens)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--load-time", type=float, default=0.0)
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="fraction of requests whose first token is delayed")
+    parser.add_argument("--stall-time", type=float, default=0.0, help="extra delay of a stalled request")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings = FakeOllamaSettings(
+        ttft=args.ttft,
+        tokens_per_sec=args.tokens_per_sec,
+        num_tokens=args.num_tokens,
+        error_rate=args.error_rate,
+        load_time=args.load_time,
+        stall_rate=args.stall_rate,
+        stall_time=args.stall_time,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Benchmark the backend request path against the fake Ollama server.
+
+Starts `benchmarks.fake_ollama` in a subprocess, serves `backend.main.app`
+with uvicorn in a background thread, then drives `/generate` and
+`/generate/stream` at fixed concurrency levels. Throughput and
+p50/p95/p99 latency (plus time to first token for streams) are printed and
+written to a JSON file so runs can be compared across commits:
+
+    python -m benchmarks.run_benchmarks --concurrency 1 8 32 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p95/p99, mean and max of `samples`, in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+        return ordered[index] * 1000
+
+    return {
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "mean": sum(ordered) / len(ordered) * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+
+def git_commit() -> str | None:
+    """Current commit hash, if the tree is a git checkout."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def wait_until_up(url: str, timeout: float = 15.0):
+    """Poll `url` until it answers or `timeout` expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_fake_ollama(args: argparse.Namespace) -> subprocess.Popen:
+    """Launch the fake Ollama server in a subprocess."""
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_ollama",
+            "--port", str(args.ollama_port),
+            "--ttft", str(args.ttft),
+            "--tokens-per-sec", str(args.tokens_per_sec),
+            "--num-tokens", str(args.num_tokens),
+            "--error-rate", str(args.error_rate),
+            "--seed", str(args.seed),
+        ],
+        cwd=ROOT,
+    )
+    wait_until_up(f"http://127.0.0.1:{args.ollama_port}/api/ps")
+    return process
+
+
+def start_backend(port: int, ollama_url: str):
+    """Serve `backend.main.app` with uvicorn in a daemon thread, pointed at `ollama_url`."""
+    import config
+
+    # Must happen before the backend modules read their settings
+    config.OLLAMA_NODES = [ollama_url]
+
+    import uvicorn
+    from backend.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    wait_until_up(f"http://127.0.0.1:{port}/health")
+    return server, thread
+
+
+async def _one_request(client: httpx.AsyncClient, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    first_token = None
+    try:
+        if endpoint == "/generate/stream":
+            async with client.stream("POST", endpoint, json=payload) as response:
+                async for line in response.aiter_lines():
+                    if first_token is None and line.startswith("data:"):
+                        first_token = time.perf_counter() - started
+                status = response.status_code
+        else:
+            response = await client.post(endpoint, json=payload)
+            status = response.status_code
+    except httpx.HTTPError:
+        status = 0
+    return {"status": status, "latency": time.perf_counter() - started, "ttft": first_token}
+
+
+async def run_level(base_url: str, endpoint: str, concurrency: int, total: int, thinking: bool) -> Dict[str, Any]:
+    """
+    Send `total` requests to `endpoint` with `concurrency` in flight at a time.
+
+    Returns:
+        Throughput, status counts, latency percentiles and the upstream
+        connections the backend opened and reused for the level
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        pool_before = (await client.get("/stats/pool")).json()
+        counter = iter(range(total))
+        samples: List[Dict[str, Any]] = []
+
+        async def worker():
+            for i in counter:
+                payload = {"prompt": f"benchmark prompt {endpoint} {concurrency} {i}", "thinking": thinking}
+                samples.append(await _one_request(client, endpoint, payload))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        pool_after = (await client.get("/stats/pool")).json()
+
+    ok = [s for s in samples if s["status"] == 200]
+    status_counts: Dict[str, int] = {}
+    for sample in samples:
+        status_counts[str(sample["status"])] = status_counts.get(str(sample["status"]), 0) + 1
+    result = {
+        "endpoint": endpoint,
+        "thinking": thinking,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": total - len(ok),
+        "status_counts": status_counts,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "latency_ms": percentiles([s["latency"] for s in ok]),
+        "upstream_connections": {
+            key: pool_after[key] - pool_before[key] for key in ("new_connections", "reused_connections")
+        },
+    }
+    ttfts = [s["ttft"] for s in ok if s["ttft"] is not None]
+    if ttfts:
+        result["ttft_ms"] = percentiles(ttfts)
+    return result
+
+
+def main():
+    """Run the benchmark suite from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the AI Assistant backend against a fake Ollama")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--endpoints", nargs="+", default=["/generate", "/generate/stream"])
+    parser.add_argument("--thinking", action="store_true", help="send thinking-mode requests")
+    parser.add_argument("--ttft", type=float, default=0.02)
+    parser.add_argument("--tokens-per-sec", type=float, default=1000.0)
+    parser.add_argument("--num-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ollama-port", type=int, default=11500)
+    parser.add_argument("--backend-port", type=int, default=8900)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    fake = start_fake_ollama(args)
+    try:
+        server, thread = start_backend(args.backend_port, f"http://127.0.0.1:{args.ollama_port}")
+        base_url = f"http://127.0.0.1:{args.backend_port}"
+        results = []
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                result = asyncio.run(run_level(base_url, endpoint, concurrency, args.requests, args.thinking))
+                results.append(result)
+                latency = result["latency_ms"]
+                print(
+                    f"{endpoint:<18} c={concurrency:<4} {result['throughput_rps']:8.1f} req/s  "
+                    f"p50={latency.get('p50', 0):7.1f}ms p95={latency.get('p95', 0):7.1f}ms "
+                    f"p99={latency.get('p99', 0):7.1f}ms errors={result['errors']} "
+                    f"new_conns={result['upstream_connections']['new_connections']}"
+                )
+        server.should_exit = True
+        thread.join(timeout=10)
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "fake_ollama": {
+                "ttft": args.ttft,
+                "tokens_per_sec": args.tokens_per_sec,
+                "num_tokens": args.num_tokens,
+                "error_rate": args.error_rate,
+                "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
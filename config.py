@@ -5,18 +5,216 @@ API_HOST = "0.0.0.0"
 API_PORT = 8000
 API_TIMEOUT = 200
 API_HEALTH_TIMEOUT = 5
+API_MAX_BACKPRESSURE_RETRIES = 2
+API_MAX_RETRY_AFTER = 30
+API_POOL_SIZE = 10
+API_RETRIES = 3
+API_RETRY_BACKOFF = 0.25
+API_RETRY_BACKOFF_MAX = 4.0
 
 # Ollama Settings
 OLLAMA_BASE_URL = "http://localhost:11434"
 OLLAMA_TIMEOUT = 60
 
+# Upstream Ollama nodes; requests are balanced across them
+OLLAMA_NODES = [OLLAMA_BASE_URL]
+OLLAMA_HEALTH_INTERVAL = 10.0
+OLLAMA_HEALTH_TIMEOUT = 2.0
+OLLAMA_EJECT_AFTER_FAILURES = 3
+OLLAMA_COLD_MODEL_PENALTY = 2
+
+# Hedged requests: if a request's first token has not arrived after the
+# HEDGE_TTFT_PERCENTILE of recent time-to-first-token for its model, a
+# duplicate goes to another healthy node and the first to answer wins.
+# HEDGE_BUDGET caps hedges as a fraction of requests (token bucket of at
+# most HEDGE_BURST hedges), so hedging cannot amplify an overload.
+HEDGE_ENABLED = False
+HEDGE_TTFT_PERCENTILE = 95
+HEDGE_MIN_DELAY = 0.05
+HEDGE_MIN_SAMPLES = 20
+HEDGE_WINDOW = 200
+HEDGE_BUDGET = 0.05
+HEDGE_BURST = 5
+
+# Ollama HTTP connection pool (shared client, see OllamaService)
+OLLAMA_MAX_CONNECTIONS = 32
+OLLAMA_MAX_KEEPALIVE_CONNECTIONS = 16
+OLLAMA_KEEPALIVE_EXPIRY = 30.0
+OLLAMA_CONNECT_TIMEOUT = 5.0
+OLLAMA_READ_TIMEOUT = OLLAMA_TIMEOUT
+OLLAMA_WRITE_TIMEOUT = 10.0
+OLLAMA_POOL_TIMEOUT = 10.0
+
+# Response cache for /generate
+CACHE_ENABLED = True
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_TTL = 3600
+CACHE_SQLITE_PATH = None  # e.g. "response_cache.sqlite3" to survive restarts
+
+# Coalesce identical in-flight generations into one upstream call
+SINGLE_FLIGHT_ENABLED = True
+
+# Multi-turn chat sessions (/chat): server-side history, pinned node and model
+CHAT_SESSION_TTL = 3600
+CHAT_MAX_SESSIONS = 1000
+
+# Background generation jobs (/jobs): finished jobs are kept for JOB_TTL seconds
+JOB_TTL = 600
+JOB_MAX_JOBS = 1000
+
+# Durable work queue: when enabled, /generate hands work to separate worker
+# processes (run_workers.py) through a SQLite database in WAL mode
+QUEUE_ENABLED = False
+QUEUE_SQLITE_PATH = "work_queue.sqlite3"
+QUEUE_WORKERS = 2
+QUEUE_WORKER_CONCURRENCY = 4
+QUEUE_LEASE_SECONDS = 30.0
+QUEUE_MAX_ATTEMPTS = 3
+QUEUE_NOTIFY_INTERVAL = 0.01
+QUEUE_RESULT_TIMEOUT = 180.0
+QUEUE_PURGE_INTERVAL = 60.0
+
 # Model Settings
 DEFAULT_MODEL = "llama3.2:3b"
 THINKING_MODEL = "qwen3:8b"
 
+# Model routing: with a latency target (per request `latency_target_ms`, or
+# ROUTING_LATENCY_TARGET_MS for all requests), prompts of at most
+# ROUTING_SHORT_PROMPT_TOKENS bound for THINKING_MODEL go to DEFAULT_MODEL
+# when the thinking model's queue would miss the target. With a
+# ROUTING_LOG_PATH (e.g. "routing_decisions.jsonl"), every decision is also
+# written there as a JSON line by a background thread, rotating the file at
+# ROUTING_LOG_MAX_BYTES and keeping ROUTING_LOG_BACKUPS old files.
+ROUTING_LATENCY_TARGET_MS = None
+ROUTING_SHORT_PROMPT_TOKENS = 64
+ROUTING_LOG_PATH = None
+ROUTING_LOG_MAX_BYTES = 50 * 1024 * 1024
+ROUTING_LOG_BACKUPS = 3
+ROUTING_RECENT_DECISIONS = 100
+
+# Requests to these paths are timed phase by phase (validation, selection,
+# cache, queue, connect, ttft, decode, serialize). The timings go back in a
+# Server-Timing header and are logged as one JSON line per request.
+REQUEST_TIMING_PATHS = ["/generate"]
+
+# Per-model circuit breakers (brownout): over the last BREAKER_WINDOW upstream
+# calls of a model (once there are BREAKER_MIN_CALLS), a failure rate of
+# BREAKER_FAILURE_RATE or a share of BREAKER_SLOW_RATE slow calls opens its
+# breaker. A non-streamed call is slow after the model's
+# BREAKER_SLOW_CALL_SECONDS; a stream is slow when its first token takes
+# longer than BREAKER_SLOW_FIRST_TOKEN_SECONDS, however long a healthy
+# answer then takes to decode. While open, requests
+# fail fast with a 503 or, if they allow it (`fallback="degrade"`), go to
+# DEFAULT_MODEL marked `degraded`. After BREAKER_OPEN_SECONDS one probe at a
+# time is let through; BREAKER_HALF_OPEN_PROBES good probes close the breaker
+# again and a bad one reopens it.
+BREAKER_ENABLED = True
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 10
+BREAKER_FAILURE_RATE = 0.5
+BREAKER_SLOW_RATE = 0.8
+BREAKER_SLOW_CALL_SECONDS = {
+    DEFAULT_MODEL: 30.0,
+    THINKING_MODEL: 60.0,
+}
+BREAKER_DEFAULT_SLOW_CALL_SECONDS = 60.0
+BREAKER_SLOW_FIRST_TOKEN_SECONDS = {
+    DEFAULT_MODEL: 10.0,
+    THINKING_MODEL: 20.0,
+}
+BREAKER_DEFAULT_SLOW_FIRST_TOKEN_SECONDS = 20.0
+BREAKER_OPEN_SECONDS = 30.0
+BREAKER_HALF_OPEN_PROBES = 3
+
+# Semantic cache for /generate: serves paraphrases of cached prompts. Prompts
+# are embedded with SEMANTIC_CACHE_EMBED_MODEL through Ollama and compared by
+# cosine similarity with up to SEMANTIC_CACHE_CAPACITY cached prompts; a match
+# at or above the model's threshold returns the stored answer. With
+# SEMANTIC_CACHE_PATH (a .npy file) the index is memory-mapped from disk and
+# reloaded on restart, with the answers in a .json file next to it. A lookup
+# scans every entry of its model and options, so the capacity bounds the scan:
+# 4096 entries of 768 floats take well under a millisecond.
+SEMANTIC_CACHE_ENABLED = False
+SEMANTIC_CACHE_EMBED_MODEL = "nomic-embed-text"
+SEMANTIC_CACHE_CAPACITY = 4096
+SEMANTIC_CACHE_THRESHOLD = {
+    DEFAULT_MODEL: 0.92,
+    THINKING_MODEL: 0.95,
+}
+SEMANTIC_CACHE_DEFAULT_THRESHOLD = 0.95
+SEMANTIC_CACHE_TTL = CACHE_TTL
+SEMANTIC_CACHE_PATH = None  # e.g. "semantic_cache.npy"
+
+# Model residency: how long Ollama keeps each model loaded after a request,
+# which models are preloaded at startup, and how often residency is checked
+MODEL_KEEP_ALIVE = {
+    DEFAULT_MODEL: "30m",
+    THINKING_MODEL: "15m",
+}
+# Context window each model runs with (Ollama's num_ctx). It is sent with
+# every request: Ollama reloads a model whose num_ctx changes
+MODEL_NUM_CTX = {
+    DEFAULT_MODEL: 4096,
+    THINKING_MODEL: 8192,
+}
+DEFAULT_NUM_CTX = 4096
+RESIDENCY_ENABLED = True
+RESIDENCY_WARM_MODELS = [DEFAULT_MODEL, THINKING_MODEL]
+RESIDENCY_POLL_INTERVAL = 15.0
+
+# Chat context window: the prompt token budget (estimated) is the model's
+# num_ctx minus the tokens reserved for its reply (the request's num_predict
+# if set), trimmed in steps down to CONTEXT_TRIM_TARGET of the budget so the
+# cached prompt prefix stays stable between trims; dropped turns are folded
+# into a rolling summary
+CONTEXT_RESERVED_OUTPUT = {
+    DEFAULT_MODEL: 1024,
+    THINKING_MODEL: 4096,  # thinking output counts against the context too
+}
+CONTEXT_DEFAULT_RESERVED_OUTPUT = 1024
+CONTEXT_TRIM_TARGET = 0.6
+CONTEXT_CHARS_PER_TOKEN = 4
+CONTEXT_MESSAGE_OVERHEAD = 4
+CONTEXT_SUMMARY_ENABLED = True
+CONTEXT_SUMMARY_MAX_TOKENS = 256
+
+# Batch generation (/generate/batch): concurrent items per model
+BATCH_MAX_ITEMS = 1000
+BATCH_CONCURRENCY = {
+    DEFAULT_MODEL: 4,
+    THINKING_MODEL: 2,
+}
+BATCH_DEFAULT_CONCURRENCY = 2
+
+# Admission control: concurrent upstream slots (per Ollama node) and bounded wait queue per model
+ADMISSION_SLOTS = {
+    DEFAULT_MODEL: 4,
+    THINKING_MODEL: 1,
+}
+ADMISSION_MAX_QUEUE = {
+    DEFAULT_MODEL: 32,
+    THINKING_MODEL: 8,
+}
+ADMISSION_DEFAULT_SLOTS = 2
+ADMISSION_DEFAULT_MAX_QUEUE = 16
+ADMISSION_MAX_WAIT = 30.0
+ADMISSION_INITIAL_SERVICE_TIME = 5.0
+
 # Frontend Settings
 FRONTEND_HOST = "localhost"
 FRONTEND_PORT = 8501
+HEALTH_MONITOR_INTERVAL = 5.0
+JOB_POLL_INTERVAL = 0.5  # seconds between reruns while a reply is generating
+CHAT_PAGE_SIZE = 20  # turns rendered per page of chat history
+CHAT_RENDER_CACHE_SIZE = 4096  # memoized message bubbles
 
 # Logging
 LOG_LEVEL = "INFO"
+# The backend logs JSON lines through a queue of LOG_QUEUE_SIZE records to a
+# background writer thread; records arriving while it is full are dropped.
+# Lines of a request are kept for a LOG_SAMPLE_RATES fraction of requests per
+# level (chosen by request ID, so a request's lines stay together); levels
+# not listed, and lines outside a request, are always kept.
+LOG_QUEUE_SIZE = 10000
+LOG_SAMPLE_RATES = {"DEBUG": 0.01, "INFO": 0.1}
@@ -1,43 +1,204 @@
-import requests
-from typing import Dict, Any, Optional
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Any, Optional, Iterator, AsyncIterator, List, Tuple
 import logging
-from config import API_PORT, API_TIMEOUT, API_HEALTH_TIMEOUT
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from config import (
+    API_PORT,
+    API_TIMEOUT,
+    API_HEALTH_TIMEOUT,
+    API_MAX_BACKPRESSURE_RETRIES,
+    API_MAX_RETRY_AFTER,
+    API_POOL_SIZE,
+    API_RETRIES,
+    API_RETRY_BACKOFF,
+    API_RETRY_BACKOFF_MAX,
+    JOB_TTL,
+)
 
 logger = logging.getLogger(__name__)
 
+# Statuses worth retrying for idempotent calls
+RETRY_STATUSES = {502, 503, 504}
+
+
+def backoff_delay(attempt: int, base: float = API_RETRY_BACKOFF, cap: float = API_RETRY_BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_delay(headers, cap: float) -> float | None:
+    """Seconds to wait per a Retry-After header, or None if it exceeds `cap`."""
+    try:
+        delay = float(headers.get("Retry-After", 1))
+    except ValueError:
+        delay = 1.0
+    return delay if delay <= cap else None
+
+
+def parse_server_timing(header: str | None) -> Dict[str, float]:
+    """Durations (ms) by name from a `Server-Timing` header value."""
+    timings: Dict[str, float] = {}
+    for entry in (header or "").split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        for param in params:
+            key, _, value = param.partition("=")
+            if key == "dur" and name:
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+class SSEParser:
+    """Incremental parser for the backend's Server-Sent Events stream."""
+
+    def __init__(self):
+        self.event: str | None = None
+
+    def feed(self, line: str) -> Tuple[str | None, Dict[str, Any]] | None:
+        """
+        Consume one line of the stream.
+
+        Returns:
+            (event, data) once a data line completes a frame, else None
+        """
+        if not line:
+            self.event = None
+            return None
+        if line.startswith("event:"):
+            self.event = line[6:].strip()
+            return None
+        if not line.startswith("data:"):
+            return None
+        return self.event, json.loads(line[5:])
+
+
+def _token_from_frame(event: str | None, data: Dict[str, Any]) -> str | None:
+    """Token text of a frame; raises on error frames and returns "" on done."""
+    if event == "done":
+        return ""
+    if event == "error":
+        raise RuntimeError(data.get("detail", "Streaming failed"))
+    return data.get("token") or None
+
 
 class APIClient:
-    """Client to interact with the FastAPI backend."""
-    
+    """
+    Client to interact with the FastAPI backend.
+
+    Requests share one pooled `requests.Session`, so connections to the
+    backend are kept alive between messages and health checks. Idempotent
+    calls are retried with jittered exponential backoff; generation calls
+    only wait out 429 backpressure. Responses and finished jobs carry the
+    backend's phase `timings` (ms) plus `client_total`, the time this
+    client waited, so the hop between Streamlit and the backend shows up
+    as the difference to `total`.
+    """
+
     def __init__(self, base_url: str | None = None, host: str = "http://localhost", port: int | None = None):
         # Build base URL from config unless explicitly provided
         if base_url:
-            self.base_url = base_url
+            self.base_url = base_url.rstrip("/")
         else:
             use_port = port if port is not None else API_PORT
             self.base_url = f"{host}:{use_port}"
-        self.generate_url = f"http://localhost:8000/generate"
+        self.generate_url = f"{self.base_url}/generate"
+        self.stream_url = f"{self.base_url}/generate/stream"
+        self.chat_url = f"{self.base_url}/chat"
+        self.chat_stream_url = f"{self.base_url}/chat/stream"
+        self.jobs_url = f"{self.base_url}/jobs"
+        self.requests_url = f"{self.base_url}/requests"
+        self.health_url = f"{self.base_url}/health"
         # Default timeouts from config
         self.request_timeout = API_TIMEOUT
         self.health_timeout = API_HEALTH_TIMEOUT
-    
+        self.max_backpressure_retries = API_MAX_BACKPRESSURE_RETRIES
+        self.max_retry_after = API_MAX_RETRY_AFTER
+        self.retries = API_RETRIES
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        # perf_counter() at submission of jobs not seen finished yet
+        self._job_started: Dict[str, float] = {}
+        # Jobs older than this have expired on the backend
+        self._job_max_age = self.request_timeout + JOB_TTL
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET with retries on connection errors and 502/503/504.
+
+        Raises:
+            requests.RequestException: If every attempt fails
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                response.close()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            time.sleep(backoff_delay(attempt))
+        raise AssertionError("unreachable")
+
+    def _post(self, url: str, payload: Dict[str, Any], **kwargs) -> requests.Response:
+        """
+        POST to the backend, waiting out 429 responses per their Retry-After header.
+
+        Returns:
+            The final response; a 429 is returned as-is once retries are
+            exhausted or the advertised wait exceeds `max_retry_after`
+        """
+        attempt = 0
+        while True:
+            response = self.session.post(url, json=payload, **kwargs)
+            if response.status_code != 429 or attempt >= self.max_backpressure_retries:
+                return response
+            delay = retry_after_delay(response.headers, self.max_retry_after)
+            if delay is None:
+                return response
+            response.close()
+            attempt += 1
+            logger.info(f"Backend busy, retrying in {delay:.0f}s (attempt {attempt})")
+            time.sleep(delay)
+
     def generate_response(
-        self, 
-        prompt: str, 
-        model: str = "llama3.2:3b", 
+        self,
+        prompt: str,
+        model: str | None = None,
         thinking: bool = False
     ) -> Dict[str, Any]:
         """
         Send request to FastAPI backend to generate response.
-        
+
         Args:
             prompt: User prompt
-            model: Model to use
+            model: Model to use; None lets the backend route the request
             thinking: Whether to use thinking mode
-            
+
         Returns:
-            Response from API
-            
+            Response from API, with the request's `timings`
+
         Raises:
             requests.RequestException: If request fails
         """
@@ -46,30 +207,413 @@ class APIClient:
             "prompt": prompt,
             "thinking": thinking
         }
-        
+
         try:
-            response = requests.post(
+            started = time.perf_counter()
+            response = self._post(
                 self.generate_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=self.request_timeout
+                payload,
+                timeout=(self.health_timeout, self.request_timeout)
             )
             response.raise_for_status()
-            return response.json()
-            
+            result = response.json()
+            result["request_id"] = response.headers.get("X-Request-ID")
+            result["timings"] = parse_server_timing(response.headers.get("Server-Timing"))
+            result["timings"]["client_total"] = round((time.perf_counter() - started) * 1000, 2)
+            return result
+
         except requests.RequestException as e:
             logger.error(f"API request failed: {e}")
             raise
-    
+
+    def stream_response(
+        self,
+        prompt: str,
+        model: str | None = None,
+        thinking: bool = False
+    ) -> Iterator[str]:
+        """
+        Stream response tokens from the FastAPI backend as they are generated.
+
+        Args:
+            prompt: User prompt
+            model: Model to use; None lets the backend route the request
+            thinking: Whether to use thinking mode
+
+        Yields:
+            Response text tokens in order
+
+        Raises:
+            requests.RequestException: If request fails
+            RuntimeError: If the backend reports an error mid-stream
+        """
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "thinking": thinking
+        }
+        yield from self._stream_tokens(self.stream_url, payload)
+
+    def chat_response(
+        self,
+        message: str,
+        session_id: str | None = None,
+        model: str | None = None,
+        thinking: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Send the next turn of a conversation; the backend keeps the history.
+
+        Args:
+            message: New user message
+            session_id: Conversation ID; the backend starts a new one if None
+            model: Model to use; None lets the backend route the request
+            thinking: Whether to use thinking mode
+
+        Returns:
+            Response from API, including the `session_id` to send next time
+
+        Raises:
+            requests.RequestException: If request fails
+        """
+        payload = {
+            "session_id": session_id,
+            "message": message,
+            "model": model,
+            "thinking": thinking
+        }
+
+        try:
+            response = self._post(
+                self.chat_url,
+                payload,
+                timeout=(self.health_timeout, self.request_timeout)
+            )
+            response.raise_for_status()
+            return response.json()
+
+        except requests.RequestException as e:
+            logger.error(f"API chat request failed: {e}")
+            raise
+
+    def stream_chat(
+        self,
+        message: str,
+        session_id: str,
+        model: str | None = None,
+        thinking: bool = False
+    ) -> Iterator[str]:
+        """
+        Stream the reply to the next turn of a conversation.
+
+        Args:
+            message: New user message
+            session_id: Conversation ID chosen by the caller
+            model: Model to use; None lets the backend route the request
+            thinking: Whether to use thinking mode
+
+        Yields:
+            Response text tokens in order
+
+        Raises:
+            requests.RequestException: If request fails
+            RuntimeError: If the backend reports an error mid-stream
+        """
+        payload = {
+            "session_id": session_id,
+            "message": message,
+            "model": model,
+            "thinking": thinking
+        }
+        yield from self._stream_tokens(self.chat_stream_url, payload)
+
+    def submit_job(
+        self,
+        prompt: str,
+        session_id: str | None = None,
+        model: str | None = None,
+        thinking: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Start a generation in the background on the backend.
+
+        Args:
+            prompt: User prompt
+            session_id: Chat session the prompt continues, if any
+            model: Model to use; None lets the backend route the request
+            thinking: Whether to use thinking mode
+
+        Returns:
+            The job status, including `job_id` to poll with `get_job`
+
+        Raises:
+            requests.RequestException: If request fails
+        """
+        payload = {
+            "prompt": prompt,
+            "session_id": session_id,
+            "model": model,
+            "thinking": thinking
+        }
+        started = time.perf_counter()
+        response = self._post(self.jobs_url, payload, timeout=self.health_timeout)
+        response.raise_for_status()
+        job = response.json()
+        self._prune_jobs(started)
+        self._job_started[job["job_id"]] = started
+        return job
+
+    def _prune_jobs(self, now: float):
+        """Forget submission times of jobs that were abandoned without being seen finished."""
+        for job_id, started in list(self._job_started.items()):
+            if now - started > self._job_max_age:
+                del self._job_started[job_id]
+
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        """
+        Fetch a job's status and the output generated so far.
+
+        Once the job has finished, its `timings` include `client_total`,
+        the time from submission until this poll saw it finish.
+
+        Raises:
+            requests.RequestException: If request fails or the job expired
+        """
+        response = self._get(f"{self.jobs_url}/{job_id}", timeout=self.health_timeout)
+        response.raise_for_status()
+        job = response.json()
+        if job["status"] not in ("queued", "running"):
+            started = self._job_started.pop(job_id, None)
+            if started is not None and job.get("timings") is not None:
+                job["timings"]["client_total"] = round((time.perf_counter() - started) * 1000, 2)
+        return job
+
+    def delete_session(self, session_id: str) -> bool:
+        """
+        Drop a conversation's server-side history.
+
+        Returns:
+            True if the backend knew the session
+        """
+        try:
+            response = self.session.delete(f"{self.chat_url}/{session_id}", timeout=self.health_timeout)
+            return response.status_code == 200 and response.json().get("deleted", False)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Failed to delete chat session: {e}")
+            return False
+
+    def cancel_request(self, request_id: str) -> bool:
+        """
+        Abort an in-flight request or job, stopping its generation on the backend.
+
+        Returns:
+            True if it was still running
+        """
+        self._job_started.pop(request_id, None)
+        try:
+            response = self.session.delete(f"{self.requests_url}/{request_id}", timeout=self.health_timeout)
+            return response.status_code == 200
+        except requests.RequestException as e:
+            logger.warning(f"Failed to cancel request: {e}")
+            return False
+
+    def _stream_tokens(self, url: str, payload: Dict[str, Any]) -> Iterator[str]:
+        """POST `payload` to an SSE endpoint and yield its tokens."""
+        try:
+            with self._post(
+                url,
+                payload,
+                headers={"Accept": "text/event-stream"},
+                timeout=(self.health_timeout, self.request_timeout),
+                stream=True,
+            ) as response:
+                response.raise_for_status()
+                parser = SSEParser()
+                for line in response.iter_lines(decode_unicode=True):
+                    frame = parser.feed(line)
+                    if frame is None:
+                        continue
+                    token = _token_from_frame(*frame)
+                    if token == "":
+                        return
+                    if token:
+                        yield token
+
+        except requests.RequestException as e:
+            logger.error(f"API stream request failed: {e}")
+            raise
+
     def health_check(self) -> bool:
         """
         Check if the API backend is healthy.
-        
+
+        Makes a single attempt, so a dead backend is reported within
+        `health_timeout` instead of after every retry.
+
         Returns:
             True if healthy, False otherwise
         """
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=self.health_timeout)
+            response = self.session.get(self.health_url, timeout=self.health_timeout)
             return response.status_code == 200
         except requests.RequestException:
             return False
+
+    def health_status(self) -> Dict[str, Any]:
+        """
+        Fetch the backend's health report along with the probe latency.
+
+        Like `health_check`, this makes a single attempt without retries.
+
+        Returns:
+            The `/health` payload plus `connected` and `latency_ms`; on failure
+            only `connected: False` and an `error` message
+        """
+        started = time.perf_counter()
+        try:
+            response = self.session.get(self.health_url, timeout=self.health_timeout)
+            latency_ms = (time.perf_counter() - started) * 1000
+            status = response.json() if response.status_code == 200 else {}
+            status.update(connected=response.status_code == 200, latency_ms=latency_ms)
+            return status
+        except (requests.RequestException, ValueError) as e:
+            return {"connected": False, "error": str(e)}
+
+
+class AsyncAPIClient:
+    """
+    httpx-based async sibling of `APIClient` for callers issuing several
+    requests at once (scripts, notebooks, batch tools).
+
+    Use as an async context manager so the pooled client is closed:
+
+        async with AsyncAPIClient() as client:
+            results = await client.generate_many(["a", "b", "c"])
+    """
+
+    def __init__(self, base_url: str | None = None, host: str = "http://localhost", port: int | None = None):
+        if base_url:
+            self.base_url = base_url.rstrip("/")
+        else:
+            use_port = port if port is not None else API_PORT
+            self.base_url = f"{host}:{use_port}"
+        self.request_timeout = API_TIMEOUT
+        self.health_timeout = API_HEALTH_TIMEOUT
+        self.max_backpressure_retries = API_MAX_BACKPRESSURE_RETRIES
+        self.max_retry_after = API_MAX_RETRY_AFTER
+        self.retries = API_RETRIES
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(self.request_timeout, connect=self.health_timeout),
+            limits=httpx.Limits(max_connections=API_POOL_SIZE, max_keepalive_connections=API_POOL_SIZE),
+            headers={"Content-Type": "application/json"},
+        )
+
+    async def aclose(self):
+        """Close pooled connections."""
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def _get(self, path: str, **kwargs) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.client.get(path, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(backoff_delay(attempt))
+        raise AssertionError("unreachable")
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> httpx.Response:
+        attempt = 0
+        while True:
+            response = await self.client.post(path, json=payload)
+            if response.status_code != 429 or attempt >= self.max_backpressure_retries:
+                return response
+            delay = retry_after_delay(response.headers, self.max_retry_after)
+            if delay is None:
+                return response
+            attempt += 1
+            logger.info(f"Backend busy, retrying in {delay:.0f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    async def generate_response(self, prompt: str, model: str | None = None, thinking: bool = False) -> Dict[str, Any]:
+        """
+        Generate a response (see `APIClient.generate_response`).
+
+        Raises:
+            httpx.HTTPError: If request fails
+        """
+        started = time.perf_counter()
+        response = await self._post("/generate", {"model": model, "prompt": prompt, "thinking": thinking})
+        response.raise_for_status()
+        result = response.json()
+        result["request_id"] = response.headers.get("X-Request-ID")
+        result["timings"] = parse_server_timing(response.headers.get("Server-Timing"))
+        result["timings"]["client_total"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    async def chat_response(
+        self, message: str, session_id: str | None = None, model: str | None = None, thinking: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Send the next turn of a conversation (see `APIClient.chat_response`).
+
+        Raises:
+            httpx.HTTPError: If request fails
+        """
+        payload = {"session_id": session_id, "message": message, "model": model, "thinking": thinking}
+        response = await self._post("/chat", payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def generate_many(
+        self, prompts: List[str], model: str | None = None, thinking: bool = False
+    ) -> List[Dict[str, Any] | Exception]:
+        """
+        Generate responses for several prompts concurrently.
+
+        Returns:
+            One entry per prompt, in order: the response dict or the exception raised
+        """
+        return list(await asyncio.gather(
+            *(self.generate_response(prompt, model=model, thinking=thinking) for prompt in prompts),
+            return_exceptions=True,
+        ))
+
+    async def stream_response(self, prompt: str, model: str | None = None, thinking: bool = False) -> AsyncIterator[str]:
+        """
+        Stream response tokens (see `APIClient.stream_response`).
+
+        Raises:
+            httpx.HTTPError: If request fails
+            RuntimeError: If the backend reports an error mid-stream
+        """
+        payload = {"model": model, "prompt": prompt, "thinking": thinking}
+        async with self.client.stream("POST", "/generate/stream", json=payload, headers={"Accept": "text/event-stream"}) as response:
+            response.raise_for_status()
+            parser = SSEParser()
+            async for line in response.aiter_lines():
+                frame = parser.feed(line)
+                if frame is None:
+                    continue
+                token = _token_from_frame(*frame)
+                if token == "":
+                    return
+                if token:
+                    yield token
+
+    async def health_check(self) -> bool:
+        """True if the backend answers `/health` with 200."""
+        try:
+            response = await self.client.get("/health", timeout=self.health_timeout)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
@@ -1,8 +1,12 @@
 import streamlit as st
 import logging
+import time
+import uuid
 from datetime import datetime
 from frontend.api_client import APIClient
 from frontend.ui_components import UIComponents
+from frontend.health_monitor import HealthMonitor
+from config import JOB_POLL_INTERVAL
 
 # Configure page
 st.set_page_config(
@@ -21,63 +25,99 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "awaiting_index" not in st.session_state:
     st.session_state.awaiting_index = None
-if "is_processing" not in st.session_state:
-    st.session_state.is_processing = False
+if "chat_session_id" not in st.session_state:
+    # Server-side conversation history is keyed by this ID
+    st.session_state.chat_session_id = uuid.uuid4().hex
+
+
+@st.cache_resource
+def get_api_client():
+    """Get the shared API client, whose session keeps backend connections alive."""
+    return APIClient()
+
+
+@st.cache_resource
+def get_health_monitor():
+    """Get the shared background backend-health monitor."""
+    return HealthMonitor().start()
 
 
 class AIAssistantApp:
     """Main Streamlit application class."""
     
     def __init__(self):
-        self.api_client = APIClient()
+        self.api_client = get_api_client()
         self.ui = UIComponents()
     
     def check_backend_connection(self) -> bool:
-        """Check if backend is available."""
-        return self.api_client.health_check()
+        """Check if backend is available, using the cached monitor result."""
+        return get_health_monitor().is_connected
     
-    def _process_pending_if_any(self):
-        """If there's a pending chat message, call backend and update it."""
+    def _process_pending_if_any(self, placeholder=None):
+        """
+        Answer the pending chat message through a backend job.
+
+        The first call submits the job; every rerun polls it once, shows the
+        partial output and schedules another rerun after `JOB_POLL_INTERVAL`,
+        so the script thread is never held for the whole generation.
+        """
         idx = st.session_state.awaiting_index
-        if idx is None or st.session_state.is_processing:
+        if idx is None:
             return
         if idx < 0 or idx >= len(st.session_state.messages):
             # reset invalid state
             st.session_state.awaiting_index = None
             return
 
-        st.session_state.is_processing = True
         item = st.session_state.messages[idx]
         try:
-            response_data = self.api_client.generate_response(
-                prompt=item.get("prompt", ""),
-                model=item.get("model", "llama3.2:3b"),
-                thinking=item.get("thinking", False),
-            )
-            response_text = response_data.get("response", "")
-
-            # update the message
-            st.session_state.messages[idx]["response"] = response_text
-            st.session_state.messages[idx]["pending"] = False
-            # optional: add/refresh timestamp for AI
-            st.session_state.messages[idx]["timestamp"] = item.get("timestamp") or datetime.now().strftime("%Y-%m-%d %H:%M")
+            if not item.get("job_id"):
+                item["job_id"] = self.api_client.submit_job(
+                    prompt=item.get("prompt", ""),
+                    session_id=st.session_state.chat_session_id,
+                    model=item.get("model"),
+                    thinking=item.get("thinking", False),
+                )["job_id"]
+            job = self.api_client.get_job(item["job_id"])
         except Exception as e:
             logger.error(f"Generation failed: {e}")
-            st.session_state.messages[idx]["response"] = f"❌ Error: {e}"
-            st.session_state.messages[idx]["pending"] = False
-        finally:
-            st.session_state.awaiting_index = None
-            st.session_state.is_processing = False
+            job = {"status": "error", "error": str(e)}
+
+        item["degraded"] = job.get("degraded", False)
+        if job["status"] in ("queued", "running"):
+            if placeholder is not None:
+                self.ui.render_partial_message(
+                    placeholder,
+                    job.get("output", ""),
+                    model=self.ui.mode_label(item.get("thinking", False), item["degraded"]),
+                    timestamp=item.get("timestamp"),
+                )
+            time.sleep(JOB_POLL_INTERVAL)
             st.rerun()
+
+        # update the message
+        if job["status"] == "done":
+            item["response"] = job.get("output", "")
+        else:
+            item["response"] = f"❌ Error: {job.get('error') or job['status']}"
+        item["pending"] = False
+        # backend phase timings and client wait (ms), for later analysis
+        item["timings"] = job.get("timings")
+        # optional: add/refresh timestamp for AI
+        item["timestamp"] = item.get("timestamp") or datetime.now().strftime("%Y-%m-%d %H:%M")
+        # move on to any message sent while this one was generating
+        st.session_state.awaiting_index = next(
+            (i for i, m in enumerate(st.session_state.messages) if m.get("pending")), None
+        )
+        st.rerun()
     
     def render_sidebar(self):
         """Render sidebar with app info and connection status."""
         with st.sidebar:
             st.markdown("## 📊 App Status")
             
-            # Connection status
-            is_connected = self.check_backend_connection()
-            self.ui.render_connection_status(is_connected)
+            # Connection status (cached by the background monitor)
+            self.ui.render_backend_status(get_health_monitor().status)
             
             st.markdown("---")
             st.markdown("## ℹ️ About")
@@ -98,9 +138,15 @@ class AIAssistantApp:
                 st.markdown(f"Total messages: {len(st.session_state.messages)}")
 
                 if st.button("Clear History"):
+                    # stop generations nobody is waiting for anymore
+                    for item in st.session_state.messages:
+                        if item.get("pending") and item.get("job_id"):
+                            self.api_client.cancel_request(item["job_id"])
+                    self.api_client.delete_session(st.session_state.chat_session_id)
+                    st.session_state.chat_session_id = uuid.uuid4().hex
                     st.session_state.messages = []
+                    st.session_state.chat_pages = 1
                     st.session_state.awaiting_index = None
-                    st.session_state.is_processing = False
                     st.rerun()
     
     def run(self):
@@ -115,7 +161,7 @@ class AIAssistantApp:
         model, thinking = self.ui.render_model_selector()
 
         # Chat container
-        self.ui.render_chat_container(st.session_state.messages)
+        placeholder = self.ui.render_chat_container(st.session_state.messages)
 
         # Chat input (send button + textarea)
         text, submitted = self.ui.render_chat_input()
@@ -132,11 +178,12 @@ class AIAssistantApp:
                     "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
                     "pending": True,
                 })
-                st.session_state.awaiting_index = len(st.session_state.messages) - 1
+                if st.session_state.awaiting_index is None:
+                    st.session_state.awaiting_index = len(st.session_state.messages) - 1
                 st.rerun()
 
         # If there's a pending request, process it now (after UI renders the pending note)
-        self._process_pending_if_any()
+        self._process_pending_if_any(placeholder)
 
 
 def main():
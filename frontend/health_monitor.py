@@ -0,0 +1,64 @@
+import threading
+import time
+import logging
+from typing import Dict, Any
+from .api_client import APIClient
+from config import HEALTH_MONITOR_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Probe the backend `/health` endpoint from a background thread.
+
+    The latest result is kept in memory, so the sidebar can show the backend
+    status instantly on every Streamlit rerun instead of blocking on a
+    network call. One monitor is meant to be shared across sessions via
+    `st.cache_resource`.
+    """
+
+    def __init__(self, api_client: APIClient | None = None, interval: float | None = None):
+        self.api_client = api_client or APIClient()
+        self.interval = float(interval if interval is not None else HEALTH_MONITOR_INTERVAL)
+        self._lock = threading.Lock()
+        self._status: Dict[str, Any] = {"connected": False, "checked_at": None}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="backend-health-monitor", daemon=True)
+
+    def start(self) -> "HealthMonitor":
+        """Start probing in the background; returns self for chaining."""
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+
+    @property
+    def status(self) -> Dict[str, Any]:
+        """Copy of the most recent probe result."""
+        with self._lock:
+            return dict(self._status)
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the last probe reached the backend."""
+        return bool(self.status.get("connected"))
+
+    def check_now(self) -> Dict[str, Any]:
+        """Probe once synchronously and store the result."""
+        status = self.api_client.health_status()
+        status["checked_at"] = time.time()
+        with self._lock:
+            self._status = status
+        return status
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check_now()
+            except Exception as e:
+                logger.error(f"Health probe failed: {e}")
+            self._stop.wait(self.interval)
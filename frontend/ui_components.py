@@ -1,16 +1,63 @@
 # ui_components.py
 import streamlit as st
-from typing import Dict, Any
+import html
+from functools import lru_cache
+from typing import Dict, Any, Iterator
 import logging
 from .api_client import APIClient
 from datetime import datetime
-from config import DEFAULT_MODEL, THINKING_MODEL
+from config import DEFAULT_MODEL, THINKING_MODEL, CHAT_PAGE_SIZE, CHAT_RENDER_CACHE_SIZE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _bubble_html(message: str, is_user: bool, model: str | None, timestamp: str | None) -> str:
+    """Escape and format one chat bubble."""
+    escaped_message = html.escape(message).replace("\n", "<br>")
+
+    # Build meta row (who + optional timestamp)
+    who = "You" if is_user else "AI Assistant"
+    ts_html = f'<span class="time">• {timestamp}</span>' if timestamp else ""
+
+    if is_user:
+        return f"""
+            <div class="msg-row user">
+              <div class="avatar user">YOU</div>
+              <div class="bubble user">
+                <div class="meta"><div class="who">👤 {who}</div>{ts_html}</div>
+                <div>{escaped_message}</div>
+              </div>
+            </div>
+            """
+
+    model_info = f' • {model}' if model else ""
+    return f"""
+            <div class="msg-row ai">
+              <div class="bubble ai">
+                <div class="meta"><div class="who">🤖 AI Assistant{model_info}</div>{ts_html}</div>
+                <div>{escaped_message}</div>
+              </div>
+              <div class="avatar ai">AI</div>
+            </div>
+            """
+
+
+# Finished messages never change, so their HTML is memoized; in-progress
+# streaming text goes through `_bubble_html` directly to keep it out of the cache.
+_chat_message_html = lru_cache(maxsize=CHAT_RENDER_CACHE_SIZE)(_bubble_html)
+
+
+@lru_cache(maxsize=CHAT_RENDER_CACHE_SIZE)
+def _chat_turn_html(prompt: str, response: str, model: str | None, timestamp: str | None) -> str:
+    """HTML for a completed turn: the user bubble followed by the AI bubble (memoized)."""
+    turn = _chat_message_html(prompt, True, None, timestamp)
+    if response:
+        turn += _chat_message_html(response, False, model, timestamp)
+    return turn
+
+
 class UIComponents:
     """UI components for the Streamlit interface."""
 
@@ -237,6 +284,20 @@ class UIComponents:
             unsafe_allow_html=True,
         )
 
+    @staticmethod
+    def mode_label(thinking: bool, degraded: bool = False) -> str:
+        """
+        Label for the mode that produced an answer.
+
+        Args:
+            thinking: Whether thinking mode was requested
+            degraded: Whether the backend fell back to the normal model
+                because the thinking model was unavailable
+        """
+        if not thinking:
+            return "Normal Mode"
+        return "Thinking Mode (degraded to Normal Mode)" if degraded else "Thinking Mode"
+
     @staticmethod
     def render_model_selector() -> tuple[str, bool]:
         """
@@ -305,82 +366,120 @@ class UIComponents:
         st.markdown("---")
         st.markdown(response)
 
+    @staticmethod
+    def chat_message_html(message: str, is_user: bool = True, model: str | None = None, timestamp: str | None = None) -> str:
+        """
+        Build the HTML for a single chat message bubble.
+        Results are memoized by content and metadata, so unchanged messages
+        are not escaped and formatted again on every rerun.
+        """
+        return _chat_message_html(message, is_user, model, timestamp)
+
     @staticmethod
     def render_chat_message(message: str, is_user: bool = True, model: str | None = None, timestamp: str | None = None):
         """
         Render a single chat message with refined styling.
         If timestamp is None, nothing is shown — your messages can include 'timestamp' in the message dict.
         """
-        import html
-
-        escaped_message = html.escape(message).replace("\n", "<br>")
+        st.markdown(
+            UIComponents.chat_message_html(message, is_user=is_user, model=model, timestamp=timestamp),
+            unsafe_allow_html=True,
+        )
 
-        # Build meta row (who + optional timestamp)
-        who = "You" if is_user else "AI Assistant"
-        ts_html = f'<span class="time">• {timestamp}</span>' if timestamp else ""
+    @staticmethod
+    def render_streaming_message(placeholder, tokens: Iterator[str], model: str | None = None, timestamp: str | None = None) -> str:
+        """
+        Render an AI message into `placeholder`, updating it as tokens arrive.
 
-        if is_user:
-            st.markdown(
-                f"""
-                <div class="msg-row user">
-                  <div class="avatar user">YOU</div>
-                  <div class="bubble user">
-                    <div class="meta"><div class="who">👤 {who}</div>{ts_html}</div>
-                    <div>{escaped_message}</div>
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-        else:
-            model_info = f' • {model}' if model else ""
-            st.markdown(
-                f"""
-                <div class="msg-row ai">
-                  <div class="bubble ai">
-                    <div class="meta"><div class="who">🤖 AI Assistant{model_info}</div>{ts_html}</div>
-                    <div>{escaped_message}</div>
-                  </div>
-                  <div class="avatar ai">AI</div>
-                </div>
-                """,
+        Returns:
+            The full response text once the stream is exhausted
+        """
+        parts: list[str] = []
+        for token in tokens:
+            parts.append(token)
+            placeholder.markdown(
+                _bubble_html("".join(parts) + " ▌", False, model, timestamp),
                 unsafe_allow_html=True,
             )
+        text = "".join(parts)
+        placeholder.markdown(
+            UIComponents.chat_message_html(text, is_user=False, model=model, timestamp=timestamp),
+            unsafe_allow_html=True,
+        )
+        return text
 
     @staticmethod
-    def render_chat_container(messages: list):
+    def render_partial_message(placeholder, text: str, model: str | None = None, timestamp: str | None = None):
+        """Render the output generated so far into `placeholder`, with a typing cursor."""
+        if text:
+            placeholder.markdown(_bubble_html(text + " ▌", False, model, timestamp), unsafe_allow_html=True)
+
+    @staticmethod
+    def render_chat_container(messages: list, page_size: int = CHAT_PAGE_SIZE):
         """
-        Render the chat container with all messages.
+        Render the chat container with the most recent messages.
         Expects messages to be list of dicts with keys:
           - prompt (user text)
           - response (ai text)
           - thinking (optional bool)
+          - degraded (optional bool) when the backend answered with the
+            default model because the requested one was unavailable
           - timestamp (optional ISO string or formatted)
           - pending (optional bool) when waiting for AI response
+
+        Only the last `page_size` turns (times the number of pages the user
+        has loaded with "Load older messages") are rendered. Completed turns
+        come from the memoized HTML cache and are emitted in a single
+        markdown call, so a rerun costs roughly the same however long the
+        history grows.
+
+        Returns:
+            A placeholder for the first pending message's AI bubble, to be
+            filled by `render_streaming_message` or `render_partial_message`,
+            or None if nothing is pending
         """
+        stream_placeholder = None
         st.markdown('<div class="chat-wrapper">', unsafe_allow_html=True)
         st.markdown('<div class="chat-container">', unsafe_allow_html=True)
 
         if messages:
-            for msg in messages:
-                # prefer provided timestamps; otherwise None
-                user_ts = msg.get("timestamp") if msg.get("timestamp") else None
-                ai_ts = msg.get("timestamp") if msg.get("timestamp") else None
-
-                # render user entry (prompt)
-                UIComponents.render_chat_message(msg["prompt"], is_user=True, timestamp=user_ts)
-
-                # If pending, show small right-aligned note under user bubble
+            pages = st.session_state.get("chat_pages", 1)
+            visible = min(len(messages), pages * page_size)
+            hidden = len(messages) - visible
+            if hidden:
+                if st.button(f"⬆️ Load older messages ({hidden} more)", key="chat_load_older"):
+                    st.session_state["chat_pages"] = pages + 1
+                    st.rerun()
+
+            turns = []
+            for msg in messages[hidden:]:
                 if msg.get("pending") and not msg.get("response"):
-                    st.markdown(
-                        '<div class="pending-note">⏳ Waiting for the response…</div>',
-                        unsafe_allow_html=True,
-                    )
-
-                # render ai response
-                if msg.get("response"):
-                    model_display = "Thinking Mode" if msg.get("thinking") else "Normal Mode"
-                    UIComponents.render_chat_message(msg["response"], is_user=False, model=model_display, timestamp=ai_ts)
+                    if turns:
+                        st.markdown("".join(turns), unsafe_allow_html=True)
+                        turns = []
+                    # render user entry (prompt)
+                    UIComponents.render_chat_message(msg["prompt"], is_user=True, timestamp=msg.get("timestamp") or None)
+
+                    # Show small right-aligned note under user bubble; only the
+                    # first pending message is being answered, later ones wait
+                    if stream_placeholder is None:
+                        st.markdown(
+                            '<div class="pending-note">⏳ Waiting for the response…</div>',
+                            unsafe_allow_html=True,
+                        )
+                        stream_placeholder = st.empty()
+                    else:
+                        st.markdown('<div class="pending-note">🕒 Queued</div>', unsafe_allow_html=True)
+                    continue
+                model_display = UIComponents.mode_label(msg.get("thinking", False), msg.get("degraded", False))
+                turns.append(_chat_turn_html(
+                    msg["prompt"],
+                    msg.get("response") or "",
+                    model_display,
+                    msg.get("timestamp") or None,
+                ))
+            if turns:
+                st.markdown("".join(turns), unsafe_allow_html=True)
 
             # auto scroll to bottom
             st.markdown(
@@ -402,6 +501,7 @@ class UIComponents:
 
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
+        return stream_placeholder
 
     @staticmethod
     def render_chat_input(autofocus: bool = True):
@@ -496,3 +596,31 @@ class UIComponents:
             st.success("✅ Backend Connected")
         else:
             st.error("❌ Backend Disconnected - Please start the FastAPI server")
+
+    @staticmethod
+    def render_backend_status(status: Dict[str, Any]):
+        """
+        Render the cached backend health report: connection, latency,
+        Ollama reachability and queue depth.
+        """
+        if status.get("checked_at") is None:
+            st.info("⏳ Checking backend connection…")
+            return
+        UIComponents.render_connection_status(bool(status.get("connected")))
+        if not status.get("connected"):
+            return
+
+        ollama = status.get("ollama") or {}
+        details = []
+        if status.get("latency_ms") is not None:
+            details.append(f"Latency: {status['latency_ms']:.0f} ms")
+        if ollama:
+            details.append(f"Ollama nodes: {ollama.get('healthy_nodes', 0)}/{ollama.get('nodes', 0)} up")
+        if "queue_depth" in status:
+            details.append(f"Queued requests: {status['queue_depth']}")
+        if details:
+            st.caption(" • ".join(details))
+        if ollama and not ollama.get("reachable"):
+            st.warning("⚠️ Ollama is unreachable")
+        elif status.get("ready") is False:
+            st.info("⏳ Models are warming up")
@@ -7,6 +7,8 @@ This script should be used with streamlit run command:
 
 import streamlit as st
 import logging
+import time
+import uuid
 from datetime import datetime
 import sys
 import os
@@ -18,6 +20,8 @@ if current_dir not in sys.path:
 
 from frontend.api_client import APIClient
 from frontend.ui_components import UIComponents
+from frontend.health_monitor import HealthMonitor
+from config import JOB_POLL_INTERVAL
 
 # Configure page
 st.set_page_config(
@@ -36,8 +40,9 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "awaiting_index" not in st.session_state:
     st.session_state.awaiting_index = None
-if "is_processing" not in st.session_state:
-    st.session_state.is_processing = False
+if "chat_session_id" not in st.session_state:
+    # Server-side conversation history is keyed by this ID
+    st.session_state.chat_session_id = uuid.uuid4().hex
 
 # Initialize services
 @st.cache_resource
@@ -50,47 +55,77 @@ def get_ui_components():
     """Get UI components instance."""
     return UIComponents()
 
-def check_backend_connection(api_client: APIClient) -> bool:
-    """Check if backend is available."""
-    return api_client.health_check()
-
-def process_pending_if_any(api_client: APIClient):
+@st.cache_resource
+def get_health_monitor():
+    """Get the shared background backend-health monitor."""
+    return HealthMonitor().start()
+
+def get_backend_status() -> dict:
+    """Latest backend health report, read from the monitor without blocking."""
+    return get_health_monitor().status
+
+def process_pending_if_any(api_client: APIClient, ui: UIComponents, placeholder=None):
+    """
+    Answer the pending message through a backend job without holding the script.
+
+    The first call submits the job; every rerun polls it once, shows the
+    partial output and schedules another rerun after `JOB_POLL_INTERVAL`.
+    Widget interactions interrupt those reruns, so the UI stays responsive.
+    """
     idx = st.session_state.awaiting_index
-    if idx is None or st.session_state.is_processing:
+    if idx is None:
         return
     if idx < 0 or idx >= len(st.session_state.messages):
         st.session_state.awaiting_index = None
         return
-    st.session_state.is_processing = True
     item = st.session_state.messages[idx]
     try:
-        response_data = api_client.generate_response(
-            prompt=item.get("prompt", ""),
-            model=item.get("model", "llama3.2:3b"),
-            thinking=item.get("thinking", False),
-        )
-        response_text = response_data.get("response", "")
-        st.session_state.messages[idx]["response"] = response_text
-        st.session_state.messages[idx]["pending"] = False
-        if not st.session_state.messages[idx].get("timestamp"):
-            st.session_state.messages[idx]["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+        if not item.get("job_id"):
+            item["job_id"] = api_client.submit_job(
+                prompt=item.get("prompt", ""),
+                session_id=st.session_state.chat_session_id,
+                model=item.get("model"),
+                thinking=item.get("thinking", False),
+            )["job_id"]
+        job = api_client.get_job(item["job_id"])
     except Exception as e:
         logger.error(f"Generation failed: {e}")
-        st.session_state.messages[idx]["response"] = f"❌ Error: {e}"
-        st.session_state.messages[idx]["pending"] = False
-    finally:
-        st.session_state.awaiting_index = None
-        st.session_state.is_processing = False
+        job = {"status": "error", "error": str(e)}
+
+    item["degraded"] = job.get("degraded", False)
+    if job["status"] in ("queued", "running"):
+        if placeholder is not None:
+            ui.render_partial_message(
+                placeholder,
+                job.get("output", ""),
+                model=ui.mode_label(item.get("thinking", False), item["degraded"]),
+                timestamp=item.get("timestamp"),
+            )
+        time.sleep(JOB_POLL_INTERVAL)
         st.rerun()
 
+    if job["status"] == "done":
+        item["response"] = job.get("output", "")
+    else:
+        item["response"] = f"❌ Error: {job.get('error') or job['status']}"
+    item["pending"] = False
+    # backend phase timings and client wait (ms), for later analysis
+    item["timings"] = job.get("timings")
+    if not item.get("timestamp"):
+        item["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+    # Move on to the next message sent while this one was generating
+    st.session_state.awaiting_index = next(
+        (i for i, m in enumerate(st.session_state.messages) if m.get("pending")), None
+    )
+    st.rerun()
+
 def render_sidebar(api_client: APIClient, ui: UIComponents):
     """Render sidebar with app info and connection status."""
     with st.sidebar:
         st.markdown("## 📊 App Status")
 
-        # Connection status
-        is_connected = check_backend_connection(api_client)
-        ui.render_connection_status(is_connected)
+        # Connection status (cached by the background monitor)
+        ui.render_backend_status(get_backend_status())
 
         st.markdown("---")
         st.markdown("## ℹ️ About")
@@ -111,9 +146,15 @@ def render_sidebar(api_client: APIClient, ui: UIComponents):
             st.markdown(f"Total messages: {len(st.session_state.messages)}")
 
             if st.button("Clear History"):
+                # stop generations nobody is waiting for anymore
+                for item in st.session_state.messages:
+                    if item.get("pending") and item.get("job_id"):
+                        api_client.cancel_request(item["job_id"])
+                api_client.delete_session(st.session_state.chat_session_id)
+                st.session_state.chat_session_id = uuid.uuid4().hex
                 st.session_state.messages = []
+                st.session_state.chat_pages = 1
                 st.session_state.awaiting_index = None
-                st.session_state.is_processing = False
                 st.rerun()
 
 def main():
@@ -130,7 +171,7 @@ def main():
     model, thinking = ui.render_model_selector()
 
     # Chat container
-    ui.render_chat_container(st.session_state.messages)
+    placeholder = ui.render_chat_container(st.session_state.messages)
 
     # Chat input
     text, submitted = ui.render_chat_input()
@@ -147,11 +188,12 @@ def main():
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
                 "pending": True,
             })
-            st.session_state.awaiting_index = len(st.session_state.messages) - 1
+            if st.session_state.awaiting_index is None:
+                st.session_state.awaiting_index = len(st.session_state.messages) - 1
             st.rerun()
 
     # Process any pending call after rendering UI
-    process_pending_if_any(api_client)
+    process_pending_if_any(api_client, ui, placeholder)
 
 # Run the main function
 main()
@@ -0,0 +1,44 @@
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+import uvicorn
+
+from benchmarks.fake_ollama import FakeOllamaSettings, create_app
+
+
+@contextmanager
+def serve_fake_ollama(settings: FakeOllamaSettings):
+    """Run a fake Ollama server in a background thread and yield its URL."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(settings), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("fake Ollama did not start")
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+@pytest.fixture
+def fake_ollama():
+    """URL of a fake Ollama server (fast, 8 tokens per answer) running in a background thread."""
+    with serve_fake_ollama(FakeOllamaSettings(ttft=0.0, tokens_per_sec=0.0, num_tokens=8)) as url:
+        yield url
+
+
+@pytest.fixture
+def stalling_ollama():
+    """URL of a fake Ollama server whose every answer starts after a 1 s stall."""
+    with serve_fake_ollama(FakeOllamaSettings(ttft=0.0, tokens_per_sec=0.0, num_tokens=8, stall_rate=1.0, stall_time=1.0)) as url:
+        yield url
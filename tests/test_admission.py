@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from backend.admission import AdmissionController, QueueFullError
+
+MODEL = "qwen3:8b"
+
+
+def controller(slots=1, max_queue=1, max_wait=5.0, node_count=1):
+    return AdmissionController({MODEL: slots}, {MODEL: max_queue}, max_wait=max_wait, node_count=node_count)
+
+
+def test_admits_up_to_slots_per_node():
+    async def main():
+        admission = controller(slots=2, node_count=2)
+        for _ in range(4):
+            await admission.acquire(MODEL)
+        stats = admission.stats()[MODEL]
+        assert stats["slots"] == 4
+        assert stats["in_use"] == 4
+        assert stats["queue_depth"] == 0
+
+    asyncio.run(main())
+
+
+def test_full_queue_rejects_with_retry_after():
+    async def main():
+        admission = controller()
+        await admission.acquire(MODEL)
+        waiter = asyncio.create_task(admission.acquire(MODEL))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError) as error:
+            await admission.acquire(MODEL)
+        assert error.value.reason == "queue full"
+        assert error.value.retry_after >= 1
+        assert admission.stats()[MODEL]["rejected"] == 1
+        admission.release(MODEL)
+        await waiter
+
+    asyncio.run(main())
+
+
+def test_release_hands_slot_to_waiters_in_order():
+    async def main():
+        admission = controller(max_queue=2)
+        await admission.acquire(MODEL)
+        order = []
+
+        async def wait(name):
+            await admission.acquire(MODEL)
+            order.append(name)
+
+        first = asyncio.create_task(wait("first"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(wait("second"))
+        await asyncio.sleep(0)
+        assert admission.queue_depth(MODEL) == 2
+
+        admission.release(MODEL)
+        await first
+        admission.release(MODEL)
+        await second
+        assert order == ["first", "second"]
+        assert admission.stats()[MODEL]["in_use"] == 1
+
+    asyncio.run(main())
+
+
+def test_wait_timeout_raises_and_leaves_queue():
+    async def main():
+        admission = controller(max_wait=0.01)
+        await admission.acquire(MODEL)
+        with pytest.raises(QueueFullError) as error:
+            await admission.acquire(MODEL)
+        assert error.value.reason == "queue wait timed out"
+        stats = admission.stats()[MODEL]
+        assert stats["timed_out"] == 1
+        assert stats["queue_depth"] == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def main():
+        admission = controller()
+        await admission.acquire(MODEL)
+        waiter = asyncio.create_task(admission.acquire(MODEL))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert admission.queue_depth(MODEL) == 0
+
+        admission.release(MODEL)
+        assert admission.stats()[MODEL]["in_use"] == 0
+
+    asyncio.run(main())
+
+
+def test_slot_records_service_time_and_releases():
+    async def main():
+        admission = controller()
+        async with admission.slot(MODEL):
+            assert admission.stats()[MODEL]["in_use"] == 1
+        stats = admission.stats()[MODEL]
+        assert stats["in_use"] == 0
+        assert stats["avg_service_ms"] < 5000
+
+    asyncio.run(main())
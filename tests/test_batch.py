@@ -0,0 +1,55 @@
+import asyncio
+
+from backend.batch import BatchRunner
+from backend.models import GenerateRequest, GenerateResponse, RoutingDecision
+
+
+def route(request):
+    if request.prompt == "refused":
+        raise RuntimeError("circuit open")
+    degraded = request.model == "qwen3:8b"
+    return RoutingDecision(
+        model="llama3.2:3b",
+        requested_model=request.model,
+        rule="circuit_open" if degraded else "default",
+        reason="test",
+        prompt_tokens=1,
+        degraded=degraded,
+    )
+
+
+async def generate(request, model):
+    return GenerateResponse(response=f"{model}: {request.prompt}")
+
+
+def runner():
+    return BatchRunner(select=route, generate=generate, limits={}, default_limit=2)
+
+
+def test_results_carry_routing_and_degraded_flag():
+    items = [
+        GenerateRequest(prompt="normal"),
+        GenerateRequest(prompt="fallback", model="qwen3:8b"),
+        GenerateRequest(prompt="refused"),
+    ]
+    results = asyncio.run(runner().run(items))
+
+    assert [result.index for result in results] == [0, 1, 2]
+    assert results[0].response == "llama3.2:3b: normal"
+    assert not results[0].degraded
+    assert results[0].routing.rule == "default"
+    assert results[1].degraded
+    assert results[1].model == "llama3.2:3b"
+    assert results[1].routing.requested_model == "qwen3:8b"
+    assert results[2].error == "circuit open"
+    assert results[2].routing is None
+
+
+def test_stream_yields_every_item():
+    async def collect():
+        items = [GenerateRequest(prompt=str(i)) for i in range(4)]
+        return [result async for result in runner().run_stream(items)]
+
+    results = asyncio.run(collect())
+    assert sorted(result.index for result in results) == [0, 1, 2, 3]
+    assert all(result.routing is not None for result in results)
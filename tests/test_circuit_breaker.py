@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from backend.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers
+
+MODEL = "qwen3:8b"
+
+
+def breaker(**overrides):
+    settings = dict(
+        window=10, min_calls=4, failure_rate=0.5, slow_rate=0.5,
+        slow_call_seconds=10.0, open_seconds=30.0, probes=2, slow_first_token_seconds=1.0,
+    )
+    settings.update(overrides)
+    return CircuitBreaker(MODEL, **settings)
+
+
+def test_stays_closed_below_min_calls():
+    cb = breaker()
+    for _ in range(3):
+        cb.record(0.1, failed=True)
+    assert cb.state == CLOSED
+    assert cb.allow()
+
+
+def test_failure_rate_opens_and_rejects():
+    cb = breaker()
+    for failed in (False, True, False, True):
+        cb.record(0.1, failed=failed)
+    assert cb.state == OPEN
+    assert not cb.allow()
+    assert cb.rejected == 1
+    assert 1 <= cb.retry_after() <= 30
+
+
+def test_slow_calls_open():
+    cb = breaker()
+    for _ in range(4):
+        cb.record(11.0, failed=False)
+    assert cb.state == OPEN
+
+
+def test_long_stream_with_fast_first_token_is_not_slow():
+    cb = breaker()
+    for _ in range(4):
+        cb.record(0.5, failed=False, streamed=True)
+    assert cb.state == CLOSED
+    for _ in range(4):
+        cb.record(2.0, failed=False, streamed=True)
+    assert cb.state == OPEN
+
+
+def test_half_open_probes_close_or_reopen():
+    cb = breaker(open_seconds=0.0)
+    for _ in range(4):
+        cb.record(0.1, failed=True)
+    assert cb.state == OPEN
+
+    assert cb.allow()
+    assert cb.state == HALF_OPEN
+    # One probe at a time
+    assert not cb.allow()
+    cb.record(0.1, failed=False)
+    assert cb.allow()
+    cb.record(0.1, failed=False)
+    assert cb.state == CLOSED
+    assert cb.outcomes.maxlen == 10 and not cb.outcomes
+
+    for _ in range(4):
+        cb.record(0.1, failed=True)
+    assert cb.allow()
+    cb.record(0.1, failed=True)
+    assert cb.state == OPEN
+    assert cb.trips == 3
+
+
+def test_track_records_failures_and_first_token():
+    breakers = CircuitBreakers(
+        enabled=True, window=10, min_calls=1, failure_rate=1.0, slow_rate=1.0,
+        slow_call_seconds={MODEL: 0.01}, slow_first_token_seconds={MODEL: 1.0}, open_seconds=30.0, probes=1,
+    )
+    with breakers.track(MODEL) as call:
+        call.first_token()
+        time.sleep(0.02)
+    assert breakers.states() == {MODEL: CLOSED}
+
+    with pytest.raises(RuntimeError):
+        with breakers.track(MODEL):
+            raise RuntimeError("upstream down")
+    assert breakers.states() == {MODEL: CLOSED}
+    assert breakers.stats()["models"][MODEL]["failure_rate"] == 0.5
+
+    with breakers.track(MODEL):
+        time.sleep(0.02)
+    assert breakers.stats()["models"][MODEL]["slow_rate"] == pytest.approx(1 / 3)
+
+
+def test_disabled_breakers_allow_everything():
+    breakers = CircuitBreakers(enabled=False)
+    with pytest.raises(RuntimeError):
+        with breakers.track(MODEL):
+            raise RuntimeError
+    assert breakers.allow(MODEL)
+    assert breakers.states() == {}
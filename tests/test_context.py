@@ -0,0 +1,33 @@
+from backend.context import ContextManager, estimate_tokens
+from backend.models import ChatMessage
+from backend.sessions import ChatSession
+
+MODEL = "llama3.2:3b"
+
+
+def manager(num_ctx=1000, reserved=400):
+    return ContextManager(num_ctx={MODEL: num_ctx}, reserved_output={MODEL: reserved}, summary_enabled=False)
+
+
+def test_budget_leaves_room_for_the_reply():
+    context = manager()
+    assert context.budget(MODEL) == 600
+    assert context.budget(MODEL, {"num_predict": 100}) == 900
+    assert context.budget(MODEL, {"num_ctx": 2000}) == 1600
+
+
+def test_build_trims_whole_turns_to_the_budget():
+    context = manager(num_ctx=500, reserved=100)
+    session = ChatSession("s", MODEL)
+    for i in range(20):
+        session.messages += [
+            ChatMessage(role="user", content=f"question {i} " * 20),
+            ChatMessage(role="assistant", content=f"answer {i} " * 20),
+        ]
+
+    messages = context.build(session, "next question")
+
+    assert sum(estimate_tokens(m) for m in messages) <= context.budget(MODEL)
+    assert messages[0].role == "user"
+    assert messages[-1].content == "next question"
+    assert context.trims == 1
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from backend.ndjson import NDJSONDecoder, iter_ndjson
+
+
+def test_parses_complete_lines_and_skips_blank_ones():
+    decoder = NDJSONDecoder()
+    assert decoder.feed(b'{"a": 1}\n\n{"b": 2}\n') == [{"a": 1}, {"b": 2}]
+    assert decoder.close() == []
+
+
+def test_line_split_across_chunks():
+    decoder = NDJSONDecoder()
+    assert decoder.feed(b'{"token": "he') == []
+    assert decoder.feed(b'llo"') == []
+    assert decoder.feed(b'}\n{"done"') == [{"token": "hello"}]
+    assert decoder.feed(b': true}\n') == [{"done": True}]
+
+
+def test_every_split_point_gives_the_same_objects():
+    data = b'{"a": 1}\n{"b": [1, 2]}\n{"c": "x"}\n'
+    for size in range(1, len(data) + 1):
+        decoder = NDJSONDecoder()
+        objects = []
+        for i in range(0, len(data), size):
+            objects += decoder.feed(data[i:i + size])
+        assert objects == [{"a": 1}, {"b": [1, 2]}, {"c": "x"}], size
+
+
+def test_close_parses_unterminated_last_line():
+    decoder = NDJSONDecoder()
+    assert decoder.feed(b'{"a": 1}\n{"done": true}') == [{"a": 1}]
+    assert decoder.close() == [{"done": True}]
+    assert decoder.close() == []
+
+
+def test_invalid_json_raises_value_error():
+    decoder = NDJSONDecoder()
+    with pytest.raises(ValueError):
+        decoder.feed(b"not json\n")
+    decoder = NDJSONDecoder()
+    decoder.feed(b'{"a": ')
+    with pytest.raises(ValueError):
+        decoder.close()
+
+
+def test_iter_ndjson():
+    async def chunks():
+        for data in (b'{"a"', b': 1}\n{"b": 2}', b"\n", b'{"c": 3}'):
+            yield data
+
+    async def main():
+        return [item async for item in iter_ndjson(chunks())]
+
+    assert asyncio.run(main()) == [{"a": 1}, {"b": 2}, {"c": 3}]
@@ -0,0 +1,56 @@
+import asyncio
+
+from backend.hedging import HedgePolicy
+from backend.metrics import UPSTREAM_CANCELLED
+from backend.ollama_client import OllamaService
+
+
+def test_streams_reuse_pooled_connection(fake_ollama):
+    async def run():
+        service = OllamaService(nodes=[fake_ollama])
+        try:
+            for _ in range(5):
+                chunks = [chunk async for chunk in service.stream_response("hello there", "llama3.2:3b")]
+                assert chunks[-1]["done"]
+            return service.pool_stats.snapshot()
+        finally:
+            await service.close()
+
+    stats = asyncio.run(run())
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 4
+
+
+def test_consumer_stopping_at_done_still_releases_connection(fake_ollama):
+    async def run():
+        service = OllamaService(nodes=[fake_ollama])
+        try:
+            for _ in range(3):
+                async for chunk in service.stream_response("hello there", "llama3.2:3b"):
+                    if chunk.get("done"):
+                        break
+            return service.pool_stats.snapshot()
+        finally:
+            await service.close()
+
+    stats = asyncio.run(run())
+    assert stats["new_connections"] == 1
+
+
+def test_hedge_loser_is_not_counted_as_cancelled(stalling_ollama, fake_ollama):
+    model = "llama3.2:3b"
+    hedging = HedgePolicy(enabled=True, budget=1.0, burst=1.0, min_delay=0.05, min_samples=1)
+    hedging.record_ttft(model, 0.01)
+
+    async def run():
+        service = OllamaService(nodes=[stalling_ollama, fake_ollama], hedging=hedging)
+        try:
+            chunks = [chunk async for chunk in service.stream_response("hello there", model)]
+            assert chunks[-1]["done"]
+        finally:
+            await service.close()
+
+    cancelled = UPSTREAM_CANCELLED._values.get((model,), 0)
+    asyncio.run(run())
+    assert hedging.hedge_wins == 1
+    assert UPSTREAM_CANCELLED._values.get((model,), 0) == cancelled
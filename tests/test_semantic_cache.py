@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import numpy as np
+
+from backend.semantic_cache import EmbeddingIndex, SemanticCache
+
+DIM = 8
+
+
+def unit(seed):
+    vector = np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def later():
+    return time.time() + 3600
+
+
+def test_search_only_matches_own_partition():
+    index = EmbeddingIndex(16)
+    index.add(0, unit(1), "zero", later())
+    index.add(1, unit(2), "one", later())
+    rows, scores = index.search(np.stack([unit(1), unit(1)]), np.array([0, 1], dtype=np.int32))
+    assert scores[0] > 0.999
+    assert index.match(0, int(rows[0]), unit(1), 0.99) == "zero"
+    assert index.match(1, int(rows[1]), unit(1), 0.99) is None
+
+
+def test_expired_rows_do_not_match():
+    index = EmbeddingIndex(16)
+    index.add(0, unit(1), "stale", time.time() - 1)
+    _, scores = index.search(unit(1)[None, :], np.array([0], dtype=np.int32))
+    assert scores[0] == -np.inf
+
+
+def test_unknown_partition_scores_minus_inf():
+    index = EmbeddingIndex(16)
+    index.add(0, unit(1), "zero", later())
+    _, scores = index.search(unit(1)[None, :], np.array([5], dtype=np.int32))
+    assert scores[0] == -np.inf
+
+
+def test_full_index_evicts_least_recently_used():
+    index = EmbeddingIndex(2)
+    index.add(0, unit(1), "a", later())
+    index.add(1, unit(2), "b", later())
+    rows, _ = index.search(unit(1)[None, :], np.array([0], dtype=np.int32))
+    assert index.match(0, int(rows[0]), unit(1), 0.99) == "a"
+    index.add(1, unit(3), "c", later())
+    assert index.size == 2
+    assert index.evictions == 1
+    answers = sorted(answer for block in index.blocks.values() for answer in block.answers)
+    assert answers == ["a", "c"]
+
+
+def test_full_index_evicts_expired_first():
+    index = EmbeddingIndex(2)
+    index.add(0, unit(1), "expired", time.time() - 1)
+    index.add(0, unit(2), "live", later())
+    index.add(0, unit(3), "new", later())
+    assert sorted(index.blocks[0].answers) == ["live", "new"]
+
+
+def test_blocks_grow_past_initial_allocation():
+    index = EmbeddingIndex(100)
+    for seed in range(40):
+        index.add(0, unit(seed), str(seed), later())
+    rows, scores = index.search(unit(39)[None, :], np.array([0], dtype=np.int32))
+    assert index.match(0, int(rows[0]), unit(39), 0.99) == "39"
+
+
+def test_save_and_reload(tmp_path):
+    path = str(tmp_path / "index.npy")
+    index = EmbeddingIndex(16, path)
+    code = index.partition_id("model")
+    index.add(code, unit(1), "one", later())
+    index.add(index.partition_id("other"), unit(2), "two", later())
+    index.add(code, unit(3), "three", later())
+    index.save()
+
+    reloaded = EmbeddingIndex(16, path)
+    assert reloaded.size == 3
+    assert reloaded.dim == DIM
+    code = reloaded.partition_id("model")
+    assert reloaded.blocks[code].answers == ["one", "three"]
+    rows, _ = reloaded.search(unit(3)[None, :], np.array([code], dtype=np.int32))
+    assert reloaded.match(code, int(rows[0]), unit(3), 0.99) == "three"
+
+    reloaded.add(code, unit(4), "four", later())
+    assert reloaded.size == 4
+
+
+def test_cache_serves_paraphrase_by_embedding():
+    embeddings = {"what is x?": unit(1), "explain x": unit(1), "something else": unit(2)}
+
+    async def embed(prompt):
+        return embeddings[prompt].tolist()
+
+    async def main():
+        cache = SemanticCache(embed, capacity=16, thresholds={}, default_threshold=0.9, ttl=60, path=None, enabled=True)
+        await cache.start()
+        answer, vector = await cache.lookup("m", "what is x?")
+        assert answer is None
+        await cache.put("m", None, vector, "x is a letter")
+        assert (await cache.lookup("m", "explain x"))[0] == "x is a letter"
+        assert (await cache.lookup("m", "something else"))[0] is None
+        assert (await cache.lookup("other", "explain x"))[0] is None
+        assert cache.stats()["hits"] == 1
+
+    asyncio.run(main())
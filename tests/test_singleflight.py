@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from backend.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    async def main():
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(*(flight.run("key", work) for _ in range(5)))
+        assert results == ["answer"] * 5
+        assert calls == 1
+        assert flight.stats() == {"enabled": True, "in_flight": 0, "leaders": 1, "coalesced": 4}
+
+    asyncio.run(main())
+
+
+def test_error_reaches_every_caller():
+    async def main():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream failed")
+
+        results = await asyncio.gather(*(flight.run("key", work) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(main())
+
+
+def test_shared_call_survives_one_cancelled_caller():
+    async def main():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        first = asyncio.create_task(flight.run("key", work))
+        second = asyncio.create_task(flight.run("key", work))
+        await started.wait()
+        first.cancel()
+        assert await second == "answer"
+
+    asyncio.run(main())
+
+
+def test_shared_call_is_cancelled_with_its_last_caller():
+    async def main():
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        caller = asyncio.create_task(flight.run("key", work))
+        await asyncio.sleep(0)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(main())
+
+
+def test_late_stream_subscriber_gets_replay():
+    async def main():
+        flight = SingleFlight()
+        first_sent = asyncio.Event()
+        resume = asyncio.Event()
+
+        async def upstream():
+            yield 1
+            first_sent.set()
+            await resume.wait()
+            yield 2
+            yield 3
+
+        async def collect():
+            return [chunk async for chunk in flight.stream("key", upstream)]
+
+        early = asyncio.create_task(collect())
+        await first_sent.wait()
+        late = asyncio.create_task(collect())
+        await asyncio.sleep(0)
+        resume.set()
+        assert await early == [1, 2, 3]
+        assert await late == [1, 2, 3]
+        assert flight.stats()["leaders"] == 1
+        assert flight.stats()["coalesced"] == 1
+
+    asyncio.run(main())
+
+
+def test_disabled_runs_every_call():
+    async def main():
+        flight = SingleFlight(enabled=False)
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        await asyncio.gather(*(flight.run("key", work) for _ in range(3)))
+        assert calls == 3
+
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+import pytest
+
+from backend import work_queue
+from backend.work_queue import DurableQueue, QueueClient
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = DurableQueue(str(tmp_path / "queue.sqlite3"))
+    yield queue
+    queue.close()
+
+
+def status(queue, job_id):
+    row = queue._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return row[0] if row else None
+
+
+def test_claim_leases_oldest_job_once(queue):
+    first = queue.enqueue({"prompt": "a"})
+    queue.enqueue({"prompt": "b"})
+
+    job_id, payload, attempt = queue.claim("w1")
+    assert (job_id, payload, attempt) == (first, {"prompt": "a"}, 1)
+    assert queue.claim("w2")[1] == {"prompt": "b"}
+    assert queue.claim("w3") is None
+
+
+def test_only_lease_holder_completes(queue):
+    job_id = queue.enqueue({})
+    queue.claim("w1")
+
+    assert not queue.complete(job_id, "w2", "stolen")
+    assert queue.complete(job_id, "w1", "ok")
+    assert queue.finished([job_id]) == {job_id: ("done", "ok", None)}
+
+
+def test_expired_lease_is_retried_and_stale_worker_ignored(queue):
+    job_id = queue.enqueue({})
+    queue.claim("w1", lease=-1)
+
+    assert queue.claim("w2") == (job_id, {}, 2)
+    assert not queue.renew(job_id, "w1")
+    assert not queue.complete(job_id, "w1", "late")
+    assert queue.complete(job_id, "w2", "retry")
+
+
+def test_expired_lease_fails_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(work_queue, "QUEUE_MAX_ATTEMPTS", 2)
+    job_id = queue.enqueue({})
+    queue.claim("w1", lease=-1)
+    queue.claim("w2", lease=-1)
+
+    assert queue.claim("w3") is None
+    assert queue.finished([job_id]) == {job_id: ("failed", None, "lease expired")}
+
+
+def test_release_requeues(queue):
+    job_id = queue.enqueue({})
+    queue.claim("w1")
+    assert queue.release(job_id, "w1")
+    assert queue.claim("w2") == (job_id, {}, 2)
+
+
+def test_cancelled_jobs_are_not_claimed(queue):
+    queued = queue.enqueue({})
+    assert queue.cancel(queued)
+    assert queue.claim("w1") is None
+    assert status(queue, queued) == "cancelled"
+
+
+def test_cancel_revokes_lease(queue):
+    job_id = queue.enqueue({})
+    queue.claim("w1")
+
+    assert queue.cancel(job_id)
+    assert not queue.renew(job_id, "w1")
+    assert not queue.complete(job_id, "w1", "unwanted")
+
+
+def test_cancel_deletes_finished_job(queue):
+    job_id = queue.enqueue({})
+    queue.claim("w1")
+    queue.complete(job_id, "w1", "ok")
+
+    assert not queue.cancel(job_id)
+    assert status(queue, job_id) is None
+
+
+def test_abandoned_jobs_are_cancelled_on_claim(queue):
+    job_id = queue.enqueue({})
+    queue._conn.execute(
+        "UPDATE jobs SET created_at = ? WHERE id = ?", (time.time() - work_queue.QUEUE_RESULT_TIMEOUT - 1, job_id)
+    )
+
+    assert queue.claim("w1") is None
+    assert status(queue, job_id) == "cancelled"
+
+
+def test_purge_removes_old_finished_jobs(queue):
+    done = queue.enqueue({})
+    queue.claim("w1")
+    queue.complete(done, "w1", "ok")
+    cancelled = queue.enqueue({})
+    queue.cancel(cancelled)
+    pending = queue.enqueue({})
+
+    assert queue.purge(older_than=60) == 0
+    assert queue.purge(older_than=-1) == 2
+    assert [status(queue, job) for job in (done, cancelled, pending)] == [None, None, "queued"]
+
+
+def test_submit_returns_worker_result(tmp_path):
+    async def run():
+        client = QueueClient(str(tmp_path / "queue.sqlite3"), notify_interval=0.005, timeout=5)
+        await client.start()
+        worker = DurableQueue(client.path)
+        try:
+            submitted = asyncio.create_task(client.submit({"prompt": "hi"}))
+            while (claimed := worker.claim("w1")) is None:
+                await asyncio.sleep(0.005)
+            worker.complete(claimed[0], "w1", "hello")
+            return await submitted, status(worker, claimed[0])
+        finally:
+            worker.close()
+            await client.close()
+
+    result, row = asyncio.run(run())
+    assert result == "hello"
+    assert row is None
+
+
+def test_submit_timeout_cancels_job(tmp_path):
+    async def run():
+        client = QueueClient(str(tmp_path / "queue.sqlite3"), notify_interval=0.005, timeout=0.05)
+        await client.start()
+        try:
+            with pytest.raises(TimeoutError):
+                await client.submit({"prompt": "hi"})
+            return client.queue.stats()["by_status"], client.cancelled
+        finally:
+            await client.close()
+
+    by_status, cancelled = asyncio.run(run())
+    assert by_status == {"cancelled": 1}
+    assert cancelled == 1